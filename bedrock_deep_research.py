@@ -1,8 +1,9 @@
 import logging
 import os
+import sqlite3
 import uuid
 from datetime import datetime
-from typing import List
+from typing import TYPE_CHECKING, List
 
 import pyperclip
 import pytz
@@ -10,18 +11,25 @@ import streamlit as st
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
-from bedrock_deep_research import BedrockDeepResearch
 from bedrock_deep_research.config import DEFAULT_TOPIC, SUPPORTED_MODELS, Configuration
+from bedrock_deep_research.images import preferred_image
+from bedrock_deep_research.jobs import Job, JobBusy, JobManager, QueueFull
 from bedrock_deep_research.model import Section
-from bedrock_deep_research.utils import CustomError
+
+if TYPE_CHECKING:
+    from bedrock_deep_research import BedrockDeepResearch
 
 logger = logging.getLogger(__name__)
 LOGLEVEL = os.environ.get("LOGLEVEL", "INFO").upper()
+# SQLite database of the checkpoints of the runs, kept on disk rather than in the memory of the process
+CHECKPOINT_DB = os.environ.get("CHECKPOINT_DB", "checkpoints.sqlite")
+# Seconds between two refreshes of the progress of a run
+PROGRESS_INTERVAL = float(os.environ.get("PROGRESS_INTERVAL", "2"))
 
 
 default_st_vals = {
     "head_image_path": None,
-    "bedrock_deep_research": None,
+    "run_config": None,
     "stage": "initial_form",
     "article": "",
     "text_error": "",
@@ -63,6 +71,38 @@ class Article(BaseModel):
         return self.render_outline()
 
 
+@st.cache_resource
+def get_bedrock_deep_research() -> "BedrockDeepResearch":
+    """
+    Returns the compiled graph and its clients, created once per process and shared by all the sessions.
+    The settings of each run travel in its runnable config, kept in the session state. The graph is only
+    imported here, so that the initial form renders before LangGraph and the Bedrock clients are loaded.
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    from bedrock_deep_research import BedrockDeepResearch
+
+    return BedrockDeepResearch(
+        tavily_api_key=os.getenv("TAVILY_API_KEY"),
+        checkpointer=SqliteSaver(sqlite3.connect(CHECKPOINT_DB, check_same_thread=False)),
+    )
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """
+    Returns the background workers running the outlines and articles of all the sessions. The sessions only
+    submit their steps and poll their progress, so a refresh of the browser does not lose the run.
+    The page cannot find a run the manager forgot, so its checkpoints are deleted with it.
+    """
+    return JobManager(
+        get_bedrock_deep_research(),
+        max_workers=int(os.environ.get("MAX_CONCURRENT_RUNS", "4")),
+        max_queued=int(os.environ.get("MAX_QUEUED_RUNS", "16")),
+        delete_forgotten=True,
+    )
+
+
 def init_state():
 
     for key, default_st_val in default_st_vals.items():
@@ -139,41 +179,82 @@ def render_initial_form():
                     }
                 }
 
-                st.session_state.bedrock_deep_research = BedrockDeepResearch(
-                    config=config, tavily_api_key=os.getenv("TAVILY_API_KEY")
-                )
+                try:
+                    get_job_manager().start(topic, config)
+                except QueueFull as e:
+                    logger.warning(f"Run rejected: {e}")
+                    st.session_state.text_error = "The server is busy, please try again in a few minutes"
+                    return
 
-                with st.session_state.text_spinner_placeholder:
-                    with st.spinner(
-                        "Please wait while the article outline is being generated..."
-                    ):
-                        try:
-                            response = st.session_state.bedrock_deep_research.start(
-                                topic)
-                        except CustomError as e:
-                            logger.error(f"Bedrock ClientError: {e}")
-                            raise e
-
-                        except Exception as e:
-                            logger.error(
-                                f"An error occurred while creating the outline: {e}")
-                            raise e
-                        else:
-                            logger.debug(f"Outline response: {response}")
-                            state = st.session_state.bedrock_deep_research.get_state()
-
-                            article = Article(
-                                title=state.values["title"],
-                                sections=state.values["sections"],
-                            )
-                            st.session_state.article = article.render_outline()
-                            st.session_state.stage = "outline_feedback"
-                            st.rerun()
+                st.session_state.run_config = config
+                st.query_params["thread_id"] = config["configurable"]["thread_id"]
+                st.session_state.stage = "running"
+                st.session_state.text_error = ""
+                st.rerun()
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         raise
 
 
+def thread_id() -> str:
+    return st.session_state.run_config["configurable"]["thread_id"]
+
+
+def load_job(job: Job):
+    """Moves the session to the stage of its run, loading the outline or the article once ready."""
+    st.session_state.run_config = job.config
+
+    if job.active:
+        st.session_state.stage = "running"
+        return
+
+    state = get_job_manager().get_state(job.thread_id)
+    if job.status == "completed":
+        st.session_state.head_image_path = state.values.get("head_image_path")
+        st.session_state.article = state.values["final_report"]
+        st.session_state.stage = "final_result"
+    elif state.values.get("sections"):
+        article = Article(
+            title=state.values["title"], sections=state.values["sections"]
+        )
+        st.session_state.article = article.render_outline()
+        st.session_state.stage = "outline_feedback"
+    else:
+        st.session_state.stage = "initial_form"
+
+    if job.status == "failed":
+        st.session_state.text_error = f"An error occurred: {job.error}"
+
+
+@st.fragment(run_every=PROGRESS_INTERVAL)
+def render_progress():
+    """
+    Renders the progress of the run while its step runs in the background, and moves to the next stage
+    once it is done.
+    """
+    job = get_job_manager().get(thread_id())
+    if job is None:
+        st.session_state.text_error = "The run was lost, please start over"
+        st.session_state.stage = "initial_form"
+        st.rerun(scope="app")
+
+    if not job.active:
+        load_job(job)
+        st.rerun(scope="app")
+
+    if job.feedback is True:
+        message = "Please wait while the article is being generated..."
+    else:
+        message = "Please wait while the article outline is being generated..."
+    if job.status == "queued":
+        message += " Your request is queued."
+
+    st.info(message)
+    nodes = [e for e in job.wait_events(timeout=0) if e["type"] == "node"]
+    for event in nodes[-5:]:
+        st.caption(f"Completed {event['path']}")
+
+
 def render_outline_feedback(article_container):
     """
     Renders the article outline and gets user feedback.
@@ -218,7 +299,7 @@ def render_final_result(article_container):
 
     with article_container.container():
         if "head_image_path" in st.session_state and st.session_state.head_image_path:
-            st.image(st.session_state.head_image_path, width=1200)
+            st.image(preferred_image(st.session_state.head_image_path), width=1200)
 
         st.markdown(st.session_state.article)
 
@@ -233,8 +314,13 @@ def render_final_result(article_container):
 
     with col2:
         if st.button("Start Over"):
-            st.session_state.bedrock_deep_research = None
+            try:
+                get_job_manager().forget(thread_id())
+            except JobBusy as e:
+                logger.warning(f"Run kept: {e}")
+            st.session_state.run_config = None
             st.session_state.stage = "initial_form"
+            st.query_params.clear()
 
             st.rerun()
 
@@ -250,26 +336,7 @@ def on_submit_button_click(feedback):
             st.session_state.text_error = "Please enter a feedback"
             return
 
-        with st.session_state.text_spinner_placeholder:
-            with st.spinner("Please wait while your feedback is being processed"):
-                try:
-                    response = st.session_state.bedrock_deep_research.feedback(
-                        feedback)
-
-                    logger.info(f"Feedback response: {response}")
-
-                    state = st.session_state.bedrock_deep_research.get_state()
-
-                    article = Article(
-                        title=state.values["title"], sections=state.values["sections"]
-                    )
-
-                    st.session_state.article = article.render_outline()
-                    st.session_state.text_error = ""
-                    st.rerun()
-                except Exception as e:
-                    st.error(
-                        f"An error occurred while processing feedback: {e}")
+        submit_feedback(feedback)
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         st.error(f"An error occurred: {e}")
@@ -279,31 +346,29 @@ def on_accept_outline_button_click():
     logger.info("Accept outline pressed")
 
     try:
-        # if st.form_submit_button("Accept Outline", type="primary"):
-        with st.session_state.text_spinner_placeholder:
-            with st.spinner("Please wait while the article is being generated..."):
-                try:
-                    response = st.session_state.bedrock_deep_research.feedback(
-                        True)
-
-                    logger.info(f"Accept outline response: {response}")
-
-                    state = st.session_state.bedrock_deep_research.get_state()
-
-                    st.session_state.head_image_path = state.values["head_image_path"]
-                    st.session_state.article = state.values["final_report"]
-
-                    st.session_state.stage = "final_result"
-                    st.session_state.text_error = ""
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"An error occurred in article creation: {e}")
-
+        submit_feedback(True)
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         st.error(f"An error occurred: {e}")
 
 
+def submit_feedback(feedback):
+    """Submits the feedback to the outline to the background workers, and follows the progress of the run."""
+    try:
+        get_job_manager().feedback(thread_id(), feedback)
+    except (QueueFull, JobBusy) as e:
+        logger.warning(f"Feedback rejected: {e}")
+        st.error("The server is busy, please try again in a few minutes")
+        return
+    except KeyError:
+        st.error("The run was lost, please start over")
+        return
+
+    st.session_state.stage = "running"
+    st.session_state.text_error = ""
+    st.rerun()
+
+
 def main():
 
     load_dotenv()
@@ -326,12 +391,24 @@ def main():
 
     st.divider()
 
+    # Resume the run of the page after a refresh of the browser
+    if st.session_state.run_config is None and "thread_id" in st.query_params:
+        job = get_job_manager().get(st.query_params["thread_id"])
+        if job is not None:
+            load_job(job)
+        else:
+            st.query_params.clear()
+
     # Main stage
-    st.session_state.text_spinner_placeholder = st.empty()
     article_placeholder = st.empty()
 
+    if st.session_state.stage != "final_result" and st.session_state.text_error:
+        st.error(st.session_state.text_error)
+
     if st.session_state.stage == "initial_form":
         render_initial_form()
+    elif st.session_state.stage == "running":
+        render_progress()
     elif st.session_state.stage == "outline_feedback":
         render_outline_feedback(article_placeholder)
     elif st.session_state.stage == "final_result":
@@ -1,3 +1,16 @@
-from .graph import BedrockDeepResearch
+from typing import TYPE_CHECKING
 
-__all__ = [BedrockDeepResearch]
+if TYPE_CHECKING:
+    from .graph import BedrockDeepResearch
+
+__all__ = ["BedrockDeepResearch"]
+
+
+def __getattr__(name: str):
+    # The graph loads LangGraph and the dependencies of the nodes, so it is only imported on first use,
+    # leaving the configuration and the models quick to import
+    if name == "BedrockDeepResearch":
+        from .graph import BedrockDeepResearch
+
+        return BedrockDeepResearch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
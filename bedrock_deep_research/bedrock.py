@@ -0,0 +1,118 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Optional
+
+from langchain_core.language_models import BaseChatModel
+
+if TYPE_CHECKING:
+    from .routing import BedrockRouter
+
+logger = logging.getLogger(__name__)
+
+
+class BedrockClients:
+    """
+    Creates the Bedrock chat models and bedrock-runtime clients used by the nodes.
+
+    Chat models and clients are created once per set of arguments and shared by all the runs of the process,
+    as boto3 clients are thread-safe but slow to create, and their creation is not.
+
+    Subclasses can serve the nodes with other implementations, e.g. the in-process fakes of the benchmarks,
+    once installed with `use_bedrock_clients`.
+
+    boto3 and langchain_aws, slow to import, are only loaded with the first model or client.
+
+    With a router, the calls to the model ids it has routes for are spread across the regions and inference
+    profiles serving them, through a bedrock-runtime client per region. With `routes_from_env`, the router
+    is created from the BEDROCK_ROUTES environment variable with the first model or client, like boto3.
+    """
+
+    def __init__(self, router: Optional["BedrockRouter"] = None, routes_from_env: bool = False):
+        # Reentrant, as creating a routed chat model gets the client of the default region
+        self._lock = threading.RLock()
+        self._cache = {}
+        self._router = router
+        self._routes_from_env = routes_from_env
+
+    @property
+    def router(self) -> Optional["BedrockRouter"]:
+        if self._routes_from_env:
+            with self._lock:
+                if self._routes_from_env:
+                    from .routing import router_from_env
+
+                    self._router, self._routes_from_env = router_from_env(), False
+        return self._router
+
+    def _cached(self, key, create):
+        try:
+            hash(key)
+        except TypeError:
+            return create()
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = create()
+            return self._cache[key]
+
+    def chat_model(self, model_id: str, **kwargs) -> BaseChatModel:
+        if self.router is not None and self.router.endpoints(model_id):
+            kwargs = {"client": self.runtime(), "region_name": self.router.endpoints(model_id)[0].region, **kwargs}
+        from langchain_aws import ChatBedrock
+
+        return self._cached(
+            ("chat_model", model_id, tuple(sorted(kwargs.items()))),
+            lambda: ChatBedrock(model_id=model_id, **kwargs),
+        )
+
+    def runtime(self, **config):
+        if self.router is not None:
+            from .routing import RoutedBedrockRuntime
+
+            return self._cached(
+                ("routed_runtime", tuple(sorted(config.items()))),
+                lambda: RoutedBedrockRuntime(self.router, lambda region: self.region_runtime(region, **config)),
+            )
+        return self._cached(("runtime", tuple(sorted(config.items()))), lambda: _runtime_client(None, config))
+
+    def region_runtime(self, region: Optional[str], **config):
+        """
+        Returns the bedrock-runtime client of a region, or of the default region for None. The clients of the
+        routed regions do not retry by default, as the router fails over to another region instead.
+        """
+        retries = {} if region is None else {"retries": {"total_max_attempts": 1, "mode": "standard"}}
+        return self._cached(
+            ("region_runtime", region, tuple(sorted(config.items()))),
+            lambda: _runtime_client(region, {**retries, **config}),
+        )
+
+
+def _runtime_client(region: Optional[str], config: dict):
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(service_name="bedrock-runtime", region_name=region, config=Config(**config))
+
+
+_clients = BedrockClients(routes_from_env=True)
+
+
+def chat_model(model_id: str, **kwargs) -> BaseChatModel:
+    """Returns a chat model for the Bedrock model id, accepting the arguments of ChatBedrock."""
+    return _clients.chat_model(model_id, **kwargs)
+
+
+def bedrock_runtime(**config):
+    """Returns a bedrock-runtime client, configured with the arguments of botocore's Config."""
+    return _clients.runtime(**config)
+
+
+@contextmanager
+def use_bedrock_clients(clients: BedrockClients):
+    """Serves the chat models and bedrock-runtime clients of the whole process from `clients` within the block."""
+    global _clients
+    previous, _clients = _clients, clients
+    try:
+        yield clients
+    finally:
+        _clients = previous
@@ -0,0 +1,33 @@
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .fakes import (CallStats, FakeBedrock, FakeBedrockRuntime, FakeChatBedrock,
+                        FakeTavilyClient, Latency)
+    from .harness import Scenario, run_scenario
+    from .simulator import Faults, LoadScenario, Quota, run_load
+
+# Module of each name, imported on first access so that importing one benchmark, or running it with
+# `python -m`, does not import the others and the graph with them
+_modules = {
+    "CallStats": "fakes",
+    "FakeBedrock": "fakes",
+    "FakeBedrockRuntime": "fakes",
+    "FakeChatBedrock": "fakes",
+    "FakeTavilyClient": "fakes",
+    "Latency": "fakes",
+    "Scenario": "harness",
+    "run_scenario": "harness",
+    "Faults": "simulator",
+    "LoadScenario": "simulator",
+    "Quota": "simulator",
+    "run_load": "simulator",
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name: str):
+    if name in _modules:
+        return getattr(importlib.import_module(f".{_modules[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
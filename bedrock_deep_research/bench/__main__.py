@@ -0,0 +1,124 @@
+import argparse
+import itertools
+import json
+import logging
+import sys
+from pathlib import Path
+
+from .harness import Scenario, parse_configurable, run_scenario
+
+logger = logging.getLogger(__name__)
+
+# Metrics compared against the baseline, where a higher value is a regression
+REGRESSION_METRICS = ["wall_time", "critical_path_time", "checkpoint_bytes", "peak_memory", "total_calls"]
+
+
+def _print_table(results):
+    header = f"{'scenario':<44} {'wall s':>8} {'crit s':>8} {'llm':>5} {'search':>7} {'ckpt KB':>9} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        calls = r["calls"]
+        llm_calls = sum(v for k, v in calls.items() if k.startswith("llm:"))
+        peak = f"{r['peak_memory'] / 2**20:>8.1f}" if r["peak_memory"] is not None else f"{'-':>8}"
+        print(
+            f"{r['scenario']:<44} {r['wall_time']:>8.2f} {r['critical_path_time']:>8.2f} {llm_calls:>5} "
+            f"{calls.get('tavily:search', 0):>7} {r['checkpoint_bytes'] / 1024:>9.1f} {peak}"
+        )
+
+
+def _compare(results, baseline_file: str, tolerance: float) -> list[str]:
+    """Returns the regressions of the results relative to the baseline, by scenario and metric."""
+    baseline = {}
+    for line in Path(baseline_file).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            result = json.loads(line)
+            baseline[result["scenario"]] = result
+
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["scenario"])
+        if reference is None:
+            logger.warning(f"No baseline for scenario {result['scenario']}")
+            continue
+        for metric in REGRESSION_METRICS:
+            value, expected = _metric(result, metric), _metric(reference, metric)
+            if value is not None and expected and value > expected * (1 + tolerance):
+                regressions.append(
+                    f"{result['scenario']}: {metric} {value} > {expected} (+{(value / expected - 1):.0%})")
+    return regressions
+
+
+def _metric(result, metric):
+    if metric == "total_calls":
+        return sum(result["calls"].values())
+    return result.get(metric)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bedrock_deep_research.bench",
+        description="Benchmark the full BedrockDeepResearch graph against deterministic fakes of Bedrock and Tavily.",
+    )
+    parser.add_argument("--sections", type=int, nargs="+", default=[5], help="Sections of the outline")
+    parser.add_argument("--queries", type=int, nargs="+", default=[2], help="Values of number_of_queries")
+    parser.add_argument("--depth", type=int, nargs="+", default=[2], help="Values of max_search_depth")
+    parser.add_argument("--llm-latency", default=Scenario.llm_latency,
+                        help="Latency of LLM calls, e.g. constant:0.5, uniform:0.2:1, lognormal:0.8:0.4")
+    parser.add_argument("--search-latency", default=Scenario.search_latency, help="Latency of Tavily searches")
+    parser.add_argument("--image-latency", default=Scenario.image_latency, help="Latency of image generation")
+    parser.add_argument("--output-words", type=int, default=Scenario.output_words,
+                        help="Words of each text completion")
+    parser.add_argument("--raw-content-words", type=int, default=Scenario.raw_content_words,
+                        help="Words of the raw content of each search result")
+    parser.add_argument("--pass-rate", type=float, default=Scenario.pass_rate,
+                        help="Probability for the section grader to pass a section")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario, the fastest is reported")
+    parser.add_argument("--set", dest="configurable", action="append", metavar="KEY=VALUE",
+                        help="Extra configurable value, e.g. --set max_concurrency=2")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not trace memory allocations, which slow down the run")
+    parser.add_argument("--output", help="Append the results to this JSON lines file")
+    parser.add_argument("--baseline", help="JSON lines file of previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative increase over the baseline reported as a regression")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for sections, queries, depth in itertools.product(args.sections, args.queries, args.depth):
+        scenario = Scenario(
+            sections=sections,
+            number_of_queries=queries,
+            max_search_depth=depth,
+            llm_latency=args.llm_latency,
+            search_latency=args.search_latency,
+            image_latency=args.image_latency,
+            output_words=args.output_words,
+            raw_content_words=args.raw_content_words,
+            pass_rate=args.pass_rate,
+            seed=args.seed,
+            configurable=parse_configurable(args.configurable),
+        )
+        runs = [run_scenario(scenario, trace_memory=not args.no_memory) for _ in range(args.repeat)]
+        results.append(min(runs, key=lambda r: r["wall_time"]))
+
+    _print_table(results)
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    if args.baseline:
+        regressions = _compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
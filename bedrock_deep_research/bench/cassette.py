@@ -0,0 +1,413 @@
+import argparse
+import asyncio
+import base64
+import cProfile
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from ..bedrock import BedrockClients, use_bedrock_clients
+from ..config import DEFAULT_TOPIC
+from .fakes import CallStats, png_bytes
+from .harness import parse_configurable
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMiss(Exception):
+    """Raised when a replayed run makes a call that was not recorded in the cassette"""
+
+
+def _tool_names(tools: Optional[List[Dict[str, Any]]]) -> List[str]:
+    return [tool.get("name") or tool.get("function", {}).get("name", "") for tool in tools or []]
+
+
+def _messages(messages: List[BaseMessage]) -> List[Dict[str, str]]:
+    return [{"type": m.type, "content": str(m.content)} for m in messages]
+
+
+def _llm_key(model_id: str, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> str:
+    payload = json.dumps(
+        [model_id, [(m.type, str(m.content)) for m in messages], _tool_names(tools)])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    Every Bedrock and Tavily call of a run, with its response and latency, stored as gzip-compressed JSON lines.
+
+    The first line describes the run (topic and configurable values), the next ones are the calls in the order
+    they completed, with their request: the messages and tools of the model calls, the body of the image calls
+    and the arguments of the searches. Generated images are not stored, only their size and latency, to keep
+    cassettes compact.
+    """
+
+    def __init__(self, run: Optional[Dict[str, Any]] = None, entries: Optional[List[Dict[str, Any]]] = None):
+        self.run = run or {}
+        self.entries = entries or []
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            entry["offset"] = round(time.monotonic() - self._started - entry["latency"], 4)
+            self.entries.append(entry)
+
+    def save(self, path: str) -> None:
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": "run", **self.run}) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        run = lines[0] if lines and lines[0].get("kind") == "run" else {}
+        return cls(run={k: v for k, v in run.items() if k != "kind"},
+                   entries=[e for e in lines if e.get("kind") != "run"])
+
+
+class RecordingChatModel(BaseChatModel):
+    """Chat model recording the requests and responses of the chat model it delegates to."""
+
+    delegate: Any
+    cassette: Any
+    model_id: str
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def bind_tools(self, tools, **kwargs):
+        # Bind the tools formatted by the delegate, and pass them back to it on every call
+        return self.bind(**self.delegate.bind_tools(tools, **kwargs).kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        started = time.monotonic()
+        result = self.delegate._generate(messages, stop=stop, **kwargs)
+        message = result.generations[0].message
+
+        self.cassette.record(
+            {
+                "kind": "llm",
+                "key": _llm_key(self.model_id, messages, kwargs.get("tools")),
+                "model_id": self.model_id,
+                "tools": _tool_names(kwargs.get("tools")),
+                "input_chars": sum(len(str(m.content)) for m in messages),
+                "request": {"messages": _messages(messages), "tools": kwargs.get("tools") or []},
+                "latency": round(time.monotonic() - started, 4),
+                "response": {
+                    "content": message.content,
+                    "tool_calls": getattr(message, "tool_calls", []),
+                    "usage_metadata": getattr(message, "usage_metadata", None),
+                },
+            }
+        )
+        return result
+
+
+class RecordingRuntime:
+    """bedrock-runtime client recording the request, latency and size of the generated images."""
+
+    def __init__(self, delegate, cassette: Cassette):
+        self.delegate = delegate
+        self.cassette = cassette
+
+    def invoke_model(self, body: str, modelId: str, **kwargs):
+        started = time.monotonic()
+        response = self.delegate.invoke_model(body=body, modelId=modelId, **kwargs)
+        request = json.loads(body)
+        config = request.get("imageGenerationConfig", {})
+        self.cassette.record(
+            {
+                "kind": "image",
+                "model_id": modelId,
+                "request": request,
+                "width": config.get("width", 64),
+                "height": config.get("height", 64),
+                "latency": round(time.monotonic() - started, 4),
+            }
+        )
+        return response
+
+
+class RecordingBedrock(BedrockClients):
+    """Records every call made through the Bedrock clients it delegates to, real ones by default."""
+
+    def __init__(self, cassette: Cassette, delegate: Optional[BedrockClients] = None):
+        super().__init__()
+        self.cassette = cassette
+        self.delegate = delegate or BedrockClients()
+
+    def chat_model(self, model_id: str, **kwargs) -> BaseChatModel:
+        return RecordingChatModel(
+            delegate=self.delegate.chat_model(model_id, **kwargs),
+            cassette=self.cassette,
+            model_id=model_id,
+        )
+
+    def runtime(self, **config):
+        return RecordingRuntime(self.delegate.runtime(**config), self.cassette)
+
+
+class RecordingTavilyClient:
+    """Tavily client recording the responses of the client it delegates to."""
+
+    def __init__(self, delegate, cassette: Cassette):
+        self.delegate = delegate
+        self.cassette = cassette
+
+    async def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        started = time.monotonic()
+        response = await self.delegate.search(query, **kwargs)
+        self.cassette.record(
+            {
+                "kind": "tavily",
+                "key": query,
+                "request": {"query": query, **kwargs},
+                "latency": round(time.monotonic() - started, 4),
+                "response": response,
+            }
+        )
+        return response
+
+
+class _Player:
+    """
+    Serves the recorded entries of a kind. Calls are matched on their exact request first, and fall back to
+    the next unused entry with the same signature, e.g. the same structured output, so that runs with changed
+    prompts can still be replayed.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], signature):
+        self._lock = threading.Lock()
+        self._used = set()
+        self._by_key = defaultdict(deque)
+        self._by_signature = defaultdict(deque)
+        self.signature = signature
+        for i, entry in enumerate(entries):
+            self._by_key[entry.get("key")].append(i)
+            self._by_signature[signature(entry)].append(i)
+        self.entries = entries
+        self.misses = 0
+
+    def take(self, key: str, signature) -> Dict[str, Any]:
+        with self._lock:
+            for queue, exact in ((self._by_key[key], True), (self._by_signature[signature], False)):
+                while queue:
+                    i = queue.popleft()
+                    if i not in self._used:
+                        self._used.add(i)
+                        if not exact:
+                            self.misses += 1
+                        return self.entries[i]
+        raise CassetteMiss(f"No recorded call left for {signature}")
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model answering with the responses of a cassette, after their recorded latency."""
+
+    model_id: str
+    player: Any
+    latency_scale: float = 1.0
+    stats: Any = None
+    max_tokens: Optional[int] = None
+    streaming: bool = False
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tools = kwargs.get("tools")
+        entry = self.player.take(
+            _llm_key(self.model_id, messages, tools), ("llm", tuple(_tool_names(tools)))
+        )
+        time.sleep(entry["latency"] * self.latency_scale)
+
+        response = entry["response"]
+        message = AIMessage(
+            content=response["content"],
+            tool_calls=response.get("tool_calls") or [],
+            usage_metadata=response.get("usage_metadata"),
+        )
+        if self.stats is not None:
+            self.stats.record(f"llm:{'structured' if tools else 'text'}")
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"model_id": self.model_id})
+
+
+class ReplayRuntime:
+    def __init__(self, player: _Player, latency_scale: float, stats: Optional[CallStats]):
+        self.player = player
+        self.latency_scale = latency_scale
+        self.stats = stats
+
+    def invoke_model(self, body: str, modelId: str, **kwargs):
+        entry = self.player.take(None, ("image",))
+        time.sleep(entry["latency"] * self.latency_scale)
+        if self.stats is not None:
+            self.stats.record("bedrock:invoke_model")
+        image = base64.b64encode(png_bytes(entry["width"], entry["height"])).decode("ascii")
+        return {"body": io.BytesIO(json.dumps({"images": [image], "error": None}).encode())}
+
+
+class ReplayBedrock(BedrockClients):
+    """Serves the nodes with the Bedrock calls of a cassette, with their latency scaled by `latency_scale`."""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0, stats: Optional[CallStats] = None):
+        super().__init__()
+        self.latency_scale = latency_scale
+        self.stats = stats or CallStats()
+        self.player = _Player(
+            [e for e in cassette.entries if e["kind"] in ("llm", "image")],
+            lambda e: ("image",) if e["kind"] == "image" else ("llm", tuple(e["tools"])),
+        )
+
+    def chat_model(self, model_id: str, **kwargs) -> BaseChatModel:
+        return ReplayChatModel(
+            model_id=model_id,
+            player=self.player,
+            latency_scale=self.latency_scale,
+            stats=self.stats,
+            **{k: v for k, v in kwargs.items() if k in ("max_tokens", "streaming")},
+        )
+
+    def runtime(self, **config):
+        return ReplayRuntime(self.player, self.latency_scale, self.stats)
+
+
+class ReplayTavilyClient:
+    """Tavily client answering with the search responses of a cassette."""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0, stats: Optional[CallStats] = None):
+        self.latency_scale = latency_scale
+        self.stats = stats
+        self.player = _Player(
+            [e for e in cassette.entries if e["kind"] == "tavily"], lambda e: ("tavily",))
+
+    async def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        entry = self.player.take(query, ("tavily",))
+        await asyncio.sleep(entry["latency"] * self.latency_scale)
+        if self.stats is not None:
+            self.stats.record("tavily:search")
+        return entry["response"]
+
+
+def record(topic: str, path: str, configurable: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs the graph against Bedrock and Tavily, approving the first outline, and saves every call to a cassette."""
+    # Imported here so that replaying does not require the Tavily client
+    from tavily import AsyncTavilyClient
+
+    from ..graph import BedrockDeepResearch
+    from ..web_search import WebSearch
+
+    configurable = {"thread_id": str(uuid.uuid4()), **configurable}
+    cassette = Cassette(run={"topic": topic, "configurable": {
+                        k: v for k, v in configurable.items() if k != "thread_id"}})
+    tavily_client = RecordingTavilyClient(
+        AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY")), cassette)
+
+    with use_bedrock_clients(RecordingBedrock(cassette)):
+        deep_research = BedrockDeepResearch(
+            {"configurable": configurable},
+            tavily_api_key=None,
+            web_search=WebSearch(None, tavily_client=tavily_client),
+        )
+        deep_research.start(topic)
+        deep_research.feedback(True)
+
+    cassette.save(path)
+    return {"entries": len(cassette.entries), "bytes": Path(path).stat().st_size}
+
+
+def replay(path: str, latency_scale: float = 1.0, configurable: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Replays a cassette through the graph, without credentials, and measures the run like the benchmarks do."""
+    from .harness import Scenario, run_scenario
+    cassette = Cassette.load(path)
+    recorded = {**cassette.run.get("configurable", {}), **(configurable or {})}
+    scenario = Scenario(
+        number_of_queries=recorded.pop("number_of_queries", Scenario.number_of_queries),
+        max_search_depth=recorded.pop("max_search_depth", Scenario.max_search_depth),
+        configurable=recorded,
+    )
+    stats = CallStats()
+    clients = ReplayBedrock(cassette, latency_scale, stats)
+    tavily_client = ReplayTavilyClient(cassette, latency_scale, stats)
+
+    result = run_scenario(
+        scenario,
+        topic=cassette.run.get("topic", DEFAULT_TOPIC),
+        clients=clients,
+        tavily_client=tavily_client,
+        stats=stats,
+    )
+    result["recorded_calls"] = len(cassette.entries)
+    result["unmatched_calls"] = clients.player.misses + tavily_client.player.misses
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m bedrock_deep_research.bench.cassette",
+        description="Record a run of the graph to a cassette, or replay a cassette offline.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record a run against Bedrock and Tavily")
+    record_parser.add_argument("cassette", help="Path of the cassette to write, e.g. run.jsonl.gz")
+    record_parser.add_argument("--topic", default=DEFAULT_TOPIC)
+    record_parser.add_argument("--set", dest="configurable", action="append", metavar="KEY=VALUE",
+                               help="Configurable value of the run, e.g. --set max_search_depth=3")
+
+    replay_parser = commands.add_parser("replay", help="Replay a cassette without credentials")
+    replay_parser.add_argument("cassette", help="Path of the cassette to replay")
+    replay_parser.add_argument("--latency-scale", type=float, default=1.0,
+                               help="Factor applied to the recorded latencies, 0 to replay as fast as possible")
+    replay_parser.add_argument("--set", dest="configurable", action="append", metavar="KEY=VALUE",
+                               help="Override a recorded configurable value")
+    replay_parser.add_argument("--profile", help="Write a cProfile of the replay to this file")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    configurable = parse_configurable(args.configurable)
+
+    if args.command == "record":
+        load_dotenv()
+        print(json.dumps(record(args.topic, args.cassette, configurable), indent=2))
+        return
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    result = replay(args.cassette, args.latency_scale, configurable)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
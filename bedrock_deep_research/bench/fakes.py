@@ -0,0 +1,283 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from ..bedrock import BedrockClients
+
+WORDS = (
+    "amazon s3 presigned url upload python boto3 client bucket object key expiration policy "
+    "signature request browser access credentials security temporary http put post lambda "
+    "latency throughput region endpoint example configuration permission role application"
+).split()
+
+
+class Latency:
+    """
+    Latency distribution of a fake service, parsed from a spec such as `constant:0.5`,
+    `uniform:0.2:1.0`, `lognormal:0.8:0.4` (median and sigma) or `exponential:0.5` (mean).
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        if kind not in ("constant", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma)
+        return rng.expovariate(1 / self.params[0])
+
+    def __repr__(self) -> str:
+        return self.spec
+
+
+class CallStats:
+    """Thread-safe counters of the calls served by the fakes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, kind: str, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        with self._lock:
+            self.calls[kind] += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+
+def seeded_rng(seed: int, *parts: str) -> random.Random:
+    """Random generator seeded by the request, so that the fakes answer the same request the same way."""
+    digest = hashlib.sha256("\x1f".join([str(seed), *parts]).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class FakeChatBedrock(BaseChatModel):
+    """
+    Deterministic in-process stand-in for ChatBedrock.
+
+    Text completions return `output_words` words. Structured outputs are generated from the JSON schema
+    of the requested tool: arrays get `array_sizes[name]` items (2 by default), and the `grade` of the
+    section grader is "pass" with probability `pass_rate`.
+    """
+
+    model_id: str
+    max_tokens: Optional[int] = None
+    streaming: bool = False
+    latency: Any = None
+    stats: Any = None
+    seed: int = 0
+    output_words: int = 200
+    string_words: int = 12
+    pass_rate: float = 0.5
+    array_sizes: Dict[str, int] = {}
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bedrock"
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        tools = kwargs.get("tools")
+        rng = seeded_rng(self.seed, self.model_id, prompt,
+                         json.dumps(tools or [], sort_keys=True))
+
+        if self.latency is not None:
+            time.sleep(self.latency.sample(rng))
+
+        if tools:
+            function = tools[0]["function"]
+            args = fill_schema(function["parameters"], rng, self.array_sizes, self.pass_rate, self.string_words)
+            output = json.dumps(args)
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": function["name"], "args": args, "id": f"call_{rng.getrandbits(32)}"}],
+            )
+        else:
+            words = self.output_words
+            if self.max_tokens:
+                words = min(words, int(self.max_tokens / 1.3))
+            output = f"**{text(rng, 8)}** {text(rng, max(words - 8, 0))}"
+            if stop:
+                for sequence in stop:
+                    output = output.split(sequence)[0]
+            message = AIMessage(content=output)
+
+        input_tokens, output_tokens = len(prompt) // 4, len(output) // 4
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        if self.stats is not None:
+            self.stats.record(f"llm:{'structured' if tools else 'text'}", input_tokens, output_tokens)
+
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"model_id": self.model_id},
+        )
+
+
+def fill_schema(
+    schema: Dict[str, Any],
+    rng: random.Random,
+    array_sizes: Dict[str, int],
+    pass_rate: float,
+    string_words: int,
+    defs: Optional[Dict[str, Any]] = None,
+    name: str = "",
+) -> Any:
+    """Generates a value matching the JSON schema of a structured output."""
+    defs = schema.get("$defs", {}) if defs is None else defs
+
+    def fill(schema, name):
+        return fill_schema(schema, rng, array_sizes, pass_rate, string_words, defs, name)
+
+    if "$ref" in schema:
+        return fill(defs[schema["$ref"].split("/")[-1]], name)
+    if "anyOf" in schema:
+        return fill(schema["anyOf"][0], name)
+    if "enum" in schema:
+        if name == "grade":
+            return "pass" if rng.random() < pass_rate else "fail"
+        return schema["enum"][0]
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: fill(value, key) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fill(schema["items"], name) for _ in range(array_sizes.get(name, 2))]
+    if kind == "integer":
+        return rng.randint(0, 9)
+    if kind == "number":
+        return rng.random()
+    if kind == "boolean":
+        return True
+    return text(rng, string_words)
+
+
+class FakeTavilyClient:
+    """Deterministic in-process stand-in for AsyncTavilyClient."""
+
+    def __init__(self, latency: Latency = None, stats: CallStats = None, seed: int = 0,
+                 content_words: int = 60, raw_content_words: int = 1500):
+        self.latency = latency
+        self.stats = stats
+        self.seed = seed
+        self.content_words = content_words
+        self.raw_content_words = raw_content_words
+
+    async def search(self, query: str, max_results: int = 5, include_raw_content: bool = False,
+                     topic: str = "general", **kwargs) -> Dict[str, Any]:
+        rng = seeded_rng(self.seed, "tavily", query)
+        if self.latency is not None:
+            await asyncio.sleep(self.latency.sample(rng))
+        if self.stats is not None:
+            self.stats.record("tavily:search")
+
+        results = []
+        for i in range(max_results):
+            # Related queries share part of their results, like real searches do
+            url_id = rng.randint(0, 4 * max_results)
+            results.append(
+                {
+                    "title": f"{text(rng, 5).title()}",
+                    "url": f"https://example.com/{url_id}/{hashlib.sha1(query.split()[0].encode()).hexdigest()[:8]}",
+                    "content": text(rng, self.content_words),
+                    "score": round(1 - i / max_results, 2),
+                    "raw_content": text(rng, self.raw_content_words) if include_raw_content else None,
+                }
+            )
+        return {"query": query, "follow_up_questions": None, "answer": None, "images": [], "results": results}
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    """Encodes a blank RGB image as PNG."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x80" * (width * 3) for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+class FakeBedrockRuntime:
+    """Stand-in for the bedrock-runtime client, answering `invoke_model` with a blank image."""
+
+    def __init__(self, latency: Latency = None, stats: CallStats = None, seed: int = 0):
+        self.latency = latency
+        self.stats = stats
+        self.seed = seed
+
+    def invoke_model(self, body: str, modelId: str, **kwargs) -> Dict[str, Any]:
+        rng = seeded_rng(self.seed, modelId, body)
+        if self.latency is not None:
+            time.sleep(self.latency.sample(rng))
+        if self.stats is not None:
+            self.stats.record("bedrock:invoke_model")
+
+        config = json.loads(body).get("imageGenerationConfig", {})
+        image = png_bytes(config.get("width", 64), config.get("height", 64))
+        payload = json.dumps({"images": [base64.b64encode(image).decode("ascii")], "error": None})
+        return {"body": io.BytesIO(payload.encode())}
+
+
+class FakeBedrock(BedrockClients):
+    """Serves the nodes with fake chat models and bedrock-runtime clients sharing the same settings."""
+
+    def __init__(self, llm_latency: Latency = None, image_latency: Latency = None, stats: CallStats = None,
+                 seed: int = 0, **chat_model_settings):
+        super().__init__()
+        self.llm_latency = llm_latency
+        self.image_latency = image_latency
+        self.stats = stats or CallStats()
+        self.seed = seed
+        self.chat_model_settings = chat_model_settings
+
+    def chat_model(self, model_id: str, **kwargs) -> BaseChatModel:
+        kwargs = {k: v for k, v in kwargs.items() if k in ("max_tokens", "streaming")}
+        return FakeChatBedrock(
+            model_id=model_id,
+            latency=self.llm_latency,
+            stats=self.stats,
+            seed=self.seed,
+            **self.chat_model_settings,
+            **kwargs,
+        )
+
+    def runtime(self, **config):
+        return FakeBedrockRuntime(self.image_latency, self.stats, self.seed)
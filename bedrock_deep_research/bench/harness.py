@@ -0,0 +1,160 @@
+import json
+import logging
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from ..bedrock import BedrockClients, use_bedrock_clients
+from ..graph import BedrockDeepResearch
+from ..images import wait_for_derivatives
+from ..tracing import critical_path
+from ..web_search import WebSearch
+from .fakes import CallStats, FakeBedrock, FakeTavilyClient, Latency
+
+logger = logging.getLogger(__name__)
+
+
+class CountingSerializer(JsonPlusSerializer):
+    """Serializer of the checkpointer counting the bytes written to checkpoints."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_serialized = 0
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        kind, data = super().dumps_typed(obj)
+        self.bytes_serialized += len(data)
+        return kind, data
+
+
+def parse_configurable(values: Optional[list[str]]) -> Dict[str, Any]:
+    """Parses KEY=VALUE arguments into configurable values, decoding JSON values such as numbers."""
+    configurable = {}
+    for value in values or []:
+        key, _, raw = value.partition("=")
+        try:
+            configurable[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            configurable[key] = raw
+    return configurable
+
+
+@dataclass
+class Scenario:
+    """Settings of one benchmark run of the graph."""
+
+    sections: int = 5
+    number_of_queries: int = 2
+    max_search_depth: int = 2
+    llm_latency: str = "lognormal:0.2:0.4"
+    search_latency: str = "lognormal:0.1:0.3"
+    image_latency: str = "constant:0.5"
+    output_words: int = 200
+    raw_content_words: int = 1500
+    pass_rate: float = 0.5
+    seed: int = 0
+    configurable: Dict[str, Any] = field(default_factory=dict)
+
+    def name(self) -> str:
+        extra = "".join(f" {k}={v}" for k, v in self.configurable.items())
+        return f"sections={self.sections} queries={self.number_of_queries} depth={self.max_search_depth}{extra}"
+
+
+def run_scenario(
+    scenario: Scenario,
+    topic: str = "Upload files using Amazon S3 presigned url in Python",
+    clients: Optional[BedrockClients] = None,
+    tavily_client: Any = None,
+    stats: Optional[CallStats] = None,
+    trace_memory: bool = True,
+) -> Dict[str, Any]:
+    """
+    Runs the full graph on the scenario, approving the first outline, and measures the run.
+
+    By default the graph runs against the fakes configured by the scenario. Other Bedrock clients
+    and Tavily client, e.g. replaying a cassette, can be given instead along with their call stats.
+
+    Returns:
+        dict: The scenario and its metrics: wall and critical path time in seconds, calls per kind,
+        bytes serialized to checkpoints and peak memory in bytes.
+    """
+    if clients is None:
+        stats = CallStats()
+        clients = FakeBedrock(
+            llm_latency=Latency(scenario.llm_latency),
+            image_latency=Latency(scenario.image_latency),
+            stats=stats,
+            seed=scenario.seed,
+            output_words=scenario.output_words,
+            pass_rate=scenario.pass_rate,
+            array_sizes={
+                "sections": scenario.sections,
+                "queries": scenario.number_of_queries,
+                "follow_up_queries": scenario.number_of_queries,
+            },
+        )
+        tavily_client = FakeTavilyClient(
+            latency=Latency(scenario.search_latency),
+            stats=stats,
+            seed=scenario.seed,
+            raw_content_words=scenario.raw_content_words,
+        )
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        thread_id = str(uuid.uuid4())
+        config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "number_of_queries": scenario.number_of_queries,
+                "max_search_depth": scenario.max_search_depth,
+                "output_dir": str(Path(work_dir) / "output"),
+                "trace_dir": str(Path(work_dir) / "traces"),
+                **scenario.configurable,
+            }
+        }
+        serializer = CountingSerializer()
+        web_search = WebSearch(None, tavily_client=tavily_client)
+
+        with use_bedrock_clients(clients):
+            deep_research = BedrockDeepResearch(
+                config,
+                tavily_api_key=None,
+                web_search=web_search,
+                checkpointer=MemorySaver(serde=serializer),
+            )
+
+            if trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            deep_research.start(topic)
+            deep_research.feedback(True)
+            wall_time = time.perf_counter() - started
+            peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+
+        trace_file = Path(work_dir) / "traces" / f"{thread_id}.json"
+        events = json.loads(trace_file.read_text(encoding="utf-8"))["traceEvents"]
+        state = deep_research.get_state().values
+        # The image derivatives are written in the background, into the directory about to be removed
+        wait_for_derivatives()
+
+    return {
+        "scenario": scenario.name(),
+        "settings": asdict(scenario),
+        "wall_time": round(wall_time, 3),
+        "critical_path_time": round(sum(e["dur"] for e in critical_path(events)) / 1e6, 3),
+        "calls": dict(stats.calls) if stats is not None else {},
+        "input_tokens": stats.input_tokens if stats is not None else None,
+        "output_tokens": stats.output_tokens if stats is not None else None,
+        "checkpoint_bytes": serializer.bytes_serialized,
+        "peak_memory": peak_memory,
+        "final_report_chars": len(state.get("final_report", "")),
+    }
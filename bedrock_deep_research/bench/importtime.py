@@ -0,0 +1,137 @@
+import argparse
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = ["langgraph", "langchain_core", "langchain_aws", "boto3", "PIL", "tavily", "numpy"]
+
+# Modules timed by default, with their import time budget in milliseconds and the heavy modules they must not
+# load: the configuration and the job manager are imported by the UI before any run, and the graph before
+# the first call to Bedrock or Tavily
+TARGETS: Dict[str, Tuple[float, List[str]]] = {
+    "bedrock_deep_research.config": (50, HEAVY_MODULES),
+    "bedrock_deep_research.jobs": (50, HEAVY_MODULES),
+    "bedrock_deep_research.graph": (1000, ["langchain_aws", "boto3", "PIL", "tavily", "numpy"]),
+}
+
+
+def _import_times(statement: str) -> Dict[str, Tuple[int, int]]:
+    """Runs the statement in a new interpreter, returning the depth and cumulative microseconds of each import."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                             capture_output=True, text=True, check=True)
+    imports = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = ((len(name) - len(name.lstrip()) - 1) // 2, int(cumulative))
+    return imports
+
+
+def measure(module: str, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Times the import of a module in new interpreters, without the modules imported by the interpreter itself.
+
+    Returns:
+        dict: The fastest import time in milliseconds, the number of modules imported and the heavy modules
+        among them
+    """
+    startup = _import_times("pass")
+    runs = []
+    for _ in range(repeat):
+        imports = {name: value for name, value in _import_times(f"import {module}").items() if name not in startup}
+        total = sum(cumulative for depth, cumulative in imports.values() if depth == 0)
+        runs.append((total, imports))
+
+    total, imports = min(runs, key=lambda run: run[0])
+    return {
+        "module": module,
+        "import_time": round(total / 1000, 1),
+        "modules": len(imports),
+        "heavy_modules": [name for name in HEAVY_MODULES if name in imports],
+    }
+
+
+def _check(result: Dict[str, Any], budget: float, forbidden: List[str]) -> List[str]:
+    failures = []
+    if result["import_time"] > budget:
+        failures.append(f"{result['module']}: {result['import_time']} ms > budget of {budget} ms")
+    loaded = [name for name in result["heavy_modules"] if name in forbidden]
+    if loaded:
+        failures.append(f"{result['module']}: imports {', '.join(loaded)}")
+    return failures
+
+
+def _compare(results, baseline_file: str, tolerance: float) -> List[str]:
+    """Returns the modules whose import time regressed relative to the baseline."""
+    baseline = {}
+    for line in Path(baseline_file).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            result = json.loads(line)
+            baseline[result["module"]] = result
+
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["module"])
+        if reference is None:
+            logger.warning(f"No baseline for module {result['module']}")
+            continue
+        value, expected = result["import_time"], reference["import_time"]
+        if expected and value > expected * (1 + tolerance):
+            regressions.append(f"{result['module']}: import_time {value} > {expected} (+{(value / expected - 1):.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bedrock_deep_research.bench.importtime",
+        description="Time the import of the package modules with -X importtime and check them against budgets.",
+    )
+    parser.add_argument("modules", nargs="*", default=list(TARGETS), help="Modules to time")
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per module, the fastest is reported")
+    parser.add_argument("--budget", action="append", metavar="MODULE=MS",
+                        help="Import time budget of a module, e.g. --budget bedrock_deep_research.graph=1000")
+    parser.add_argument("--output", help="Append the results to this JSON lines file")
+    parser.add_argument("--baseline", help="JSON lines file of previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative increase over the baseline reported as a regression")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    budgets = {module: budget for module, (budget, _) in TARGETS.items()}
+    for item in args.budget or []:
+        module, _, budget = item.partition("=")
+        budgets[module] = float(budget)
+
+    results, failures = [], []
+    header = f"{'module':<36} {'ms':>8} {'budget':>8} {'modules':>8}  heavy modules"
+    print(header)
+    print("-" * len(header))
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        results.append(result)
+        budget = budgets.get(module, float("inf"))
+        failures += _check(result, budget, TARGETS.get(module, (None, []))[1])
+        print(f"{module:<36} {result['import_time']:>8.1f} {budget:>8.0f} {result['modules']:>8}  "
+              f"{' '.join(result['heavy_modules']) or '-'}")
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    if args.baseline:
+        failures += _compare(results, args.baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,645 @@
+import argparse
+import asyncio
+import base64
+import io
+import json
+import logging
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from botocore.exceptions import ClientError, ReadTimeoutError
+from langchain_aws import ChatBedrock
+from langchain_core.language_models import BaseChatModel
+from langgraph.checkpoint.memory import MemorySaver
+from tavily.errors import UsageLimitExceededError
+
+from ..bedrock import BedrockClients, use_bedrock_clients
+from ..config import Configuration
+from ..graph import BedrockDeepResearch
+from ..images import wait_for_derivatives
+from ..routing import BedrockRouter, Endpoint
+from ..web_search import WebSearch
+from .fakes import FakeTavilyClient, Latency, fill_schema, png_bytes, seeded_rng, text
+from .harness import parse_configurable
+
+logger = logging.getLogger(__name__)
+
+TAVILY_URL = "https://api.tavily.com/search"
+
+
+@dataclass
+class Faults:
+    """
+    Probabilities of the faults injected into each call of a simulated service.
+
+    Attributes:
+        throttle_rate: Calls rejected with a ThrottlingException, on top of the ones exceeding the quota
+        error_rate: Calls failing with a 5xx error, half-way through their latency
+        slow_rate: Calls taking `slow_factor` times their usual latency
+        timeout_rate: Calls hanging for `timeout` seconds before the client gives up with a read timeout
+        expired_token_rate: Calls rejected because the security token of the credentials expired
+    """
+
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_factor: float = 5.0
+    timeout_rate: float = 0.0
+    timeout: float = 5.0
+    expired_token_rate: float = 0.0
+
+
+@dataclass
+class Quota:
+    """
+    Quota of a simulated service, 0 meaning unlimited. Like Bedrock on-demand quotas, requests and tokens
+    are counted per model and per minute, and calls exceeding them are throttled.
+
+    Attributes:
+        requests_per_minute: Requests accepted per minute and model
+        tokens_per_minute: Input and output tokens accepted per minute and model
+        max_in_flight: Calls served at the same time per model
+        burst_seconds: Seconds of quota that can be spent at once after an idle period
+    """
+
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    max_in_flight: int = 0
+    burst_seconds: float = 10
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def take(self, amount: float) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # A call larger than the bucket is accepted once the bucket is full, instead of never
+        amount = min(amount, self.capacity)
+        if self._tokens < amount:
+            return False
+        self._tokens -= amount
+        return True
+
+
+class ServiceError(Exception):
+    """Fault drawn by a simulated service, raised by its client as the matching client error."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+class SimulatedService:
+    """
+    A remote service serving calls with the given latency, quota and faults, and recording their outcome.
+
+    Calls are admitted against the quota of their key, e.g. the model id, then fail, hang or are slowed
+    down according to the faults. The outcome of every call and its latency are recorded in `outcomes`
+    and `latencies`, by operation.
+    """
+
+    def __init__(self, name: str, latency: Latency, faults: Faults = None, quota: Quota = None, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.faults = faults or Faults()
+        self.quota = quota or Quota()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests: Dict[str, TokenBucket] = {}
+        self._tokens: Dict[str, TokenBucket] = {}
+        self._in_flight: Counter = Counter()
+        self.outcomes: Dict[str, Counter] = defaultdict(Counter)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, per_minute: float) -> TokenBucket:
+        if key not in buckets:
+            buckets[key] = TokenBucket(per_minute / 60, per_minute / 60 * self.quota.burst_seconds)
+        return buckets[key]
+
+    def _admit(self, key: str, tokens: int) -> Optional[ServiceError]:
+        quota = self.quota
+        if quota.max_in_flight and self._in_flight[key] >= quota.max_in_flight:
+            return ServiceError("throttled", "Too many concurrent requests, please wait before trying again.")
+        if quota.requests_per_minute and not self._bucket(self._requests, key, quota.requests_per_minute).take(1):
+            return ServiceError("throttled", "Too many requests, please wait before trying again.")
+        if quota.tokens_per_minute and not self._bucket(self._tokens, key, quota.tokens_per_minute).take(tokens):
+            return ServiceError("throttled", "Too many tokens, please wait before trying again.")
+        return None
+
+    def _draw(self, latency: Latency) -> tuple[Optional[ServiceError], float]:
+        faults = self.faults
+        draw = self._rng.random()
+        delay = latency.sample(self._rng)
+        for rate, error in (
+            (faults.expired_token_rate, ServiceError("expired_token", "The security token included in the request is expired")),
+            (faults.throttle_rate, ServiceError("throttled", "Too many requests, please wait before trying again.")),
+            (faults.error_rate, ServiceError("server_error", "The service is unavailable. Try again later.")),
+            (faults.timeout_rate, ServiceError("timeout", "Read timeout")),
+        ):
+            if draw < rate:
+                if error.kind == "server_error":
+                    return error, delay / 2
+                if error.kind == "timeout":
+                    return error, faults.timeout
+                return error, 0.0
+            draw -= rate
+        if self._rng.random() < faults.slow_rate:
+            return None, delay * faults.slow_factor
+        return None, delay
+
+    def begin(self, operation: str, key: str, tokens: int = 0, latency: Latency = None) -> tuple[Optional[ServiceError], float]:
+        """Admits a call, returning the fault to raise if any and the seconds the call takes."""
+        with self._lock:
+            error = self._admit(key, tokens)
+            delay = 0.0
+            if error is None:
+                error, delay = self._draw(latency or self.latency)
+            self._in_flight[key] += 1
+        return error, delay
+
+    def end(self, operation: str, key: str, error: Optional[ServiceError], delay: float) -> None:
+        with self._lock:
+            self._in_flight[key] -= 1
+            self.outcomes[operation]["ok" if error is None else error.kind] += 1
+            self.latencies[operation].append(delay)
+
+    def call(self, operation: str, key: str, tokens: int = 0, latency: Latency = None) -> None:
+        """Serves a call, sleeping for its latency, and raises the fault drawn for it if any."""
+        error, delay = self.begin(operation, key, tokens, latency)
+        try:
+            time.sleep(delay)
+        finally:
+            self.end(operation, key, error, delay)
+        if error is not None:
+            raise error
+
+    async def acall(self, operation: str, key: str, tokens: int = 0, latency: Latency = None) -> None:
+        error, delay = self.begin(operation, key, tokens, latency)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.end(operation, key, error, delay)
+        if error is not None:
+            raise error
+
+
+def _client_error(error: ServiceError, operation: str) -> Exception:
+    if error.kind == "timeout":
+        return ReadTimeoutError(endpoint_url="https://bedrock-runtime.us-east-1.amazonaws.com")
+    code, status = {
+        "throttled": ("ThrottlingException", 429),
+        "expired_token": ("ExpiredTokenException", 403),
+        "server_error": ("ServiceUnavailableException", 503),
+    }[error.kind]
+    return ClientError(
+        {"Error": {"Code": code, "Message": str(error)}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        operation,
+    )
+
+
+def _tokens(value: Any) -> int:
+    return len(json.dumps(value)) // 4
+
+
+class SimulatedBedrockRuntime:
+    """
+    Stand-in for the bedrock-runtime client served by a simulated service.
+
+    It answers the Anthropic messages API of `invoke_model` and `invoke_model_with_response_stream`, the
+    `converse` API and Nova Canvas image generation with the same generated content as the fakes, so that
+    the real ChatBedrock, with its request and response handling, can be run against it. Unlike a boto3
+    client, it does not retry: every fault reaches the caller.
+    """
+
+    def __init__(self, service: SimulatedService, image_latency: Latency = None, seed: int = 0,
+                 output_words: int = 200, string_words: int = 12, pass_rate: float = 0.5,
+                 array_sizes: Optional[Dict[str, int]] = None):
+        self.service = service
+        self.image_latency = image_latency
+        self.seed = seed
+        self.output_words = output_words
+        self.string_words = string_words
+        self.pass_rate = pass_rate
+        self.array_sizes = array_sizes or {}
+
+    def _call(self, operation: str, model_id: str, tokens: int, latency: Latency = None) -> None:
+        try:
+            self.service.call(operation, model_id, tokens, latency)
+        except ServiceError as e:
+            raise _client_error(e, operation) from None
+
+    def _answer(self, model_id: str, prompt: Any, tools: List[Dict[str, Any]], forced_tool: Optional[str],
+                max_tokens: Optional[int], stop: List[str]) -> tuple[Dict[str, Any], str]:
+        """Returns the answer to a request, a tool use or text, and its stop reason."""
+        rng = seeded_rng(self.seed, model_id, json.dumps(prompt, sort_keys=True), json.dumps(tools, sort_keys=True))
+        if tools and forced_tool is not None:
+            tool = next((t for t in tools if t["name"] == forced_tool), tools[0])
+            schema = tool.get("input_schema") or tool.get("inputSchema", {}).get("json", {})
+            args = fill_schema(schema, rng, self.array_sizes, self.pass_rate, self.string_words)
+            return {"tool_use": {"id": f"toolu_{rng.getrandbits(32)}", "name": tool["name"], "input": args}}, "tool_use"
+
+        words = self.output_words
+        stop_reason = "end_turn"
+        if max_tokens and words > int(max_tokens / 1.3):
+            words, stop_reason = int(max_tokens / 1.3), "max_tokens"
+        output = f"**{text(rng, 8)}** {text(rng, max(words - 8, 0))}"
+        for sequence in stop:
+            if sequence in output:
+                output, stop_reason = output.split(sequence)[0], "stop_sequence"
+        return {"text": output}, stop_reason
+
+    def _anthropic_request(self, body: Dict[str, Any], model_id: str) -> tuple[Dict[str, Any], str, int, int]:
+        tools = body.get("tools") or []
+        choice = body.get("tool_choice") or {}
+        forced_tool = choice.get("name", tools[0]["name"] if tools else None) if choice.get("type") in ("tool", "any") else None
+        answer, stop_reason = self._answer(
+            model_id, [body.get("system"), body.get("messages")], tools, forced_tool,
+            body.get("max_tokens"), body.get("stop_sequences") or [])
+        return answer, stop_reason, _tokens([body.get("system"), body.get("messages")]), _tokens(answer)
+
+    def invoke_model(self, body: str, modelId: str, **kwargs) -> Dict[str, Any]:
+        request = json.loads(body)
+
+        if "taskType" in request:
+            config = request.get("imageGenerationConfig", {})
+            self._call("invoke_model:image", modelId, 0, self.image_latency)
+            image = png_bytes(config.get("width", 64), config.get("height", 64))
+            payload = {"images": [base64.b64encode(image).decode("ascii")], "error": None}
+            return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+        answer, stop_reason, input_tokens, output_tokens = self._anthropic_request(request, modelId)
+        self._call("invoke_model", modelId, input_tokens + output_tokens)
+
+        if "tool_use" in answer:
+            content = [{"type": "tool_use", **answer["tool_use"]}]
+        else:
+            content = [{"type": "text", "text": answer["text"]}]
+        payload = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": modelId,
+            "content": content,
+            "stop_reason": stop_reason,
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+        return {
+            "body": io.BytesIO(json.dumps(payload).encode()),
+            "ResponseMetadata": {
+                "HTTPStatusCode": 200,
+                "HTTPHeaders": {
+                    "x-amzn-bedrock-input-token-count": str(input_tokens),
+                    "x-amzn-bedrock-output-token-count": str(output_tokens),
+                },
+            },
+        }
+
+    def invoke_model_with_response_stream(self, body: str, modelId: str, **kwargs) -> Dict[str, Any]:
+        request = json.loads(body)
+        answer, stop_reason, input_tokens, output_tokens = self._anthropic_request(request, modelId)
+        self._call("invoke_model_with_response_stream", modelId, input_tokens + output_tokens)
+
+        events = [
+            {"type": "message_start", "message": {"role": "assistant", "model": modelId, "content": [],
+                                                  "usage": {"input_tokens": input_tokens, "output_tokens": 0}}},
+        ]
+        if "tool_use" in answer:
+            tool_use = answer["tool_use"]
+            events.append({"type": "content_block_start", "index": 0, "content_block": {
+                "type": "tool_use", "id": tool_use["id"], "name": tool_use["name"], "input": {}}})
+            arguments = json.dumps(tool_use["input"])
+            for i in range(0, len(arguments), 64):
+                events.append({"type": "content_block_delta", "index": 0,
+                               "delta": {"type": "input_json_delta", "partial_json": arguments[i:i + 64]}})
+        else:
+            events.append({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+            words = answer["text"].split(" ")
+            for i in range(0, len(words), 8):
+                delta = " ".join(words[i:i + 8]) + (" " if i + 8 < len(words) else "")
+                events.append({"type": "content_block_delta", "index": 0,
+                               "delta": {"type": "text_delta", "text": delta}})
+        events += [
+            {"type": "content_block_stop", "index": 0},
+            {"type": "message_delta", "delta": {"stop_reason": stop_reason}, "usage": {"output_tokens": output_tokens}},
+            {"type": "message_stop", "amazon-bedrock-invocationMetrics": {
+                "inputTokenCount": input_tokens, "outputTokenCount": output_tokens}},
+        ]
+        return {"body": ({"chunk": {"bytes": json.dumps(e).encode()}} for e in events)}
+
+    def converse(self, modelId: str, messages: List[Dict[str, Any]], system: Optional[List[Dict[str, Any]]] = None,
+                 inferenceConfig: Optional[Dict[str, Any]] = None, toolConfig: Optional[Dict[str, Any]] = None,
+                 **kwargs) -> Dict[str, Any]:
+        inference = inferenceConfig or {}
+        tools = [t["toolSpec"] for t in (toolConfig or {}).get("tools", []) if "toolSpec" in t]
+        choice = (toolConfig or {}).get("toolChoice", {})
+        forced_tool = choice["tool"]["name"] if "tool" in choice else (tools[0]["name"] if "any" in choice else None)
+        answer, stop_reason = self._answer(modelId, [system, messages], tools, forced_tool,
+                                           inference.get("maxTokens"), inference.get("stopSequences") or [])
+        input_tokens, output_tokens = _tokens([system, messages]), _tokens(answer)
+        self._call("converse", modelId, input_tokens + output_tokens)
+
+        if "tool_use" in answer:
+            tool_use = answer["tool_use"]
+            content = [{"toolUse": {"toolUseId": tool_use["id"], "name": tool_use["name"], "input": tool_use["input"]}}]
+        else:
+            content = [{"text": answer["text"]}]
+        return {
+            "output": {"message": {"role": "assistant", "content": content}},
+            "stopReason": stop_reason,
+            "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens,
+                      "totalTokens": input_tokens + output_tokens},
+            "metrics": {"latencyMs": 0},
+        }
+
+
+class SimulatedBedrock(BedrockClients):
+    """
+    Serves the nodes with real ChatBedrock models and image clients backed by a simulated bedrock-runtime.
+
+    With a router, the calls are routed to the simulated bedrock-runtime of each region instead, standing in
+    for the regional endpoints.
+    """
+
+    def __init__(self, runtime: SimulatedBedrockRuntime, router: Optional[BedrockRouter] = None,
+                 regional_runtimes: Optional[Dict[str, SimulatedBedrockRuntime]] = None):
+        super().__init__(router)
+        self.simulated_runtime = runtime
+        self.regional_runtimes = regional_runtimes or {}
+
+    def chat_model(self, model_id: str, **kwargs) -> BaseChatModel:
+        if self.router is not None:
+            return super().chat_model(model_id, **kwargs)
+        return ChatBedrock(model_id=model_id, client=self.simulated_runtime, region_name="us-east-1", **kwargs)
+
+    def runtime(self, **config):
+        if self.router is not None:
+            return super().runtime(**config)
+        return self.simulated_runtime
+
+    def region_runtime(self, region: Optional[str], **config):
+        return self.regional_runtimes.get(region, self.simulated_runtime)
+
+
+class SimulatedTavilyClient(FakeTavilyClient):
+    """Stand-in for AsyncTavilyClient served by a simulated service, raising the errors of the Tavily client."""
+
+    def __init__(self, service: SimulatedService, seed: int = 0, **kwargs):
+        super().__init__(seed=seed, **kwargs)
+        self.service = service
+
+    async def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        try:
+            await self.service.acall("search", "tavily")
+        except ServiceError as e:
+            request = httpx.Request("POST", TAVILY_URL)
+            if e.kind == "throttled":
+                raise UsageLimitExceededError(str(e)) from None
+            if e.kind == "timeout":
+                raise httpx.ReadTimeout(str(e), request=request) from None
+            status = 401 if e.kind == "expired_token" else 503
+            raise httpx.HTTPStatusError(str(e), request=request,
+                                        response=httpx.Response(status, request=request)) from None
+        return await super().search(query, **kwargs)
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(values)
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    return {f"p{p}": round(values[min(len(values) - 1, int(len(values) * p / 100))], 3) for p in (50, 95, 99)}
+
+
+@dataclass
+class LoadScenario:
+    """Settings of a load run: concurrent articles against simulated Bedrock and Tavily services."""
+
+    articles: int = 4
+    sections: int = 4
+    number_of_queries: int = 2
+    max_search_depth: int = 1
+    llm_latency: str = "lognormal:0.3:0.4"
+    search_latency: str = "lognormal:0.2:0.3"
+    image_latency: str = "constant:1"
+    output_words: int = 200
+    pass_rate: float = 0.5
+    bedrock_faults: Faults = field(default_factory=Faults)
+    bedrock_quota: Quota = field(default_factory=Quota)
+    # Regions serving every model, each with its own quota; several regions are routed by a BedrockRouter
+    bedrock_regions: List[str] = field(default_factory=lambda: ["us-east-1"])
+    brownout_regions: List[str] = field(default_factory=list)  # Regions the Bedrock faults hit, all if empty
+    tavily_faults: Faults = field(default_factory=Faults)
+    tavily_quota: Quota = field(default_factory=Quota)
+    seed: int = 0
+    configurable: Dict[str, Any] = field(default_factory=dict)
+
+
+def _run_article(scenario: LoadScenario, web_search: WebSearch, work_dir: str, topic: str) -> Dict[str, Any]:
+    config = {
+        "configurable": {
+            "thread_id": str(uuid.uuid4()),
+            "number_of_queries": scenario.number_of_queries,
+            "max_search_depth": scenario.max_search_depth,
+            "output_dir": str(Path(work_dir) / "output"),
+            **scenario.configurable,
+        }
+    }
+    started = time.perf_counter()
+    try:
+        deep_research = BedrockDeepResearch(config, tavily_api_key=None, web_search=web_search,
+                                            checkpointer=MemorySaver())
+        deep_research.start(topic)
+        deep_research.feedback(True)
+        completed = bool(deep_research.get_state().values.get("final_report"))
+        error = None if completed else "no final report"
+    except Exception as e:
+        logger.info(f"Article failed: {e!r}")
+        completed, error = False, type(e).__name__
+    return {"latency": time.perf_counter() - started, "completed": completed, "error": error}
+
+
+def run_load(scenario: LoadScenario, topic: str = "Upload files using Amazon S3 presigned url in Python") -> Dict[str, Any]:
+    """
+    Runs `scenario.articles` articles concurrently against shared simulated Bedrock and Tavily services,
+    approving each first outline.
+
+    Returns:
+        dict: Goodput in completed articles per minute, article and call latency percentiles in seconds,
+        the outcome of the calls by service and operation, and the errors of the failed articles.
+    """
+    regions = scenario.bedrock_regions
+    bedrock_services = [
+        SimulatedService(
+            "bedrock" if len(regions) == 1 else f"bedrock:{region}",
+            Latency(scenario.llm_latency),
+            scenario.bedrock_faults if not scenario.brownout_regions or region in scenario.brownout_regions
+            else Faults(),
+            scenario.bedrock_quota,
+            seed=scenario.seed + 2 * i,
+        )
+        for i, region in enumerate(regions)
+    ]
+    tavily = SimulatedService("tavily", Latency(scenario.search_latency), scenario.tavily_faults,
+                              scenario.tavily_quota, seed=scenario.seed + 1)
+    runtimes = {
+        region: SimulatedBedrockRuntime(
+            service,
+            image_latency=Latency(scenario.image_latency),
+            seed=scenario.seed,
+            output_words=scenario.output_words,
+            pass_rate=scenario.pass_rate,
+            array_sizes={
+                "sections": scenario.sections,
+                "queries": scenario.number_of_queries,
+                "follow_up_queries": scenario.number_of_queries,
+            },
+        )
+        for region, service in zip(regions, bedrock_services)
+    }
+    router = None
+    if len(regions) > 1:
+        configurable = Configuration.from_runnable_config({"configurable": scenario.configurable})
+        model_ids = {configurable.planner_model, configurable.writer_model, configurable.image_model}
+        router = BedrockRouter({
+            model_id: [Endpoint(region, model_id, requests_per_minute=scenario.bedrock_quota.requests_per_minute)
+                       for region in regions]
+            for model_id in model_ids
+        }, seed=scenario.seed)
+    clients = SimulatedBedrock(runtimes[regions[0]], router=router, regional_runtimes=runtimes)
+    # Articles do not share a search cache, to load Tavily like separate processes would
+    tavily_client = SimulatedTavilyClient(tavily, seed=scenario.seed)
+
+    with tempfile.TemporaryDirectory() as work_dir, use_bedrock_clients(clients):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=scenario.articles) as executor:
+            futures = [
+                executor.submit(_run_article, scenario, WebSearch(None, tavily_client=tavily_client),
+                                work_dir, f"{topic} ({i + 1})")
+                for i in range(scenario.articles)
+            ]
+            articles = [f.result() for f in futures]
+        wall_time = time.perf_counter() - started
+        # The image derivatives are written in the background, into the directory about to be removed
+        wait_for_derivatives()
+
+    completed = [a for a in articles if a["completed"]]
+    return {
+        "settings": asdict(scenario),
+        "wall_time": round(wall_time, 3),
+        "completed": len(completed),
+        "failed": len(articles) - len(completed),
+        "goodput_per_minute": round(len(completed) / wall_time * 60, 3),
+        "article_latency": _percentiles([a["latency"] for a in completed]),
+        "errors": dict(Counter(a["error"] for a in articles if a["error"])),
+        "calls": {
+            service.name: {
+                operation: {"outcomes": dict(outcomes), "latency": _percentiles(service.latencies[operation])}
+                for operation, outcomes in service.outcomes.items()
+            }
+            for service in (*bedrock_services, tavily)
+        },
+        "routing": router.summary() if router is not None else None,
+    }
+
+
+def _print_report(result: Dict[str, Any]) -> None:
+    latency = result["article_latency"]
+    print(f"articles: {result['completed']} completed, {result['failed']} failed in {result['wall_time']:.1f}s "
+          f"({result['goodput_per_minute']:.2f}/min)")
+    print(f"article latency: p50 {latency['p50']}s  p95 {latency['p95']}s  p99 {latency['p99']}s")
+    for error, count in result["errors"].items():
+        print(f"  failed with {error}: {count}")
+    for service, operations in result["calls"].items():
+        for operation, stats in operations.items():
+            outcomes = " ".join(f"{k}={v}" for k, v in sorted(stats["outcomes"].items()))
+            latency = stats["latency"]
+            print(f"{service}:{operation:<34} {outcomes:<48} p50 {latency['p50']}s  p99 {latency['p99']}s")
+    for model_id, endpoints in (result["routing"] or {}).items():
+        for endpoint, stats in endpoints.items():
+            outcomes = " ".join(f"{k}={v}" for k, v in sorted(stats["outcomes"].items()))
+            print(f"route {model_id} -> {endpoint}: {outcomes}  latency {stats['latency']}s  "
+                  f"throttle rate {stats['throttle_rate']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bedrock_deep_research.bench.simulator",
+        description="Run concurrent articles against simulated Bedrock and Tavily services injecting "
+                    "throttling, errors, slow calls and timeouts.",
+    )
+    parser.add_argument("--articles", type=int, default=LoadScenario.articles, help="Concurrent articles")
+    parser.add_argument("--sections", type=int, default=LoadScenario.sections)
+    parser.add_argument("--queries", type=int, default=LoadScenario.number_of_queries)
+    parser.add_argument("--depth", type=int, default=LoadScenario.max_search_depth)
+    parser.add_argument("--llm-latency", default=LoadScenario.llm_latency)
+    parser.add_argument("--search-latency", default=LoadScenario.search_latency)
+    parser.add_argument("--image-latency", default=LoadScenario.image_latency)
+    for service in ("bedrock", "tavily"):
+        for name, kind in (("throttle-rate", float), ("error-rate", float), ("slow-rate", float),
+                           ("slow-factor", float), ("timeout-rate", float), ("timeout", float),
+                           ("expired-token-rate", float)):
+            parser.add_argument(f"--{service}-{name}", type=kind, default=getattr(Faults, name.replace("-", "_")))
+        parser.add_argument(f"--{service}-rpm", type=float, default=0, help="Requests per minute, 0 for unlimited")
+        parser.add_argument(f"--{service}-in-flight", type=int, default=0, help="Concurrent calls, 0 for unlimited")
+    parser.add_argument("--bedrock-tpm", type=float, default=0, help="Tokens per minute and model, 0 for unlimited")
+    parser.add_argument("--bedrock-regions", nargs="+", default=["us-east-1"],
+                        help="Regions serving every model with the same quota, routed when there are several")
+    parser.add_argument("--brownout-regions", nargs="*", default=[],
+                        help="Regions the Bedrock faults are injected into, all of them if not set")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", dest="configurable", action="append", metavar="KEY=VALUE",
+                        help="Extra configurable value, e.g. --set max_concurrency=2")
+    parser.add_argument("--output", help="Append the result to this JSON lines file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    def faults(service):
+        return Faults(**{name: getattr(args, f"{service}_{name}") for name in Faults.__dataclass_fields__})
+
+    scenario = LoadScenario(
+        articles=args.articles,
+        sections=args.sections,
+        number_of_queries=args.queries,
+        max_search_depth=args.depth,
+        llm_latency=args.llm_latency,
+        search_latency=args.search_latency,
+        image_latency=args.image_latency,
+        bedrock_faults=faults("bedrock"),
+        bedrock_quota=Quota(requests_per_minute=args.bedrock_rpm, tokens_per_minute=args.bedrock_tpm,
+                            max_in_flight=args.bedrock_in_flight),
+        bedrock_regions=args.bedrock_regions,
+        brownout_regions=args.brownout_regions,
+        tavily_faults=faults("tavily"),
+        tavily_quota=Quota(requests_per_minute=args.tavily_rpm, max_in_flight=args.tavily_in_flight),
+        seed=args.seed,
+        configurable=parse_configurable(args.configurable),
+    )
+    result = run_load(scenario)
+    _print_report(result)
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+
+from .config import MODEL_PRICING, Configuration
+from .registry import RunRegistry, thread_id_of
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchBudget:
+    """
+    Per-article budget on wall-clock time, tokens and cost, shared by all the sections of the article.
+
+    The budget decides after every section iteration whether the section can afford another
+    round of web research and reflection, based on what the previous iterations consumed.
+
+    Attributes:
+        deadline_seconds (float): Time allowed for the article, 0 to disable
+        token_budget (int): Input and output tokens allowed for the article, 0 to disable
+        cost_budget (float): LLM cost in USD allowed for the article, 0 to disable
+        reserve (float): Share of each budget kept for the final sections and the head image
+    """
+
+    def __init__(
+        self,
+        deadline_seconds: float = 0,
+        token_budget: int = 0,
+        cost_budget: float = 0,
+        reserve: float = 0.2,
+        clock=time.monotonic,
+    ):
+        self.deadline_seconds = deadline_seconds
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.reserve = reserve
+        self.clock = clock
+
+        self.started_at = clock()
+        self.tokens = 0
+        self.cost = 0.0
+        self._lock = threading.Lock()
+        self._section_started: Dict[str, float] = {}
+        self._section_iterations: Dict[str, int] = {}
+        self._active_sections: set[str] = set()
+
+    @classmethod
+    def from_configuration(cls, configurable: Configuration) -> "ResearchBudget":
+        return cls(
+            deadline_seconds=float(configurable.deadline_seconds),
+            token_budget=int(configurable.token_budget),
+            cost_budget=float(configurable.cost_budget),
+            reserve=float(configurable.budget_reserve),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.deadline_seconds or self.token_budget or self.cost_budget)
+
+    def record_usage(self, model_id: str, input_tokens: int, output_tokens: int) -> None:
+        price_in, price_out = MODEL_PRICING.get(model_id, (0.0, 0.0))
+        with self._lock:
+            self.tokens += input_tokens + output_tokens
+            self.cost += input_tokens / 1000 * price_in + output_tokens / 1000 * price_out
+
+    def section_queued(self, section_name: str) -> None:
+        """Counts a section waiting for a slot of the scheduler among those sharing the tokens and cost left."""
+        with self._lock:
+            self._active_sections.add(section_name)
+
+    def section_started(self, section_name: str) -> None:
+        """Starts the clock of a section once scheduled, so that its wait for a slot is not charged to it."""
+        with self._lock:
+            self._section_started.setdefault(section_name, self.clock())
+            self._active_sections.add(section_name)
+
+    def section_finished(self, section_name: str) -> None:
+        with self._lock:
+            self._active_sections.discard(section_name)
+
+    def remaining(self) -> Dict[str, float]:
+        """Returns the amount left in each enabled budget, once the reserve is set aside."""
+        remaining = {}
+        keep = 1 - self.reserve
+        if self.deadline_seconds:
+            elapsed = self.clock() - self.started_at
+            remaining["seconds"] = self.deadline_seconds * keep - elapsed
+        if self.token_budget:
+            remaining["tokens"] = self.token_budget * keep - self.tokens
+        if self.cost_budget:
+            remaining["cost"] = self.cost_budget * keep - self.cost
+        return remaining
+
+    def decide(self, section_name: str, search_iterations: int, max_search_depth: int) -> Dict[str, Any]:
+        """
+        Decides whether a section that completed `search_iterations` iterations can run another one.
+
+        Time is consumed in parallel by the sections, so a section can continue while its own next
+        iteration fits before the deadline. Tokens and cost are shared, so a section only gets its
+        share of what is left, split evenly between the sections still being researched.
+
+        Returns:
+            dict: The decision, with the number of iterations the section can still afford.
+        """
+        now = self.clock()
+        with self._lock:
+            self._section_iterations[section_name] = search_iterations
+            started = self._section_started.get(section_name, self.started_at)
+            total_iterations = max(sum(self._section_iterations.values()), 1)
+            active_sections = max(len(self._active_sections), 1)
+
+            per_iteration = {
+                "seconds": (now - started) / max(search_iterations, 1),
+                "tokens": self.tokens / total_iterations,
+                "cost": self.cost / total_iterations,
+            }
+            remaining = self.remaining()
+
+        affordable = max_search_depth - search_iterations
+        limited_by = "max_search_depth"
+        for dimension, left in remaining.items():
+            share = left if dimension == "seconds" else left / active_sections
+            cost = per_iteration[dimension]
+            iterations = int(share // cost) if cost > 0 else affordable
+            if iterations < affordable:
+                affordable, limited_by = max(iterations, 0), dimension
+
+        decision = {
+            "section": section_name,
+            "search_iterations": search_iterations,
+            "continue_research": affordable > 0,
+            "affordable_iterations": affordable,
+            "limited_by": limited_by,
+            "remaining": {k: round(v, 4) for k, v in remaining.items()},
+        }
+        logger.info(f"Budget decision: {decision}")
+        return decision
+
+
+_budgets: RunRegistry[ResearchBudget] = RunRegistry("budget")
+
+
+def start_budget(config: RunnableConfig) -> Optional[ResearchBudget]:
+    """Starts the budget of the article run identified by the thread_id of the config."""
+    budget = ResearchBudget.from_configuration(
+        Configuration.from_runnable_config(config))
+    thread_id = thread_id_of(config)
+    if not budget.enabled or thread_id is None:
+        return None
+
+    _budgets.set(thread_id, budget)
+    return budget
+
+
+def get_budget(config: Optional[RunnableConfig]) -> Optional[ResearchBudget]:
+    """Returns the budget of the article run, if one was started."""
+    return _budgets.get(thread_id_of(config))
+
+
+class BudgetCallbackHandler(BaseCallbackHandler):
+    """Charges the token usage of every LLM call to the budget of the article run that made it."""
+
+    def __init__(self):
+        self._runs: Dict[UUID, tuple[Optional[str], str]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, invocation_params=None, **kwargs):
+        thread_id = (metadata or {}).get("thread_id")
+        model_id = (metadata or {}).get("ls_model_name") or (
+            invocation_params or {}).get("model_id", "")
+        self._runs[run_id] = (thread_id, model_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        thread_id, model_id = self._runs.pop(run_id, (None, ""))
+        budget = get_budget({"configurable": {"thread_id": thread_id}})
+        if budget is None:
+            return
+
+        model_id = (response.llm_output or {}).get("model_id", model_id)
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None),
+                                "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+
+        budget.record_usage(model_id, input_tokens, output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._runs.pop(run_id, None)
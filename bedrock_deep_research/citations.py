@@ -0,0 +1,39 @@
+import re
+from typing import Dict, List
+
+from .model import Source
+
+# Inline reference markers written by the model, e.g. [2] or [1, 3]
+CITATION = re.compile(r"\[(\d+(?:\s*,\s*\d+)*)\]")
+
+
+def unique_sources(sources: List[Source]) -> List[Source]:
+    """The sources without duplicate urls, in the order they were first found, which gives their numbers."""
+    unique: Dict[str, Source] = {}
+    for source in sources:
+        unique.setdefault(source.url, source)
+    return list(unique.values())
+
+
+def source_numbers(sources: List[Source]) -> Dict[str, int]:
+    """The reference number of each source url, starting at 1."""
+    return {source.url: number for number, source in enumerate(unique_sources(sources), 1)}
+
+
+def cited_numbers(content: str) -> set:
+    return {int(n) for match in CITATION.findall(content) for n in match.split(",")}
+
+
+def render_sources(content: str, sources: List[Source]) -> str:
+    """
+    Appends the `### Sources` list of a section to its content: the sources it cites with their reference
+    numbers, or all its sources if it cites none.
+    """
+    numbered = list(enumerate(unique_sources(sources), 1))
+    if not numbered:
+        return content
+
+    cited = cited_numbers(content)
+    listed = [(n, source) for n, source in numbered if n in cited] or numbered
+    return (content.rstrip() + "\n\n### Sources\n"
+            + "\n".join(f"- [{n}] {source.title} : {source.url}" for n, source in listed))
@@ -1,8 +1,9 @@
 import os
 from dataclasses import dataclass, fields
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
-from langchain_core.runnables import RunnableConfig
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
 
 DEFAULT_REPORT_STRUCTURE = """The article structure should focus on breaking-down the user-provided topic:
 
@@ -29,6 +30,13 @@ SUPPORTED_MODELS = {
     #     "Amazon Nova Pro": "amazon.nova-pro-v1:0",
 }
 
+# On-demand price in USD per 1000 input and output tokens, used to enforce cost budgets
+MODEL_PRICING = {
+    "us.anthropic.claude-3-5-haiku-20241022-v1:0": (0.0008, 0.004),
+    "us.anthropic.claude-3-5-sonnet-20241022-v2:0": (0.003, 0.015),
+    "us.anthropic.claude-3-7-sonnet-20250219-v1:0": (0.003, 0.015),
+}
+
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -41,23 +49,72 @@ class Configuration:
     number_of_queries: int = 2  # Number of search queries to generate per iteration
     max_search_depth: int = 2  # Maximum number of reflection + search iterations
     max_tokens: int = 2048
+    # Derive the output tokens of each type of call from the writing guidelines and its output, capped by max_tokens
+    output_token_limits: bool = True
     planner_model: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
     writer_model: str = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
     output_dir: str = "output"
     image_model: str = "amazon.nova-canvas-v1:0"
+    image_derivatives: bool = True  # Write a WebP copy and a thumbnail of the head image in the background
+    # Size of the cache of head images and their prompts in <output_dir>/.image_cache, reused by reruns (0 to disable)
+    image_cache_mb: float = 200
+    trace_dir: str = ""  # Directory where a trace of each run is exported (empty to disable tracing)
+    speculative_research: bool = True  # Research the proposed sections while the outline is reviewed
+    max_concurrency: int = 0  # Maximum number of sections of the article written in parallel (0 for no limit)
+    # Per-article budget enforced once the outline is approved (0 disables a limit)
+    deadline_seconds: float = 0  # Wall-clock time to research and write the article
+    token_budget: int = 0  # Input + output tokens across all LLM calls
+    cost_budget: float = 0  # LLM cost in USD, priced with MODEL_PRICING
+    budget_reserve: float = 0.2  # Share of each budget kept for the final sections
+    # Passages of the raw content of the search results passed to the section writer in place of their snippets
+    # (0 to pass the snippets only)
+    retrieval_top_k: int = 6
+    retrieval_chunk_words: int = 100  # Words of each passage
+    # Search results fetched during the run, reused by the sections before searching the web
+    source_pool: bool = True
+    source_pool_min_results: int = 3  # Pooled results matching a query needed to skip its web search
+    source_pool_min_overlap: float = 0.6  # Share of the query terms a pooled result must contain to match it
+    outline_edits: bool = True  # Apply feedback renaming, moving, deleting or adding sections without regenerating
+    # Generate the initial search queries of the sections with the outline instead of once per section
+    outline_search_queries: bool = False
+    batch_final_sections: bool = False  # Write the introduction and conclusion in a single structured call
+    # Words of the digest summarizing each researched section for the final sections (0 to pass them in full)
+    section_digest_words: int = 0
+    final_context_tokens: int = 2000  # Tokens of the digests passed to the final sections
+    # Convergence of the research of a section, ending it before max_search_depth (0 disables a signal)
+    convergence_min_new_sources: float = 0.2  # Share of new sources found by an iteration below which it stops
+    convergence_min_content_change: float = 0.1  # Share of the content changed by a rewrite below which it stops
+    convergence_max_query_overlap: float = 0.8  # Share of follow-up queries already run from which it stops
+    # Grade the sections locally, calling the LLM grader only when the score is between the thresholds
+    pre_grader: bool = False
+    pre_grader_pass_threshold: float = 0.9  # Score from which a section passes without the LLM grader
+    pre_grader_fail_threshold: float = 0.3  # Score up to which a section fails without the LLM grader
+    pre_grader_audit_rate: float = 0.1  # Share of the confident pre-grades also graded by the LLM
+    # Similarity above which a search query is served the cached results of a near-duplicate query with the same
+    # numbers and negations (0 to disable)
+    search_cache_similarity: float = 0.9
 
     @classmethod
     def from_runnable_config(
-        cls, config: Optional[RunnableConfig] = None
+        cls, config: Optional["RunnableConfig"] = None
     ) -> "Configuration":
         """Create a Configuration instance from a RunnableConfig."""
         configurable = (
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
+            f.name: _coerce(f.type, os.environ.get(f.name.upper(), configurable.get(f.name)))
             for f in fields(cls)
             if f.init
         }
 
-        return cls(**{k: v for k, v in values.items() if v})
+        return cls(**{k: v for k, v in values.items() if v is not None and v != ""})
+
+
+def _coerce(field_type: type, value: Any) -> Any:
+    """Convert values read from environment variables to the type of the field."""
+    if isinstance(value, str) and field_type in (int, float):
+        return field_type(value)
+    if isinstance(value, str) and field_type is bool:
+        return value.lower() in ("1", "true", "yes")
+    return value
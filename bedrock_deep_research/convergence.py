@@ -0,0 +1,70 @@
+import difflib
+import logging
+from typing import Any, Dict, List, Optional
+
+from .config import Configuration
+from .retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def content_change(previous: str, current: str) -> float:
+    """Share of the words of the section changed by the last rewrite, between 0 and 1."""
+    return 1 - difflib.SequenceMatcher(None, previous.split(), current.split(), autojunk=False).ratio()
+
+
+def query_overlap(queries: List[str], past_queries: List[str], min_similarity: float = 0.6) -> float:
+    """Share of the queries whose terms mostly repeat those of a query already run, between 0 and 1."""
+    past = [set(tokenize(query)) for query in past_queries]
+    repeated = 0
+    for query in queries:
+        terms = set(tokenize(query))
+        if terms and any(len(terms & p) / len(terms | p) >= min_similarity for p in past):
+            repeated += 1
+    return repeated / len(queries) if queries else 1.0
+
+
+def _decision(section_name: str, search_iterations: int, signals: Dict[str, float],
+              limited_by: Optional[str]) -> Dict[str, Any]:
+    decision = {
+        "section": section_name,
+        "search_iterations": search_iterations,
+        "continue_research": limited_by is None,
+        "limited_by": limited_by,
+        "convergence": {k: round(v, 4) for k, v in signals.items()},
+    }
+    logger.info(f"Convergence decision: {decision}")
+    return decision
+
+
+def check_research_convergence(configurable: Configuration, section_name: str, search_iterations: int,
+                               new_source_share: float, previous_content: str,
+                               current_content: str) -> Optional[Dict[str, Any]]:
+    """
+    Decides whether the last iteration of a section still brought new material: enough sources not seen
+    by the previous iterations, and enough changes to the content. Returns None on the first iteration.
+    """
+    if search_iterations < 2 or not previous_content:
+        return None
+
+    signals = {"new_source_share": new_source_share,
+               "content_change": content_change(previous_content, current_content)}
+    limited_by = None
+    if new_source_share < configurable.convergence_min_new_sources:
+        limited_by = "convergence:new_sources"
+    elif signals["content_change"] < configurable.convergence_min_content_change:
+        limited_by = "convergence:content_change"
+    return _decision(section_name, search_iterations, signals, limited_by)
+
+
+def check_query_convergence(configurable: Configuration, section_name: str, search_iterations: int,
+                            follow_up_queries: List[str], past_queries: List[str]) -> Optional[Dict[str, Any]]:
+    """Decides whether the follow-up queries of a section would search for anything new."""
+    if not configurable.convergence_max_query_overlap or not past_queries:
+        return None
+
+    signals = {"query_overlap": query_overlap(follow_up_queries, past_queries)}
+    limited_by = None
+    if signals["query_overlap"] >= configurable.convergence_max_query_overlap:
+        limited_by = "convergence:query_overlap"
+    return _decision(section_name, search_iterations, signals, limited_by)
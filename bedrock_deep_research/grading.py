@@ -0,0 +1,137 @@
+import logging
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from .citations import CITATION, cited_numbers
+from .model import Section
+from .registry import RunRegistry, thread_id_of
+from .retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+WORD_LIMIT = re.compile(r"(?:(\d+)\s*(?:-|–|to)\s*)?(\d+)[\s-]*words?\b", re.IGNORECASE)
+
+
+def word_limit(writing_guidelines: str) -> Optional[Tuple[int, int]]:
+    """The word range asked by the writing guidelines, e.g. (150, 200) for "150-200 word limit"."""
+    match = WORD_LIMIT.search(writing_guidelines or "")
+    if match is None:
+        return None
+    upper = int(match[2])
+    return (int(match[1]) if match[1] else 0, upper)
+
+
+def count_words(content: str) -> int:
+    """Words of the content, without the reference markers and the Markdown syntax."""
+    return len(re.findall(r"[\w'’]+", CITATION.sub("", content)))
+
+
+def _terms(text: str) -> List[str]:
+    """Tokens of the text with plurals folded, in order and without duplicates."""
+    terms = (token[:-1] if token.endswith("s") and len(token) > 3 else token for token in tokenize(text))
+    return list(dict.fromkeys(terms))
+
+
+@dataclass
+class PreGrade:
+    """
+    Local grade of a section, computed from its content without calling a model.
+
+    Attributes:
+        score (float): Between 0 and 1, the weighted share of the checks passed
+        grade (str): "pass" or "fail" when the score is beyond a threshold, None to ask the LLM grader
+        checks (dict): Outcome of each check, logged to tune the thresholds
+        follow_up_queries (list): Queries on the terms of the description missing from the content
+    """
+
+    score: float
+    grade: Optional[str]
+    checks: Dict[str, float] = field(default_factory=dict)
+    follow_up_queries: List[str] = field(default_factory=list)
+
+    @property
+    def leaning(self) -> str:
+        """The grade the score leans to, compared with the LLM grade when it is not confident."""
+        return "pass" if self.score >= 0.5 else "fail"
+
+
+def pre_grade(section: Section, writing_guidelines: str, pass_threshold: float = 0.9,
+              fail_threshold: float = 0.3) -> PreGrade:
+    """
+    Grades a section on the checks an LLM grader mostly decides on: the description covered by the content,
+    the length asked by the writing guidelines and the sources cited.
+    """
+    content = section.content or ""
+    words = count_words(content)
+
+    description_terms = _terms(f"{section.name} {section.description}")
+    content_terms = set(_terms(content))
+    missing = [term for term in description_terms if term not in content_terms]
+    coverage = 1 - len(missing) / len(description_terms) if description_terms else 1.0
+
+    limit = word_limit(writing_guidelines)
+    if limit is None or not words:
+        within_limit = 1.0 if words else 0.0
+    else:
+        lower, upper = limit
+        within_limit = 1.0 if 0.9 * lower <= words <= 1.1 * upper else 0.0
+
+    cited = 1.0 if cited_numbers(content) or not section.sources else 0.0
+
+    checks = {"coverage": round(coverage, 3), "within_limit": within_limit, "cited": cited, "words": words}
+    score = 0.5 * coverage + 0.25 * within_limit + 0.25 * cited if words else 0.0
+
+    grade = None
+    if score >= pass_threshold:
+        grade = "pass"
+    elif score <= fail_threshold:
+        grade = "fail"
+
+    follow_up_queries = [f"{section.name} {' '.join(missing[:6])}"] if missing else [section.name]
+    return PreGrade(score=round(score, 3), grade=grade, checks=checks, follow_up_queries=follow_up_queries)
+
+
+class GraderAgreement:
+    """
+    Agreement of the pre-grader with the LLM grader over the sections of an article run graded by both: those
+    the pre-grader was not confident about, compared on the grade it leaned to, and a sample of the confident ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Counter = Counter()
+
+    def record(self, pre: PreGrade, llm_grade: str) -> None:
+        confident = pre.grade is not None
+        with self._lock:
+            self.counts[(confident, pre.grade or pre.leaning, llm_grade)] += 1
+            summary = self.summary()
+        logger.info(f"Pre-grade {pre.grade or pre.leaning} ({'confident' if confident else 'leaning'}, "
+                    f"score {pre.score}, {pre.checks}) vs LLM grade {llm_grade}; agreement {summary}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Number of sections and share of agreeing grades, for the confident and the leaning pre-grades."""
+        summary = {}
+        for confident, name in ((True, "confident"), (False, "leaning")):
+            total = sum(n for (c, _, _), n in self.counts.items() if c == confident)
+            agreed = sum(n for (c, pre, llm), n in self.counts.items() if c == confident and pre == llm)
+            if total:
+                summary[name] = {"sections": total, "agreement": round(agreed / total, 3)}
+        return summary
+
+
+_agreements: RunRegistry[GraderAgreement] = RunRegistry("grader agreement")
+
+
+def get_grader_agreement(config: Optional[RunnableConfig]) -> Optional[GraderAgreement]:
+    """Returns the grader agreement of the article run identified by the thread_id of the config, starting it."""
+    thread_id = thread_id_of(config)
+    if thread_id is None:
+        return None
+
+    return _agreements.setdefault(thread_id, GraderAgreement)
@@ -1,27 +1,58 @@
 import logging
+from typing import Iterator, Optional
 
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Command
 
+from .budget import BudgetCallbackHandler
 from .config import Configuration
 from .model import (ArticleInputState, ArticleOutputState, ArticleState,
                     SectionOutputState, SectionState)
-from .nodes import (ArticleHeadImageGenerator, ArticleOutlineGenerator,
+from .nodes import (ArticleHeadImageGenerator, ArticleOutlineEditor,
+                    ArticleOutlineGenerator,
                     CompileFinalArticle, CompletedSectionsFormatter,
-                    FinalSectionsWriter, HumanFeedbackProvider,
-                    InitialResearcher, SectionSearchQueryGenerator,
+                    FinalSectionsBatchWriter, FinalSectionsWriter, HumanFeedbackProvider,
+                    InitialResearcher, SectionDigestWriter,
+                    SectionSearchQueryGenerator,
                     SectionWebResearcher, SectionWriter,
-                    initiate_final_section_writing)
+                    initiate_final_section_writing,
+                    initiate_section_research)
+from .registry import release_run
+from .scheduler import scheduled
+from .speculation import SpeculativeResearcher
+from .tracing import TracingCallbackHandler, trace_run, traced
 from .web_search import WebSearch
 
 logger = logging.getLogger(__name__)
 
 
+def _add_node(builder: StateGraph, name: str, node) -> None:
+    """Adds a node to the graph, traced with the name of the node."""
+    builder.add_node(name, traced(name, node))
+
+
 class BedrockDeepResearch:
-    def __init__(self, config: dict, tavily_api_key: str):
-        self.config = config
-        self.web_search = WebSearch(tavily_api_key, save_search_results=False)
+    """
+    The compiled research graph with its clients.
+
+    An instance can be shared by concurrent runs: `config` holds the default runnable config, and every call
+    can be given the config of its own run instead, identified by its `thread_id`.
+    """
+
+    def __init__(
+        self,
+        config: Optional[dict] = None,
+        tavily_api_key: Optional[str] = None,
+        web_search: Optional[WebSearch] = None,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+    ):
+        self.config = config or {}
+        self.web_search = web_search or WebSearch(
+            tavily_api_key, save_search_results=False)
+        self.speculative_researcher = SpeculativeResearcher(self.web_search)
+        self.checkpointer = checkpointer or MemorySaver()
         self.graph = self.__create_workflow()
 
     def __create_workflow(self):
@@ -31,19 +62,29 @@ class BedrockDeepResearch:
             # Subgraph: Add nodes
             section_builder = StateGraph(
                 SectionState, output=SectionOutputState)
-            section_builder.add_node(
-                SectionSearchQueryGenerator.N, SectionSearchQueryGenerator()
+            _add_node(
+                section_builder,
+                SectionSearchQueryGenerator.N,
+                SectionSearchQueryGenerator(self.speculative_researcher),
             )
-            section_builder.add_node(
-                SectionWebResearcher.N, SectionWebResearcher(self.web_search)
+            _add_node(
+                section_builder,
+                SectionWebResearcher.N,
+                SectionWebResearcher(self.web_search),
             )
-            section_builder.add_node(SectionWriter.N, SectionWriter())
+            _add_node(section_builder, SectionWriter.N, SectionWriter())
+            _add_node(section_builder, SectionDigestWriter.N, SectionDigestWriter())
 
             # Subgraph: Add edges
-            section_builder.add_edge(START, SectionSearchQueryGenerator.N)
+            section_builder.add_conditional_edges(
+                START,
+                initiate_section_research,
+                [SectionSearchQueryGenerator.N, SectionWebResearcher.N],
+            )
             section_builder.add_edge(
                 SectionSearchQueryGenerator.N, SectionWebResearcher.N)
             section_builder.add_edge(SectionWebResearcher.N, SectionWriter.N)
+            section_builder.add_edge(SectionDigestWriter.N, END)
             return section_builder.compile()
 
         # Build the main graph
@@ -53,18 +94,24 @@ class BedrockDeepResearch:
             output=ArticleOutputState,
             config_schema=Configuration,
         )
-        builder.add_node(InitialResearcher.N,
-                         InitialResearcher(self.web_search))
-        builder.add_node(ArticleOutlineGenerator.N, ArticleOutlineGenerator())
-        builder.add_node(HumanFeedbackProvider.N, HumanFeedbackProvider())
-        builder.add_node("build_section_with_web_research",
-                         _section_subgraph())
-        builder.add_node(CompletedSectionsFormatter.N,
-                         CompletedSectionsFormatter())
-        builder.add_node(FinalSectionsWriter.N, FinalSectionsWriter())
-        builder.add_node(ArticleHeadImageGenerator.N,
-                         ArticleHeadImageGenerator())
-        builder.add_node(CompileFinalArticle.N, CompileFinalArticle())
+        _add_node(builder, InitialResearcher.N,
+                  InitialResearcher(self.web_search))
+        _add_node(builder, ArticleOutlineGenerator.N, ArticleOutlineGenerator())
+        _add_node(builder, ArticleOutlineEditor.N, ArticleOutlineEditor())
+        _add_node(builder, HumanFeedbackProvider.N,
+                  HumanFeedbackProvider(self.speculative_researcher))
+        # Sections wait for a slot of the scheduler before running the subgraph
+        _add_node(builder, "build_section_with_web_research",
+                  scheduled(_section_subgraph().invoke))
+        _add_node(builder, CompletedSectionsFormatter.N,
+                  CompletedSectionsFormatter())
+        _add_node(builder, FinalSectionsWriter.N,
+                  scheduled(FinalSectionsWriter()))
+        _add_node(builder, FinalSectionsBatchWriter.N,
+                  FinalSectionsBatchWriter())
+        _add_node(builder, ArticleHeadImageGenerator.N,
+                  ArticleHeadImageGenerator())
+        _add_node(builder, CompileFinalArticle.N, CompileFinalArticle())
 
         # Add edges
         builder.add_edge(START, InitialResearcher.N)
@@ -76,35 +123,65 @@ class BedrockDeepResearch:
         builder.add_conditional_edges(
             CompletedSectionsFormatter.N,
             initiate_final_section_writing,
-            [FinalSectionsWriter.N],
+            [FinalSectionsWriter.N, FinalSectionsBatchWriter.N],
         )
         builder.add_edge(FinalSectionsWriter.N, ArticleHeadImageGenerator.N)
+        builder.add_edge(FinalSectionsBatchWriter.N, ArticleHeadImageGenerator.N)
         builder.add_edge(ArticleHeadImageGenerator.N, CompileFinalArticle.N)
         builder.add_edge(CompileFinalArticle.N, END)
 
-        memory = MemorySaver()
-
-        return builder.compile(checkpointer=memory)
+        return builder.compile(checkpointer=self.checkpointer).with_config(
+            callbacks=[BudgetCallbackHandler(), TracingCallbackHandler()]
+        )
 
-    def start(self, topic: str):
+    def start(self, topic: str, config: Optional[dict] = None):
         """Starts the workflow with the given topic."""
 
         logger.debug(f"Starting workflow with topic: {topic}")
 
-        return self.graph.invoke(
-            {"topic": topic}, self.config, stream_mode="updates"
-        )
+        config = config or self.config
+        with trace_run("graph:start", config):
+            return self.graph.invoke(
+                {"topic": topic}, config, stream_mode="updates"
+            )
 
-    def feedback(self, feedback):
+    def feedback(self, feedback, config: Optional[dict] = None):
         """Provides feedback to the workflow."""
 
         logger.info(f"Feedback received: {feedback}")
 
-        return self.graph.invoke(
-            Command(resume=feedback), self.config, stream_mode="updates"
-        )
+        config = config or self.config
+        with trace_run("graph:feedback", config):
+            return self.graph.invoke(
+                Command(resume=feedback), config, stream_mode="updates"
+            )
+
+    def stream(self, input, config: Optional[dict] = None, name: str = "graph:stream") -> Iterator[tuple]:
+        """
+        Runs the workflow on `input`, a topic to start or a Command to resume it, yielding its progress
+        as (namespace, mode, chunk) tuples: the updates of the nodes, subgraphs included, and the tokens
+        generated by the models.
+        """
+
+        config = config or self.config
+        with trace_run(name, config):
+            yield from self.graph.stream(
+                input, config, stream_mode=["updates", "messages"], subgraphs=True
+            )
 
-    def get_state(self):
+    def get_state(self, config: Optional[dict] = None):
         """Returns the current state of the workflow."""
 
-        return self.graph.get_state(self.config)
+        return self.graph.get_state(config or self.config)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Deletes the checkpoints of a run, which cannot be resumed or inspected afterwards."""
+
+        release_run(thread_id)
+        try:
+            self.checkpointer.delete_thread(thread_id)
+        except NotImplementedError:
+            # The SqliteSaver of langgraph-checkpoint-sqlite 2.0 does not implement it
+            with self.checkpointer.cursor() as cursor:
+                cursor.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                cursor.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
@@ -0,0 +1,197 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+THUMBNAIL_WIDTH = 400
+WEBP_QUALITY = 80
+
+# Pillow releases the GIL while encoding, so the derivatives are written by threads without a process pool
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image_derivatives")
+_pending: Set[Future] = set()
+_pending_lock = threading.Lock()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Writes the file under a temporary name first, so that readers never see it partly written."""
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def save_image(image_bytes: bytes, directory: Union[str, Path], name: str) -> Path:
+    """
+    Saves an image as `<name>_<content hash>.png` in the directory. PNG bytes are written as they are, and
+    only images in another format are decoded and encoded to PNG.
+    """
+    if not image_bytes.startswith(PNG_SIGNATURE):
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            image_bytes = buffer.getvalue()
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    image_path = directory / f"{name}_{content_hash(image_bytes)}.png"
+    _write_atomic(image_path, image_bytes)
+    return image_path
+
+
+def derivative_paths(image_path: Union[str, Path]) -> Dict[str, Path]:
+    """Paths of the WebP copy and the WebP thumbnail of an image, next to it and named after it."""
+    image_path = Path(image_path)
+    return {
+        "webp": image_path.with_suffix(".webp"),
+        "thumbnail": image_path.with_name(f"{image_path.stem}_thumbnail.webp"),
+    }
+
+
+def write_derivatives(image_path: Union[str, Path]) -> Dict[str, Path]:
+    """Writes the WebP copy of the image and its thumbnail, `THUMBNAIL_WIDTH` pixels wide."""
+    from PIL import Image
+
+    paths = derivative_paths(image_path)
+    with Image.open(image_path) as image:
+        image.load()
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=WEBP_QUALITY)
+        _write_atomic(paths["webp"], buffer.getvalue())
+
+        image.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * image.height // max(image.width, 1)))
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=WEBP_QUALITY)
+        _write_atomic(paths["thumbnail"], buffer.getvalue())
+    return paths
+
+
+def _done(future: Future) -> None:
+    with _pending_lock:
+        _pending.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error writing the image derivatives: {future.exception()}")
+
+
+def submit_derivatives(image_path: Union[str, Path]) -> Future:
+    """Writes the derivatives of the image in the background, off the graph thread."""
+    future = _executor.submit(write_derivatives, image_path)
+    with _pending_lock:
+        _pending.add(future)
+    future.add_done_callback(_done)
+    return future
+
+
+def wait_for_derivatives(timeout: Optional[float] = None) -> None:
+    """Waits for the derivatives being written, e.g. before their directory is removed."""
+    with _pending_lock:
+        pending = set(_pending)
+    wait(pending, timeout=timeout)
+
+
+def existing_derivative(image_path: Optional[Union[str, Path]], kind: str) -> Optional[str]:
+    """The derivative of the image if it was already written, otherwise None."""
+    if not image_path:
+        return None
+    derivative = derivative_paths(image_path)[kind]
+    return str(derivative) if derivative.exists() else None
+
+
+def preferred_image(image_path: Optional[Union[str, Path]], kind: str = "webp") -> Optional[str]:
+    """The derivative of the image if it was already written, otherwise the image itself."""
+    if not image_path:
+        return image_path
+    return existing_derivative(image_path, kind) or str(image_path)
+
+
+class ImageCache:
+    """
+    Results of the calls generating the head image, persisted in a directory so that reruns and retries of
+    the article skip them: the images, keyed by the model id and request body, which set a fixed seed, and
+    the image prompts, keyed by the model id and the prompt holding the title and outline.
+
+    The entries used least recently, by modification time, are deleted once the directory exceeds
+    `max_bytes`. Entries are written atomically, so processes can share the directory. The cache is best-effort:
+    an entry that cannot be read is a miss, and one that cannot be written is skipped, without failing the caller.
+
+    Attributes:
+        directory (Path): Directory of the entries
+        max_bytes (int): Size of the entries above which the least recently used are evicted
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 200 * 2**20):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str, *parts: str) -> Path:
+        digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+        return self.directory / f"{kind}_{digest}"
+
+    def get(self, kind: str, *parts: str) -> Optional[bytes]:
+        path = self._path(kind, *parts)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Error reading {path.name} from the image cache: {e}")
+            return None
+        logger.info(f"Image cache hit for {path.name}")
+        return data
+
+    def put(self, data: bytes, kind: str, *parts: str) -> None:
+        path = self._path(kind, *parts)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, data)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Error writing {path.name} to the image cache: {e}")
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for path in self.directory.iterdir():
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            size = sum(entry_size for _, entry_size, _ in entries)
+            for _, entry_size, path in sorted(entries):
+                if size <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                size -= entry_size
+                logger.info(f"Evicted {path.name} from the image cache")
+
+
+_caches: Dict[Tuple[str, int], ImageCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_image_cache(output_dir: str, max_mb: float) -> Optional[ImageCache]:
+    """Returns the image cache of the output directory, or None if it is disabled with a size of 0."""
+    if not max_mb:
+        return None
+    key = (str(Path(output_dir) / ".image_cache"), int(max_mb * 2**20))
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ImageCache(*key)
+        return _caches[key]
@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+
+from .registry import release_run
+
+if TYPE_CHECKING:
+    from .graph import BedrockDeepResearch
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when a run is submitted while all the workers are busy and the queue is full."""
+
+
+class JobBusy(Exception):
+    """Raised when a run is submitted while the previous step of the same run is still queued or running."""
+
+
+def _status(state) -> str:
+    """Status of a run whose step is not running, from its graph state."""
+    if not state.next:
+        return "completed"
+    if any(task.interrupts for task in state.tasks):
+        return "waiting_feedback"
+    return "failed"
+
+
+class Job:
+    """
+    A research run, identified by the `thread_id` of its config, executed step by step in the background:
+    the outline first, then each feedback until the article is written.
+
+    Attributes:
+        thread_id (str): Id of the run
+        config (dict): Runnable config of the run
+        status (str): queued, running, waiting_feedback, completed or failed
+        feedback: Feedback of the current step, None for the outline of the topic
+        error (str): Error of the last step if it failed
+        events (deque): Latest progress of the run, up to `max_events`, numbered by `seq`. The model tokens
+            are dropped once the step is done, its output being in the state of the run
+    """
+
+    def __init__(self, thread_id: str, config: dict, max_events: int = 1000):
+        self.thread_id = thread_id
+        self.config = config
+        self.status = "queued"
+        self.feedback = None
+        self.error: Optional[str] = None
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.next_seq = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._condition = threading.Condition()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def add_event(self, type: str, **data) -> None:
+        with self._condition:
+            self.events.append({"seq": self.next_seq, "time": time.time(), "type": type, **data})
+            self.next_seq += 1
+            self.updated_at = time.time()
+            self._condition.notify_all()
+
+    def set_status(self, status: str, error: Optional[str] = None) -> None:
+        with self._condition:
+            self.status, self.error = status, error
+            if not self.active:
+                self.events = deque((e for e in self.events if e["type"] != "token"), maxlen=self.events.maxlen)
+        self.add_event("status", status=status, **({"error": error} if error else {}))
+
+    def wait_events(self, after: int = 0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the events kept from seq `after`, waiting up to `timeout` seconds for new ones if there are none.
+        Events dropped from the buffer are skipped.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.next_seq > after, timeout=timeout)
+            return [event for event in self.events if event["seq"] >= after]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "thread_id": self.thread_id,
+            "status": self.status,
+            "error": self.error,
+            "events": self.next_seq,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobManager:
+    """
+    Runs the steps of research runs on a pool of background workers, so that callers only submit them and
+    follow their progress by `thread_id`.
+
+    Admission control keeps the backlog bounded: a step is rejected with QueueFull when `max_workers` steps
+    are running and `max_queued` are already waiting. Finished jobs are kept for their results and progress,
+    up to `max_jobs`, the oldest inactive ones being forgotten first. With `delete_forgotten`, the checkpoints
+    of the forgotten jobs are deleted too, for callers that cannot restore them anyway.
+    """
+
+    def __init__(self, deep_research: "BedrockDeepResearch", max_workers: int = 4, max_queued: int = 16,
+                 max_jobs: int = 1000, delete_forgotten: bool = False):
+        self.deep_research = deep_research
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_jobs = max_jobs
+        self.delete_forgotten = delete_forgotten
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="research_job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = 0
+
+    def start(self, topic: str, config: dict) -> Job:
+        """Submits the outline of a new run on `topic`."""
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            if thread_id in self._jobs:
+                raise JobBusy(f"Run {thread_id} already exists")
+            job = Job(thread_id, config)
+            self._submit(job, {"topic": topic}, None)
+            self._jobs[thread_id] = job
+            self._evict()
+        return job
+
+    def feedback(self, thread_id: str, feedback) -> Job:
+        """Submits the feedback to the outline of a run: True to write the article, or the changes to make."""
+        with self._lock:
+            job = self._jobs.get(thread_id)
+            if job is None:
+                raise KeyError(thread_id)
+            if job.active:
+                raise JobBusy(f"Run {thread_id} is {job.status}")
+            from langgraph.types import Command
+
+            self._submit(job, Command(resume=feedback), feedback)
+            self._jobs.move_to_end(thread_id)
+        return job
+
+    def restore(self, config: dict) -> Optional[Job]:
+        """
+        Registers a run started by a previous process, from the state saved by a durable checkpointer,
+        so that it can be followed and resumed. Returns None if the checkpointer has no state for the run.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            if thread_id in self._jobs:
+                return self._jobs[thread_id]
+
+        state = self.deep_research.get_state(config)
+        if not state.values:
+            return None
+
+        job = Job(thread_id, config)
+        job.status = _status(state)
+        if job.status == "failed":
+            job.error = "The run was stopped by a restart before its step completed"
+        with self._lock:
+            job = self._jobs.setdefault(thread_id, job)
+            self._evict()
+        return job
+
+    def get(self, thread_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(thread_id)
+
+    def forget(self, thread_id: str) -> None:
+        """Forgets a run that is not running, deleting its checkpoints, e.g. when its user starts over."""
+        with self._lock:
+            job = self._jobs.get(thread_id)
+            if job is not None and job.active:
+                raise JobBusy(f"Run {thread_id} is {job.status}")
+            self._jobs.pop(thread_id, None)
+        self.deep_research.delete_thread(thread_id)
+
+    def get_state(self, thread_id: str):
+        job = self.get(thread_id)
+        return None if job is None else self.deep_research.get_state(job.config)
+
+    @property
+    def queue_depth(self) -> int:
+        """Steps submitted and not finished yet, queued or running."""
+        with self._lock:
+            return self._pending
+
+    def _submit(self, job: Job, input, feedback) -> None:
+        if self._pending >= self.max_workers + self.max_queued:
+            raise QueueFull(f"{self._pending} runs are already queued or running, try again later")
+        self._pending += 1
+        job.feedback = feedback
+        job.set_status("queued")
+        self._executor.submit(self._run, job, input)
+
+    def _evict(self) -> None:
+        inactive = [thread_id for thread_id, job in self._jobs.items() if not job.active]
+        for thread_id in inactive[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[thread_id]
+            if self.delete_forgotten:
+                try:
+                    self.deep_research.delete_thread(thread_id)
+                except Exception as e:
+                    logger.warning(f"Checkpoints of run {thread_id} not deleted: {e}")
+
+    def _run(self, job: Job, input) -> None:
+        job.set_status("running")
+        try:
+            for namespace, mode, chunk in self.deep_research.stream(input, job.config, name="graph:job"):
+                if mode == "messages":
+                    message, metadata = chunk
+                    if isinstance(message.content, str) and message.content:
+                        job.add_event("token", node=metadata.get("langgraph_node"), text=message.content)
+                    continue
+                for node, update in chunk.items():
+                    if node == "__interrupt__":
+                        job.add_event("interrupt", value=str(update[0].value))
+                    else:
+                        job.add_event("node", node=node, path="/".join(
+                            [ns.split(":")[0] for ns in namespace] + [node]))
+
+            job.set_status(_status(self.deep_research.get_state(job.config)))
+        except Exception as e:
+            logger.exception(f"Run {job.thread_id} failed")
+            job.set_status("failed", error=str(e))
+            # The run is not resumed after a failure, its budget, source pool and speculations are dropped
+            release_run(job.thread_id)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
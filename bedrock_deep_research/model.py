@@ -1,5 +1,5 @@
 import operator
-from typing import Annotated, List, TypedDict
+from typing import Annotated, List, Literal, TypedDict
 
 from pydantic import BaseModel, Field
 
@@ -37,6 +37,12 @@ class Section(BaseModel):
     sources: List[Source] = Field(
         description="List of sources for this section.", default=[]
     )
+    search_queries: List[str] = Field(
+        description="Initial search queries proposed with the outline, empty to generate them.", default=[]
+    )
+    digest: str = Field(
+        description="Short summary of the content, used to write the final sections.", default=""
+    )
 
 
 class OutlineSection(BaseModel):
@@ -59,6 +65,66 @@ class Outline(BaseModel):
     )
 
 
+class OutlineSectionWithQueries(OutlineSection):
+    queries: List[str] = Field(
+        description="Web search queries to research this section.",
+    )
+
+
+class OutlineWithQueries(Outline):
+    """A outline of the research article with the search queries of its sections"""
+
+    sections: List[OutlineSectionWithQueries] = Field(
+        description="Sections of the article.",
+    )
+
+
+class OutlineEdit(BaseModel):
+    operation: Literal["rename", "describe", "move", "delete", "add", "retitle"] = Field(
+        description="rename or describe a section, move it, delete it, add a new section, or retitle the article.",
+    )
+    section: int = Field(
+        description="Number of the edited section in the outline as listed, 0 for add and retitle.", default=0
+    )
+    name: str = Field(
+        description="New name of the section for rename and add, new title of the article for retitle.", default=""
+    )
+    description: str = Field(
+        description="New description of the section for describe and add.", default=""
+    )
+    position: int = Field(
+        description="Number of the section once moved or added, 0 to put it before the conclusion.", default=0
+    )
+
+
+class OutlineEdits(BaseModel):
+    """Edits of the article outline requested by a feedback"""
+
+    regenerate: bool = Field(
+        description="Whether the feedback asks for more than these edits, e.g. changes to the content, scope or angle of the article, so that the outline must be regenerated.",
+    )
+    edits: List[OutlineEdit] = Field(
+        description="Edits applied to the outline in order, empty when regenerating.",
+    )
+
+
+class FinalSection(BaseModel):
+    name: str = Field(
+        description="Name of the section, as given.",
+    )
+    content: str = Field(
+        description="The content of the section in Markdown.",
+    )
+
+
+class FinalSections(BaseModel):
+    """The sections synthesizing the rest of the article"""
+
+    sections: List[FinalSection] = Field(
+        description="Every requested section, in the requested order.",
+    )
+
+
 class ArticleState(TypedDict):
     topic: str
     title: str
@@ -71,6 +137,8 @@ class ArticleState(TypedDict):
     feedback_on_report_plan: str
     final_report: str
     head_image_path: str
+    # Decisions taken by the research budget on each section iteration
+    research_decisions: Annotated[list, operator.add]
 
 
 class ArticleInputState(TypedDict):
@@ -85,15 +153,19 @@ class SectionState(TypedDict):
     section: Section  # Report section
     search_iterations: int  # Number of search iterations done
     search_queries: list[SearchQuery]  # List of search queries
+    past_queries: Annotated[list, operator.add]  # Search queries run by the previous iterations
     sources: Annotated[list, operator.add]
+    new_source_share: float  # Share of the sources of the last iteration not found by the previous ones
     source_str: str  # String of formatted source content from web search
     feedback_on_report_plan: str  # Feedback on the report plan
     # String of any completed sections from research to write final sections
     report_sections_from_research: str
     # Final key we duplicate in outer state for Send() API
     completed_sections: list[Section]
+    research_decisions: Annotated[list, operator.add]
 
 
 class SectionOutputState(TypedDict):
     # Final key we duplicate in outer state for Send() API
     completed_sections: list[Section]
+    research_decisions: list
@@ -1,25 +1,45 @@
-from .article_head_image_generator import ArticleHeadImageGenerator
-from .article_outline_generator import ArticleOutlineGenerator
-from .compile_final_article import CompileFinalArticle
-from .completed_sections_formatter import CompletedSectionsFormatter
-from .final_sections_writer import FinalSectionsWriter
-from .human_feedback_provider import HumanFeedbackProvider
-from .initial_researcher import InitialResearcher
+import importlib
+from typing import TYPE_CHECKING
+
+# The routing functions are named after their module, which would shadow them once imported
 from .initiate_final_section_writing import initiate_final_section_writing
-from .section_search_query_generator import SectionSearchQueryGenerator
-from .section_web_researcher import SectionWebResearcher
-from .section_writer import SectionWriter
+from .initiate_section_research import initiate_section_research
+
+if TYPE_CHECKING:
+    from .article_head_image_generator import ArticleHeadImageGenerator
+    from .article_outline_editor import ArticleOutlineEditor
+    from .article_outline_generator import ArticleOutlineGenerator
+    from .compile_final_article import CompileFinalArticle
+    from .completed_sections_formatter import CompletedSectionsFormatter
+    from .final_sections_writer import FinalSectionsBatchWriter, FinalSectionsWriter
+    from .human_feedback_provider import HumanFeedbackProvider
+    from .initial_researcher import InitialResearcher
+    from .section_digest_writer import SectionDigestWriter
+    from .section_search_query_generator import SectionSearchQueryGenerator
+    from .section_web_researcher import SectionWebResearcher
+    from .section_writer import SectionWriter
+
+# Module of each node, imported on first access so that importing one node does not import them all
+_modules = {
+    "InitialResearcher": "initial_researcher",
+    "ArticleOutlineGenerator": "article_outline_generator",
+    "ArticleOutlineEditor": "article_outline_editor",
+    "HumanFeedbackProvider": "human_feedback_provider",
+    "SectionSearchQueryGenerator": "section_search_query_generator",
+    "SectionWebResearcher": "section_web_researcher",
+    "SectionWriter": "section_writer",
+    "SectionDigestWriter": "section_digest_writer",
+    "FinalSectionsWriter": "final_sections_writer",
+    "FinalSectionsBatchWriter": "final_sections_writer",
+    "CompileFinalArticle": "compile_final_article",
+    "CompletedSectionsFormatter": "completed_sections_formatter",
+    "ArticleHeadImageGenerator": "article_head_image_generator",
+}
+
+__all__ = list(_modules) + ["initiate_final_section_writing", "initiate_section_research"]
+
 
-__all__ = [
-    InitialResearcher,
-    ArticleOutlineGenerator,
-    HumanFeedbackProvider,
-    SectionSearchQueryGenerator,
-    SectionWebResearcher,
-    SectionWriter,
-    FinalSectionsWriter,
-    CompileFinalArticle,
-    initiate_final_section_writing,
-    CompletedSectionsFormatter,
-    ArticleHeadImageGenerator,
-]
+def __getattr__(name: str):
+    if name in _modules:
+        return getattr(importlib.import_module(f".{_modules[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
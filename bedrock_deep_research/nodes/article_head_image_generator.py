@@ -1,22 +1,19 @@
 import base64
-import io
 import json
 import logging
 import time
-from pathlib import Path
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import ClientError
-from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-from PIL import Image
 
 from bedrock_deep_research.utils import exponential_backoff_retry
 
+from ..bedrock import bedrock_runtime, chat_model
 from ..config import Configuration
+from ..images import get_image_cache, save_image, submit_derivatives
 from ..model import ArticleState
+from ..output_limits import max_tokens_for
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +35,7 @@ def generate_image(model_id, body):
     Returns:
         image_bytes (bytes): The image generated by the model.
     """
-    bedrock = boto3.client(
-        service_name="bedrock-runtime", config=Config(read_timeout=300)
-    )
+    bedrock = bedrock_runtime(read_timeout=300)
 
     accept = "application/json"
     content_type = "application/json"
@@ -98,29 +93,27 @@ class ArticleHeadImageGenerator:
         image_path = ""
         try:
             configurable = Configuration.from_runnable_config(config)
-
-            planner_model = ChatBedrock(
-                model_id=configurable.planner_model, max_tokens=configurable.max_tokens)
+            cache = get_image_cache(configurable.output_dir, configurable.image_cache_mb)
 
             system_prompt = generate_image_prompt.format(
                 title=title, outline="\n".join(f"- {s.name}" for s in sections)
             )
 
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(
-                    content="Create a prompt to generate the main image of the article"
-                ),
-            ]
-
-            prompt = planner_model.invoke(messages)
+            # The prompt only depends on the title and outline, and the image on the prompt, as the seed is fixed
+            cached_prompt = cache.get("prompt", configurable.planner_model, system_prompt) if cache else None
+            if cached_prompt is not None:
+                prompt = cached_prompt.decode("utf-8")
+            else:
+                prompt = self._generate_prompt(configurable, system_prompt)
+                if cache:
+                    cache.put(prompt.encode("utf-8"), "prompt", configurable.planner_model, system_prompt)
 
-            logger.info("Generated head image prompt: %s", prompt.content)
+            logger.info("Generated head image prompt: %s", prompt)
 
             body = json.dumps(
                 {
                     "taskType": "TEXT_IMAGE",
-                    "textToImageParams": {"text": prompt.content},
+                    "textToImageParams": {"text": prompt},
                     "imageGenerationConfig": {
                         "numberOfImages": 1,
                         "height": 640,
@@ -131,38 +124,44 @@ class ArticleHeadImageGenerator:
                 }
             )
 
-            image_bytes = generate_image(
-                model_id=configurable.image_model, body=body)
+            image_bytes = cache.get("image", configurable.image_model, body) if cache else None
+            if image_bytes is None:
+                image_bytes = generate_image(
+                    model_id=configurable.image_model, body=body)
+                if cache:
+                    cache.put(image_bytes, "image", configurable.image_model, body)
             image_path = self._save_image(
                 article_id, configurable.output_dir, image_bytes
             )
+            if image_path and configurable.image_derivatives:
+                submit_derivatives(image_path)
 
         except ClientError as err:
             message = err.response["Error"]["Message"]
-            logger.error("A bedrock client error occurred:", message)
+            logger.error("A bedrock client error occurred: %s", message)
         except Exception as e:
             logger.error(
-                "An error occurred during ArticleHeadImageGenerator:", e)
+                "An error occurred during ArticleHeadImageGenerator: %s", e)
 
         logger.info("Generated head image: %s", image_path)
         return {"head_image_path": image_path}
 
-    def _save_image(self, article_id, output_dir, image_bytes) -> None:
-        try:
-
-            output_path = Path(output_dir)
-            output_path.mkdir(parents=True, exist_ok=True)
+    def _generate_prompt(self, configurable: Configuration, system_prompt: str) -> str:
+        planner_model = chat_model(
+            model_id=configurable.planner_model, max_tokens=max_tokens_for("image_prompt", configurable))
 
-            report_path = Path(f"{output_dir}/{article_id}")
-            report_path.mkdir(parents=True, exist_ok=True)
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(
+                content="Create a prompt to generate the main image of the article"
+            ),
+        ]
 
-            image_path = report_path / f"{article_id}.png"
+        return planner_model.invoke(messages).content
 
-            with Image.open(io.BytesIO(image_bytes)) as image:
-                image.save(image_path, format="PNG")
-
-            return image_path
-        except ImageError as err:
-            logger.error(
-
-                f"Error saving the generated image results: {err.message}")
+    def _save_image(self, article_id, output_dir, image_bytes):
+        try:
+            return save_image(image_bytes, f"{output_dir}/{article_id}", article_id)
+        except OSError as err:
+            logger.error(f"Error saving the generated image results: {err}")
+            return ""
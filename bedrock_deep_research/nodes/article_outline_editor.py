@@ -0,0 +1,227 @@
+import logging
+import re
+from typing import List, Literal, Optional, Tuple
+
+from botocore.exceptions import ClientError
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Command
+
+from ..bedrock import chat_model
+from ..config import Configuration
+from ..model import ArticleState, OutlineEdit, OutlineEdits, Section
+from ..output_limits import max_tokens_for
+from ..utils import exponential_backoff_retry
+from .article_outline_generator import ArticleOutlineGenerator, mark_research_sections
+
+logger = logging.getLogger(__name__)
+
+system_prompt_template = """You are an expert technical writer applying the feedback of a reviewer to an article outline.
+
+<outline>
+Title: {title}
+
+{sections}
+</outline>
+
+<feedback>
+{feedback}
+</feedback>
+
+<instructions>
+1. If the feedback only asks to rename, describe, move, delete or add sections, or to retitle the article, return these edits in order and set regenerate to false.
+2. Refer to the sections by their number in the outline above.
+3. If the feedback asks for anything else, e.g. a different focus, depth, audience or structure of the article, return no edits and set regenerate to true.
+</instructions>
+"""
+
+
+# Feedback mentioning none of these words cannot be edits of the outline, and is regenerated without asking the model
+EDIT_WORDS = re.compile(r"\b(rename|retitle|title|move|delete|remove|drop|add|describe|swap|reorder)\b", re.IGNORECASE)
+
+_SECTION = r"section (?P<section>.+?)"
+# Edits written as commands, one per line or sentence, e.g. `Rename section 2 to Pricing` or `Delete section "Setup"`
+_COMMANDS = [(operation, re.compile(pattern, re.IGNORECASE)) for operation, pattern in [
+    ("retitle", r"(?:retitle(?: the article)?|rename the article|change the title)(?: to| as)? (?P<name>.+)"),
+    ("rename", rf"rename {_SECTION} (?:to|as) (?P<name>.+)"),
+    ("describe", rf"describe {_SECTION} as (?P<description>.+)"),
+    ("delete", rf"(?:delete|remove|drop) {_SECTION}"),
+    ("move", rf"move {_SECTION}(?: to (?:position )?(?P<position>\d+)| before the conclusion)?"),
+    ("add", r"add (?:a )?(?:new )?section (?:called |named )?(?P<name>.+?)"
+            r"(?: at (?:position )?(?P<position>\d+))?(?:: (?P<description>.+))?"),
+]]
+
+
+class OutlineEditError(ValueError):
+    """Raised when an edit does not apply to the outline."""
+
+
+def _unquote(text: str) -> str:
+    return text.strip().strip("\"'").strip()
+
+
+def _ambiguous(text: str) -> bool:
+    """Whether a name may hold more requests than the name, e.g. `Pricing and explain the costs`, unless quoted."""
+    text = text.strip()
+    quoted = len(text) > 1 and text[0] == text[-1] and text[0] in "\"'"
+    return not quoted and bool(re.search(r",|\band\b", text, re.IGNORECASE))
+
+
+def _section_number(reference: str, sections: List[Section]) -> Optional[int]:
+    """Number of the section referred to by its number or name, None if there is none."""
+    reference = _unquote(reference)
+    if reference.isdigit():
+        return int(reference)
+    return next((i for i, section in enumerate(sections, 1) if section.name.lower() == reference.lower()), None)
+
+
+def parse_outline_edits(feedback: str, sections: List[Section]) -> Optional[List[OutlineEdit]]:
+    """
+    Parses a feedback written as edit commands, one per line or sentence, referring to the sections by their
+    number or name. Returns None unless every command is understood, for the model to interpret the feedback;
+    new names with a comma or an `and` must be quoted, as they may hold other requests.
+    """
+    edits = []
+    for command in re.split(r"[\n;]+|\.\s+", feedback.strip().rstrip(".")):
+        command = command.strip()
+        if not command:
+            continue
+        for operation, pattern in _COMMANDS:
+            match = pattern.fullmatch(command)
+            if match is None:
+                continue
+            fields = {k: v for k, v in match.groupdict().items() if v is not None}
+            if "section" in fields:
+                fields["section"] = _section_number(fields["section"], sections)
+                if fields["section"] is None:
+                    return None
+            if _ambiguous(fields.get("name", "")):
+                return None
+            for key in ("name", "description"):
+                if key in fields:
+                    fields[key] = _unquote(fields[key])
+            edits.append(OutlineEdit(operation=operation, **fields))
+            break
+        else:
+            return None
+    return edits or None
+
+
+def apply_outline_edits(title: str, sections: List[Section], edits: List[OutlineEdit]) -> Tuple[str, List[Section]]:
+    """
+    Applies the edits to a copy of the outline, the section numbers referring to the outline before the edits.
+    Sections moved or added without a position go before the conclusion, and the sections to research are
+    marked again as by the outline generator.
+    """
+    listed = [section.model_copy() for section in sections]
+    current = list(listed)
+
+    # Sections are compared by identity, as pydantic models with the same fields are equal
+    def index(section: Section) -> int:
+        return next(i for i, s in enumerate(current) if s is section)
+
+    def listed_section(number: int) -> Section:
+        if not 1 <= number <= len(listed) or not any(s is listed[number - 1] for s in current):
+            raise OutlineEditError(f"No section {number} to edit")
+        return listed[number - 1]
+
+    def insert(section: Section, position: int) -> None:
+        if 1 <= position <= len(current):
+            current.insert(position - 1, section)
+        elif current and not current[-1].research:
+            current.insert(len(current) - 1, section)
+        else:
+            current.append(section)
+
+    for edit in edits:
+        if edit.operation == "retitle":
+            title = edit.name or title
+        elif edit.operation == "rename":
+            section = listed_section(edit.section)
+            section.name = edit.name or section.name
+        elif edit.operation == "describe":
+            section = listed_section(edit.section)
+            section.description, section.search_queries = edit.description, []
+        elif edit.operation == "delete":
+            del current[index(listed_section(edit.section))]
+        elif edit.operation == "move":
+            section = listed_section(edit.section)
+            del current[index(section)]
+            insert(section, edit.position)
+        elif edit.operation == "add":
+            if not edit.name:
+                raise OutlineEditError("A new section needs a name")
+            insert(Section(section_number=0, name=edit.name, description=edit.description), edit.position)
+
+    if not current:
+        raise OutlineEditError("The edits delete every section")
+    for i, section in enumerate(current):
+        section.section_number = i
+    mark_research_sections(current)
+    return title, current
+
+
+class ArticleOutlineEditor:
+    """
+    Applies the feedback on the outline as structured edits when it only renames, describes, moves, deletes
+    or adds sections. Feedback written as edit commands is parsed without a model call; other feedback
+    mentioning edits is interpreted by the writer model, without the research context. Any other feedback
+    goes straight to the outline generator, which regenerates the whole outline.
+    """
+
+    N = "edit_article_outline"
+
+    def __call__(
+        self, state: ArticleState, config: RunnableConfig
+    ) -> Command[Literal[ArticleOutlineGenerator.N, "human_feedback"]]:
+        configurable = Configuration.from_runnable_config(config)
+        title, sections = state["title"], state["sections"]
+
+        try:
+            outline = self._edit_outline(configurable, title, sections, state["feedback_on_report_plan"])
+        except Exception as e:
+            logger.warning(f"Regenerating the outline, the feedback could not be applied as edits: {e}")
+            outline = None
+
+        if outline is None:
+            return Command(goto=ArticleOutlineGenerator.N)
+
+        title, sections = outline
+        logger.info(f"Edited sections -> {sections}")
+        return Command(goto="human_feedback", update={"title": title, "sections": sections})
+
+    def _edit_outline(self, configurable: Configuration, title: str, sections: List[Section],
+                      feedback: str) -> Optional[Tuple[str, List[Section]]]:
+        edits = parse_outline_edits(feedback, sections)
+        if edits is not None:
+            logger.info(f"Outline edits parsed from the feedback: {edits}")
+            return apply_outline_edits(title, sections, edits)
+        if not EDIT_WORDS.search(feedback):
+            logger.info("Regenerating the outline for the feedback")
+            return None
+
+        system_prompt = system_prompt_template.format(
+            title=title,
+            sections="\n".join(
+                f"{i}. {section.name}: {section.description}" for i, section in enumerate(sections, 1)),
+            feedback=feedback,
+        )
+        edits = self.generate_edits(
+            configurable.writer_model, max_tokens_for("outline_edits", configurable), system_prompt)
+
+        if edits.regenerate or not edits.edits:
+            logger.info("Regenerating the outline for the feedback")
+            return None
+        logger.info(f"Outline edits: {edits.edits}")
+        return apply_outline_edits(title, sections, edits.edits)
+
+    @exponential_backoff_retry(ClientError, max_retries=10)
+    def generate_edits(self, model_id: str, max_tokens: int, system_prompt: str) -> OutlineEdits:
+        model = chat_model(
+            model_id=model_id, max_tokens=max_tokens
+        ).with_structured_output(OutlineEdits)
+
+        return model.invoke(
+            [SystemMessage(content=system_prompt)]
+            + [HumanMessage(content="Apply the feedback to the outline.")]
+        )
@@ -1,11 +1,13 @@
 import logging
+from typing import List
 
-from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 
+from ..bedrock import chat_model
 from ..config import Configuration
-from ..model import ArticleState, Outline, Section
+from ..model import ArticleState, Outline, OutlineWithQueries, Section
+from ..output_limits import max_tokens_for
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,15 @@ system_prompt = """You are an expert technical writer tasked to plan an article
 7. Return the title and sections as a valid JSON object without any additional text.
 </instructions>
 """
+
+# Appended to the system prompt when the outline proposes the search queries of its sections
+search_queries_instructions = """
+<search queries>
+Also give each section the field:
+    - queries: {number_of_queries} web search queries to research the section, specific enough to avoid generic results, including technical terms and year markers where relevant, and covering different aspects of the section
+</search queries>
+"""
+
 user_prompt_template = """
 The topic of the article is:
 <topic>
@@ -44,6 +55,14 @@ Use this context to plan the sections of the article:
 """
 
 
+def mark_research_sections(sections: List[Section]) -> None:
+    """The introduction and the conclusion, the first and the last sections, distill the others without research."""
+    for i, section in enumerate(sections):
+        section.research = 0 < i < len(sections) - 1
+        if not section.research:
+            section.search_queries = []
+
+
 class ArticleOutlineGenerator:
     N = "generate_article_outline"
 
@@ -64,25 +83,34 @@ class ArticleOutlineGenerator:
             context=source_str,
             feedback=feedback,
         )
-        outline = self.generate_outline(
-            configurable.planner_model, configurable.max_tokens, system_prompt, user_prompt)
+        max_tokens = max_tokens_for("outline", configurable)
+        if configurable.outline_search_queries:
+            outline = self.generate_outline(
+                configurable.planner_model, max_tokens,
+                system_prompt + search_queries_instructions.format(
+                    number_of_queries=configurable.number_of_queries),
+                user_prompt, OutlineWithQueries)
+        else:
+            outline = self.generate_outline(
+                configurable.planner_model, max_tokens, system_prompt, user_prompt)
 
         logger.info(f"Generated sections: {outline.sections}")
         sections = [
             Section(section_number=i, name=section.name,
-                    description=section.description)
+                    description=section.description,
+                    search_queries=getattr(section, "queries", [])[:configurable.number_of_queries])
             for i, section in enumerate(outline.sections)
         ]
-        # Set the first and the last section research as false.
-        sections[-1].research, sections[0].research = False, False
+        mark_research_sections(sections)
         logger.info(f"Sections -> {sections}")
         return {"title": outline.title, "sections": sections}
 
-    def generate_outline(self, model_id: str, max_tokens: int, system_prompt: str, user_prompt: str):
+    def generate_outline(self, model_id: str, max_tokens: int, system_prompt: str, user_prompt: str,
+                         schema: type[Outline] = Outline):
 
-        planner_model = ChatBedrock(
+        planner_model = chat_model(
             model_id=model_id, max_tokens=max_tokens
-        ).with_structured_output(Outline)
+        ).with_structured_output(schema)
 
         return planner_model.invoke(
             [SystemMessage(content=system_prompt)]
@@ -1,6 +1,8 @@
 from langchain_core.runnables import RunnableConfig
 
+from ..citations import render_sources
 from ..model import ArticleState
+from ..registry import release_run, thread_id_of
 
 
 class CompileFinalArticle:
@@ -14,11 +16,15 @@ class CompileFinalArticle:
         title = state["title"]
         sections = state["sections"]
         completed_sections = {
-            s.name: s.content for s in state["completed_sections"]}
+            s.name: s for s in state["completed_sections"]}
 
         # Update sections with completed content while maintaining original order
         for section in sections:
-            section.content = completed_sections[section.name]
+            section.content = completed_sections[section.name].content
+            section.sources = completed_sections[section.name].sources
+            # The sources of the researched sections are listed from their state, numbered as they were cited
+            if section.research:
+                section.content = render_sources(section.content, section.sources)
 
         all_sections = f"# {title}\n"
 
@@ -30,4 +36,6 @@ class CompileFinalArticle:
         all_sections += "\n\n".join(
             [f"## {s.name}\n{s.content}" for s in sections])
 
+        release_run(thread_id_of(config))
+
         return {"final_report": all_sections, "sections": sections}
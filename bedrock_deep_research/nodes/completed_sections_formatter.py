@@ -2,6 +2,7 @@ import logging
 
 from langchain_core.runnables import RunnableConfig
 
+from ..config import Configuration
 from ..model import ArticleState, Section
 
 logger = logging.getLogger(__name__)
@@ -14,7 +15,11 @@ class CompletedSectionsFormatter:
         logger.info("Gathering completed sections")
 
         completed_sections = state["completed_sections"]
-        draft = self._format_sections(completed_sections)
+        configurable = Configuration.from_runnable_config(config)
+        if configurable.section_digest_words and all(s.digest for s in completed_sections):
+            draft = self._format_digests(completed_sections, configurable.final_context_tokens)
+        else:
+            draft = self._format_sections(completed_sections)
 
         return {
             "report_sections_from_research": draft,
@@ -38,3 +43,16 @@ Content:
 
 """
         return formatted_str
+
+    def _format_digests(self, sections: list[Section], max_tokens: int) -> str:
+        """Format the digests of a list of sections into a string of about `max_tokens` tokens at most"""
+        # Using rough estimate of 4 characters per token, shared equally by the sections
+        char_limit = max_tokens * 4 // max(len(sections), 1)
+        formatted_str = ""
+        for idx, section in enumerate(sections, 1):
+            header = f"Section {idx}: {section.name}\n"
+            digest = section.digest.strip()
+            if len(header) + len(digest) > char_limit:
+                digest = digest[:max(char_limit - len(header), 0)].rsplit(" ", 1)[0] + " [...]"
+            formatted_str += f"{header}{digest}\n\n"
+        return formatted_str
@@ -1,27 +1,20 @@
+import logging
+from typing import List
+
 from botocore.exceptions import ClientError
-from langchain_aws import ChatBedrock
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 
+from ..bedrock import chat_model
 from ..config import Configuration
-from ..model import Section, SectionState
+from ..model import ArticleState, FinalSections, Section, SectionState
+from ..output_limits import SECTION_STOP_SEQUENCES, max_tokens_for
 from ..utils import exponential_backoff_retry
 
-final_section_writer_instructions = """You are an expert technical writer crafting a section that synthesizes information from the rest of the article.
-
-<Section title>
-{section_title}
-</Section title>
-
-<Section description>
-{section_description}
-</Section description>
-
-<Available article content>
-{context}
-</Available article content>
+logger = logging.getLogger(__name__)
 
-<Task>
+final_section_guidelines = """<Task>
 1. Section-Specific Approach:
 
 For Introduction:
@@ -62,8 +55,39 @@ For Conclusion/Summary:
 - For conclusion: 100-150 word limit, only ONE structural element at most, no sources section
 - Markdown format
 - Do not include word count or any preamble in your response
+- Do not copy the [n] reference markers of the article content
 </Quality Checks>"""
 
+final_section_writer_instructions = """You are an expert technical writer crafting a section that synthesizes information from the rest of the article.
+
+<Section title>
+{section_title}
+</Section title>
+
+<Section description>
+{section_description}
+</Section description>
+
+<Available article content>
+{context}
+</Available article content>
+
+""" + final_section_guidelines
+
+batch_final_sections_writer_instructions = """You are an expert technical writer crafting the sections that synthesize information from the rest of the article.
+
+<Sections>
+{sections}
+</Sections>
+
+<Available article content>
+{context}
+</Available article content>
+
+""" + final_section_guidelines + """
+
+Return every section listed in <Sections>, in the same order and with the same names."""
+
 
 class FinalSectionsWriter:
     N = "write_final_sections"
@@ -76,8 +100,9 @@ class FinalSectionsWriter:
 
         configurable = Configuration.from_runnable_config(config)
 
-        writer_model = ChatBedrock(
-            model_id=configurable.writer_model, streaming=True)
+        writer_model = chat_model(
+            model_id=configurable.writer_model, max_tokens=max_tokens_for("final_section", configurable),
+            streaming=True)
 
         section.content = self._generate_final_sections(
             writer_model,
@@ -91,7 +116,7 @@ class FinalSectionsWriter:
     @exponential_backoff_retry(ClientError, max_retries=10)
     def _generate_final_sections(
         self,
-        model: ChatBedrock,
+        model: BaseChatModel,
         system_prompt: str,
         section: Section,
         completed_report_sections: str,
@@ -110,7 +135,75 @@ class FinalSectionsWriter:
                 HumanMessage(
                     content="Generate a section of an article based on the provided sources."
                 )
-            ]
+            ],
+            stop=SECTION_STOP_SEQUENCES,
         )
 
         return section_content.content
+
+
+class FinalSectionsBatchWriter:
+    """
+    Write all the final sections of the article in a single structured call, so that the completed sections
+    used as context are sent to the model once rather than once per final section.
+    """
+
+    N = "write_final_sections_batch"
+
+    def __call__(self, state: ArticleState, config: RunnableConfig):
+        sections = [s for s in state["sections"] if not s.research]
+        if not sections:
+            return {"completed_sections": []}
+        completed_report_sections = state["report_sections_from_research"]
+
+        configurable = Configuration.from_runnable_config(config)
+
+        # Room for every final section and the JSON around them
+        writer_model = chat_model(
+            model_id=configurable.writer_model,
+            max_tokens=min(max_tokens_for("final_section", configurable) * len(sections) + 128,
+                           configurable.max_tokens))
+
+        written = self._generate_final_sections(
+            writer_model.with_structured_output(FinalSections), sections, completed_report_sections
+        ).sections
+
+        # Match the sections by name, then give the renamed ones the remaining sections in order
+        by_name = {s.name.strip().lower(): s.content for s in written}
+        names = {section.name.strip().lower() for section in sections}
+        unmatched = iter([s.content for s in written if s.name.strip().lower() not in names])
+        for section in sections:
+            content = by_name.get(section.name.strip().lower()) or next(unmatched, None)
+            if content is None:
+                # The model left the section out: write it on its own
+                logger.warning(f"Final section '{section.name}' missing from the batch, writing it separately")
+                content = FinalSectionsWriter()._generate_final_sections(
+                    writer_model, final_section_writer_instructions, section, completed_report_sections
+                )
+            section.content = content
+
+        return {"completed_sections": sections}
+
+    @exponential_backoff_retry(ClientError, max_retries=10)
+    def _generate_final_sections(
+        self,
+        model,
+        sections: List[Section],
+        completed_report_sections: str,
+    ) -> FinalSections:
+        system_instructions = batch_final_sections_writer_instructions.format(
+            sections="\n\n".join(
+                f"Section title: {section.name}\nSection description: {section.description}"
+                for section in sections
+            ),
+            context=completed_report_sections,
+        )
+
+        return model.invoke(
+            [SystemMessage(content=system_instructions)]
+            + [
+                HumanMessage(
+                    content="Generate the sections of an article based on the provided article content."
+                )
+            ]
+        )
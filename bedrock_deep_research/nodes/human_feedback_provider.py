@@ -4,16 +4,23 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.constants import Send
 from langgraph.types import Command, interrupt
 
+from ..budget import start_budget
+from ..config import Configuration
 from ..model import ArticleState
+from ..scheduler import sort_by_priority
+from .article_outline_editor import ArticleOutlineEditor
 from .article_outline_generator import ArticleOutlineGenerator
 
 
 class HumanFeedbackProvider:
     N = "human_feedback"
 
+    def __init__(self, speculative_researcher=None):
+        self.speculative_researcher = speculative_researcher
+
     def __call__(
         self, state: ArticleState, config: RunnableConfig
-    ) -> Command[Literal[ArticleOutlineGenerator.N, "build_section_with_web_research"]]:
+    ) -> Command[Literal[ArticleOutlineGenerator.N, ArticleOutlineEditor.N, "build_section_with_web_research"]]:
         """Get feedback on the article outline"""
 
         # Get sections
@@ -25,6 +32,10 @@ class HumanFeedbackProvider:
             for section in sections
         )
 
+        # Research the proposed sections while the human reviews the outline
+        if self.speculative_researcher is not None:
+            self.speculative_researcher.start(config, sections)
+
         feedback = interrupt(
             f"Please provide feedback on the following article outline. \n\n{sections_str}\n\n Does the report plan meet your needs? Pass 'true' to approve the report plan or provide feedback to regenerate the report plan:"
         )
@@ -33,13 +44,19 @@ class HumanFeedbackProvider:
         # if isinstance(feedback, bool) and feedback is True:
         if isinstance(feedback, bool):
             # Treat this as approve and kick off section writing
+            budget = start_budget(config)
+            if budget is not None:
+                for s in sections:
+                    if s.research:
+                        budget.section_queued(s.name)
+
             return Command(
                 goto=[
                     Send(
                         "build_section_with_web_research",
-                        {"section": s, "search_iterations": 0},
+                        {"section": s, "search_iterations": 0, "search_queries": s.search_queries},
                     )
-                    for s in sections
+                    for s in sort_by_priority(sections)
                     if s.research
                 ]
             )
@@ -47,8 +64,13 @@ class HumanFeedbackProvider:
         # If the user provides feedback, regenerate the report plan
         elif isinstance(feedback, str):
             # treat this as feedback
+            if self.speculative_researcher is not None:
+                self.speculative_researcher.discard(config)
+
+            # Structural edits are applied to the outline, other feedback regenerates it
+            configurable = Configuration.from_runnable_config(config)
             return Command(
-                goto=ArticleOutlineGenerator.N,
+                goto=ArticleOutlineEditor.N if configurable.outline_edits else ArticleOutlineGenerator.N,
                 update={"feedback_on_report_plan": feedback},
             )
         else:
@@ -3,12 +3,14 @@ import logging
 from typing import List
 
 from botocore.exceptions import ClientError
-from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 
+from ..bedrock import chat_model
 from ..config import Configuration
 from ..model import ArticleInputState, Queries
+from ..output_limits import max_tokens_for
+from ..source_pool import get_source_pool
 from ..utils import exponential_backoff_retry, format_web_search
 from ..web_search import WebSearch
 
@@ -50,11 +52,16 @@ class InitialResearcher:
         user_prompt = "Generate search queries on the provided topic."
 
         query_list = self.generate_search_queries(
-            configurable.planner_model, configurable.max_tokens, system_prompt, user_prompt)
+            configurable.planner_model, max_tokens_for("queries", configurable), system_prompt, user_prompt)
 
         logger.info(f"Generated queries: {query_list}")
 
-        search_results = asyncio.run(self.web_search.search(query_list))
+        search_results = asyncio.run(self.web_search.search(
+            query_list, configurable.search_cache_similarity))
+
+        pool = get_source_pool(config)
+        if pool is not None:
+            pool.add(search_results)
 
         source_str = format_web_search(
             search_results, max_tokens_per_source=1000, include_raw_content=False
@@ -64,7 +71,7 @@ class InitialResearcher:
 
     @exponential_backoff_retry(ClientError, max_retries=10)
     def generate_search_queries(self, model_id: str, max_tokens: int, system_prompt: str, user_prompt: str) -> List[str]:
-        planner_model = ChatBedrock(
+        planner_model = chat_model(
             model_id=model_id, max_tokens=max_tokens)
 
         structured_model = planner_model.with_structured_output(Queries)
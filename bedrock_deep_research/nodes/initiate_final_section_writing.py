@@ -1,11 +1,19 @@
+from langchain_core.runnables import RunnableConfig
 from langgraph.constants import Send
 
+from ..config import Configuration
 from ..model import ArticleState
+from ..scheduler import sort_by_priority
+from .final_sections_writer import FinalSectionsBatchWriter
 
 
-def initiate_final_section_writing(state: ArticleState):
+def initiate_final_section_writing(state: ArticleState, config: RunnableConfig):
     """Write any final sections using the Send API to parallelize the process"""
 
+    # Write all the final sections in one call, sending the completed sections once
+    if Configuration.from_runnable_config(config).batch_final_sections:
+        return FinalSectionsBatchWriter.N
+
     # Kick off section writing in parallel via Send() API for any sections that do not require research
     return [
         Send(
@@ -15,6 +23,6 @@ def initiate_final_section_writing(state: ArticleState):
                 "report_sections_from_research": state["report_sections_from_research"],
             },
         )
-        for s in state["sections"]
+        for s in sort_by_priority(state["sections"])
         if not s.research
     ]
@@ -0,0 +1,19 @@
+from langchain_core.runnables import RunnableConfig
+
+from ..budget import get_budget
+from ..model import SectionState
+from .section_search_query_generator import SectionSearchQueryGenerator
+from .section_web_researcher import SectionWebResearcher
+
+
+def initiate_section_research(state: SectionState, config: RunnableConfig):
+    """Start with the web research when the search queries of the section were proposed with the outline"""
+
+    # The section got a slot of the scheduler, its research time starts now
+    budget = get_budget(config)
+    if budget is not None:
+        budget.section_started(state["section"].name)
+
+    if state.get("search_queries"):
+        return SectionWebResearcher.N
+    return SectionSearchQueryGenerator.N
@@ -0,0 +1,71 @@
+import logging
+
+from botocore.exceptions import ClientError
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+
+from ..bedrock import chat_model
+from ..config import Configuration
+from ..model import SectionState
+from ..output_limits import max_tokens_for
+from ..utils import exponential_backoff_retry
+
+logger = logging.getLogger(__name__)
+
+section_digest_instructions = """You are an expert technical writer condensing one section of an article for the writers of its introduction and conclusion.
+
+<Section title>
+{section_title}
+</Section title>
+
+<Section content>
+{section_content}
+</Section content>
+
+<Task>
+Summarize the section in at most {digest_words} words:
+- Keep its most important insight, the key facts, figures and names, and its example or case study
+- Keep the items compared by its table or listed by its list, if any
+- Leave out the sources
+- Plain text, no preamble
+</Task>"""
+
+
+class SectionDigestWriter:
+    """Summarize a completed section into a short digest, used instead of its content to write the final sections"""
+
+    N = "section_digest"
+
+    def __call__(self, state: SectionState, config: RunnableConfig):
+        section = state["section"]
+
+        configurable = Configuration.from_runnable_config(config)
+
+        writer_model = chat_model(
+            model_id=configurable.writer_model, max_tokens=max_tokens_for("digest", configurable))
+
+        try:
+            section.digest = self._generate_digest(writer_model, section.name, section.content,
+                                                   configurable.section_digest_words)
+        except Exception as e:
+            # The final sections get the full content of the section instead
+            logger.error(f"Error summarizing section '{section.name}': {e}")
+
+        return {"completed_sections": [section]}
+
+    @exponential_backoff_retry(ClientError, max_retries=10)
+    def _generate_digest(self, model: BaseChatModel, section_title: str, section_content: str,
+                         digest_words: int) -> str:
+        system_prompt = section_digest_instructions.format(
+            section_title=section_title,
+            section_content=section_content,
+            digest_words=digest_words,
+        )
+
+        digest = model.invoke(
+            [SystemMessage(content=system_prompt)]
+            + [HumanMessage(content="Summarize the section.")]
+        )
+
+        return digest.content
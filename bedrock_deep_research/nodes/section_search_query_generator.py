@@ -1,12 +1,13 @@
 import logging
 
 from botocore.client import ClientError
-from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 
+from ..bedrock import chat_model
 from ..config import Configuration
 from ..model import Queries, Section, SectionState
+from ..output_limits import max_tokens_for
 from ..utils import exponential_backoff_retry
 
 logger = logging.getLogger(__name__)
@@ -38,12 +39,22 @@ Your queries should be:
 class SectionSearchQueryGenerator:
     N = "generate_section_search_queries"
 
+    def __init__(self, speculative_researcher=None):
+        self.speculative_researcher = speculative_researcher
+
     def __call__(self, state: SectionState, config: RunnableConfig):
         """Generate search queries for a article section"""
 
         # Get state
         section = state["section"]
 
+        # Reuse the queries researched while the outline was reviewed
+        if self.speculative_researcher is not None:
+            queries = self.speculative_researcher.take_queries(config, section)
+            if queries:
+                logger.info(f"Reusing speculative search queries: {queries}")
+                return {"search_queries": queries}
+
         # Get configuration
         configurable = Configuration.from_runnable_config(config)
 
@@ -57,8 +68,8 @@ class SectionSearchQueryGenerator:
 
 @exponential_backoff_retry(ClientError, max_retries=10)
 def generate_section_queries(configurable: Configuration, section: Section) -> Queries:
-    planner_model = ChatBedrock(
-        model_id=configurable.planner_model, max_tokens=configurable.max_tokens
+    planner_model = chat_model(
+        model_id=configurable.planner_model, max_tokens=max_tokens_for("queries", configurable)
     ).with_structured_output(Queries)
 
     # Format system instructions
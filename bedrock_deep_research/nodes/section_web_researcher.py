@@ -3,7 +3,11 @@ import logging
 
 from langchain_core.runnables import RunnableConfig
 
+from ..citations import source_numbers
+from ..config import Configuration
 from ..model import SectionState, Source
+from ..retrieval import format_relevant_chunks
+from ..source_pool import get_source_pool
 from ..utils import format_web_search
 from ..web_search import WebSearch
 
@@ -21,34 +25,72 @@ class SectionWebResearcher:
     def __call__(self, state: SectionState, config: RunnableConfig):
         """Search the web for each query, then return a list of raw sources and a formatted string of sources."""
 
+        configurable = Configuration.from_runnable_config(config)
+
         # Get state
+        section = state["section"]
         search_queries = state["search_queries"]
 
+        sources = []
+
         # Web search
         try:
             logger.debug(f"Search Queries: {search_queries}")
 
-            search_results = asyncio.run(
-                self.web_search.search(search_queries))
-
-            source_str = format_web_search(
-                search_results, max_tokens_per_source=5000, include_raw_content=False
-            )
-
-            sources = []
+            pool = get_source_pool(config)
+            pooled_results, web_queries = [], list(search_queries)
+            if pool is not None:
+                # Serve the queries covered by the sources already fetched during the run, search the others
+                known_urls = {source.url for source in state.get("sources", [])}
+                web_queries = []
+                for query in search_queries:
+                    hits = pool.lookup(query, WebSearch.MAX_RESULTS, exclude=known_urls)
+                    if hits:
+                        pooled_results.extend(hits)
+                    else:
+                        web_queries.append(query)
+                logger.info(f"Source pool covered {len(search_queries) - len(web_queries)} of "
+                            f"{len(search_queries)} queries of section '{section.name}'")
+
+            search_results = []
+            if web_queries:
+                search_results = list(asyncio.run(
+                    self.web_search.search(web_queries, configurable.search_cache_similarity)))
+            if pool is not None:
+                pool.add(search_results)
+            search_results = list({r["url"]: r for r in [*pooled_results, *search_results]}.values())
 
             for search_result in search_results:
                 sources.append(
                     Source(title=search_result["title"],
                            url=search_result["url"])
                 )
+            # Number the sources after the ones of the previous iterations, so that citations stay valid
+            numbers = source_numbers([*state.get("sources", []), *sources])
+
+            if configurable.retrieval_top_k:
+                # Keep only the passages of the pages relevant to the section and the gaps the queries target
+                query = " ".join([section.name, section.description, *search_queries])
+                source_str = format_relevant_chunks(
+                    search_results, query, configurable.retrieval_top_k, configurable.retrieval_chunk_words,
+                    numbers=numbers,
+                )
+            else:
+                source_str = format_web_search(
+                    search_results, max_tokens_per_source=5000, include_raw_content=False, numbers=numbers
+                )
 
         except Exception as e:
             logger.error(f"Error searching web: {e}")
             source_str = ""
 
+        known_urls = {source.url for source in state.get("sources", [])}
+        new_sources = {source.url for source in sources} - known_urls
+
         return {
             "source_str": source_str,
             "sources": sources,
             "search_iterations": state["search_iterations"] + 1,
+            "past_queries": list(search_queries),
+            "new_source_share": len(new_sources) / len(sources) if sources else 0.0,
         }
@@ -1,17 +1,24 @@
 import logging
+import random
 from typing import List, Literal
 
 from botocore.exceptions import ClientError
-from langchain_aws import ChatBedrock
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END
 from langgraph.types import Command
 from pydantic import BaseModel, Field
 
+from ..bedrock import chat_model
+from ..budget import get_budget
 from ..config import Configuration
+from ..convergence import check_query_convergence, check_research_convergence
+from ..grading import get_grader_agreement, pre_grade
 from ..model import Section, SectionState
+from ..output_limits import SECTION_STOP_SEQUENCES, max_tokens_for
 from ..utils import exponential_backoff_retry
+from .section_digest_writer import SectionDigestWriter
 from .section_web_researcher import SectionWebResearcher
 
 logger = logging.getLogger(__name__)
@@ -60,9 +67,8 @@ section_writer_instructions = """You are an expert technical writer crafting one
     - Use `*` or `-` for unordered lists
     - Use `1.` for ordered lists
     - Ensure proper indentation and spacing
-- End with ### Sources that references the below source material formatted as:
-  * List each source with title, date, and URL
-  * Format: `- Title : URL`
+- Cite the source material inline with its reference number, e.g. [2], after the statements it supports
+- Do not write a sources section, it is added from the reference numbers
 {writing_guidelines}
 </Length and style>
 
@@ -70,7 +76,7 @@ section_writer_instructions = """You are an expert technical writer crafting one
 - Careful use of only ONE structural element (table or list) and only if it helps clarify your point
 - One specific example / case study
 - No preamble prior to creating the section content
-- Sources cited at end
+- Sources cited inline with their reference numbers
 </Quality checks>
 """
 
@@ -107,7 +113,9 @@ class SectionWriter:
 
     N = "section_write"
 
-    def __call__(self, state: SectionState, config: RunnableConfig) -> Command[Literal[END, SectionWebResearcher.N]]:
+    def __call__(
+        self, state: SectionState, config: RunnableConfig
+    ) -> Command[Literal[END, SectionWebResearcher.N, SectionDigestWriter.N]]:
         """Write a section of the article"""
 
         # Get state
@@ -120,9 +128,12 @@ class SectionWriter:
         writing_guidelines = configurable.writing_guidelines
 
         try:
-            writer_model = ChatBedrock(
-                model_id=configurable.writer_model, max_tokens=configurable.max_tokens)
+            writer_model = chat_model(
+                model_id=configurable.writer_model, max_tokens=max_tokens_for("section", configurable))
+            grader_model = chat_model(
+                model_id=configurable.writer_model, max_tokens=max_tokens_for("grade", configurable))
 
+            previous_content = section.content
             section.content = self._generate_section_content(
                 writer_model,
                 section_writer_instructions,
@@ -132,34 +143,99 @@ class SectionWriter:
             )
             section.sources = sources
 
-            feedback = self._grade_section_content(
-                writer_model, section_grader_instructions, section
-            )
+            # Skip the grading when the budget cannot afford another iteration anyway
+            budget = get_budget(config)
+            decisions = []
+            if budget is not None:
+                decision = budget.decide(
+                    section.name, state["search_iterations"], configurable.max_search_depth)
+                decisions.append(decision)
+
+            # Stop researching when the last iteration brought little new material
+            if state["search_iterations"] < configurable.max_search_depth and (
+                    not decisions or decisions[-1]["continue_research"]):
+                convergence = check_research_convergence(
+                    configurable, section.name, state["search_iterations"],
+                    state.get("new_source_share", 1.0), previous_content, section.content)
+                if convergence is not None:
+                    decisions.append(convergence)
+
+            if decisions and not decisions[-1]["continue_research"]:
+                feedback = None
+            elif state["search_iterations"] >= configurable.max_search_depth:
+                # The section is published whatever its grade
+                feedback = None
+            else:
+                feedback = self._grade(grader_model, section, configurable, config)
+
+            # Or when the follow-up queries repeat the queries already run
+            if feedback is not None and feedback.grade == "fail":
+                convergence = check_query_convergence(
+                    configurable, section.name, state["search_iterations"],
+                    feedback.follow_up_queries, state.get("past_queries", []))
+                if convergence is not None:
+                    decisions.append(convergence)
+                    if not convergence["continue_research"]:
+                        feedback = None
 
         except Exception as e:
             logger.error(f"Error writing section: {e}")
             raise e
 
         if (
-            feedback.grade == "pass"
+            feedback is None
+            or feedback.grade == "pass"
             or state["search_iterations"] >= configurable.max_search_depth
         ):
+            if budget is not None:
+                budget.section_finished(section.name)
+
+            # Summarize the section for the final sections, which then publishes it
+            if configurable.section_digest_words:
+                return Command(
+                    update={"section": section, "research_decisions": decisions},
+                    goto=SectionDigestWriter.N,
+                )
+
             # Publish the section to completed sections
-            return Command(update={"completed_sections": [section]}, goto=END)
+            return Command(
+                update={"completed_sections": [section],
+                        "research_decisions": decisions},
+                goto=END,
+            )
         else:
             # Update the existing section with new content and update search queries
             return Command(
                 update={
                     "search_queries": feedback.follow_up_queries,
                     "section": section,
+                    "research_decisions": decisions,
                 },
                 goto=SectionWebResearcher.N,
             )
 
+    def _grade(self, model: BaseChatModel, section: Section, configurable: Configuration,
+               config: RunnableConfig) -> Feedback:
+        """Grades the section locally when the pre-grader is confident, with the LLM grader otherwise."""
+        pre = None
+        if configurable.pre_grader:
+            pre = pre_grade(section, configurable.writing_guidelines,
+                            configurable.pre_grader_pass_threshold, configurable.pre_grader_fail_threshold)
+            # A sample of the confident pre-grades is checked by the LLM grader to measure their agreement
+            if pre.grade is not None and random.random() >= configurable.pre_grader_audit_rate:
+                logger.info(f"Pre-graded section '{section.name}': {pre.grade} (score {pre.score}, {pre.checks})")
+                return Feedback(grade=pre.grade, follow_up_queries=pre.follow_up_queries)
+
+        feedback = self._grade_section_content(model, section_grader_instructions, section)
+        agreement = get_grader_agreement(config) if pre is not None else None
+        if agreement is not None:
+            agreement.record(pre, feedback.grade)
+        return feedback
+
     @exponential_backoff_retry(ClientError, max_retries=10)
     def _generate_section_content(
         self,
-        model: ChatBedrock,
+        model: BaseChatModel,
         system_prompt: str,
         section: Section,
         search_content: str,
@@ -180,13 +256,13 @@ class SectionWriter:
             ),
         ]
 
-        section_content = model.invoke(messages)
+        section_content = model.invoke(messages, stop=SECTION_STOP_SEQUENCES)
 
         return section_content.content
 
     @exponential_backoff_retry(ClientError, max_retries=10)
     def _grade_section_content(
-        self, model: ChatBedrock, system_prompt: str, section: Section
+        self, model: BaseChatModel, system_prompt: str, section: Section
     ) -> Feedback:
 
         section_grader_instructions_formatted = system_prompt.format(
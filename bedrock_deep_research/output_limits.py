@@ -0,0 +1,59 @@
+from typing import List
+
+from .config import Configuration
+from .grading import word_limit
+
+# Generous estimate leaving room for the Markdown syntax, citations and tables
+TOKENS_PER_WORD = 2
+
+# Longest final section asked by the final section prompt, in words
+FINAL_SECTION_WORDS = 150
+
+# Most sections expected in an outline, and the tokens of the name and description of each
+OUTLINE_SECTIONS = 12
+OUTLINE_SECTION_TOKENS = 96
+
+# Nova Canvas reads up to 1024 characters of prompt, about 256 tokens
+IMAGE_PROMPT_TOKENS = 384
+
+CALLS = ("section", "final_section", "digest", "queries", "grade", "outline", "outline_edits", "image_prompt")
+
+# Where the section writers stop: their sources are rendered from the state
+SECTION_STOP_SEQUENCES: List[str] = ["\n### Sources"]
+
+
+def max_tokens_for(call: str, configurable: Configuration) -> int:
+    """
+    Output tokens allowed to a type of model call, one of `CALLS`: the length the writing guidelines ask of
+    section content, the expected size of structured outputs and image prompts, capped by `max_tokens`.
+    Sections without a word limit in the guidelines, and any call when `output_token_limits` is off,
+    get `max_tokens`.
+
+    Raises:
+        ValueError: For an unknown type of call, which would otherwise silently get `max_tokens`
+    """
+    if call not in CALLS:
+        raise ValueError(f"Unknown type of model call {call!r}, expected one of {', '.join(CALLS)}")
+    if not configurable.output_token_limits:
+        return configurable.max_tokens
+
+    if call == "section":
+        limit = word_limit(configurable.writing_guidelines)
+        if limit is None:
+            return configurable.max_tokens
+        budget = limit[1] * TOKENS_PER_WORD + 128
+    elif call == "final_section":
+        budget = FINAL_SECTION_WORDS * TOKENS_PER_WORD + 256
+    elif call == "digest":
+        budget = configurable.section_digest_words * TOKENS_PER_WORD + 64
+    elif call in ("queries", "grade"):
+        budget = 64 * configurable.number_of_queries + 256
+    elif call == "outline":
+        queries = 64 * configurable.number_of_queries if configurable.outline_search_queries else 0
+        budget = OUTLINE_SECTIONS * (OUTLINE_SECTION_TOKENS + queries) + 128
+    elif call == "outline_edits":
+        budget = 512
+    else:
+        budget = IMAGE_PROMPT_TOKENS
+
+    return min(budget, configurable.max_tokens)
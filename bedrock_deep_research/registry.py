@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_RUNS = 256  # Runs whose objects are kept per registry, the least recently used are dropped first
+RUN_TTL = 6 * 3600  # Seconds after which the objects of a run not used anymore are dropped
+
+_registries: "weakref.WeakSet[RunRegistry]" = weakref.WeakSet()
+
+
+def thread_id_of(config: Optional[dict]) -> Optional[str]:
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+class RunRegistry(Generic[T]):
+    """
+    Objects of the article runs in progress, such as their budget or source pool, keyed by the thread_id of
+    their config.
+
+    A run releases its objects once its article is compiled, but many runs never get there: their outline is
+    never approved, a step fails or the user starts over. Their objects are dropped once unused for `ttl`
+    seconds, and the least recently used are dropped when more than `max_runs` runs are registered, so that
+    the registry stays bounded in a long-lived process. `release_run` releases a run from every registry.
+
+    Attributes:
+        name (str): Name of the registry in the logs
+        max_runs (int): Runs kept at most
+        ttl (float): Seconds after their last use after which the objects of a run are dropped
+        on_release: Called with the object of a run when it is released or dropped
+    """
+
+    def __init__(self, name: str, max_runs: int = MAX_RUNS, ttl: float = RUN_TTL,
+                 on_release: Optional[Callable[[T], Any]] = None):
+        self.name = name
+        self.max_runs = max_runs
+        self.ttl = ttl
+        self.on_release = on_release
+        self._lock = threading.Lock()
+        self._runs: "OrderedDict[str, Tuple[float, T]]" = OrderedDict()
+        _registries.add(self)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._runs)
+
+    def get(self, thread_id: Optional[str]) -> Optional[T]:
+        with self._lock:
+            if thread_id not in self._runs:
+                return None
+            value = self._touch(thread_id, self._runs[thread_id][1])
+        self._drop(self._expired())
+        return value
+
+    def setdefault(self, thread_id: str, factory: Callable[[], T]) -> T:
+        """Returns the object of the run, registering the one made by `factory` if it has none."""
+        with self._lock:
+            value = self._runs[thread_id][1] if thread_id in self._runs else factory()
+            self._touch(thread_id, value)
+        self._drop(self._expired())
+        return value
+
+    def set(self, thread_id: str, value: T) -> None:
+        with self._lock:
+            previous = self._runs.get(thread_id)
+            self._touch(thread_id, value)
+        if previous is not None and previous[1] is not value:
+            self._drop([(thread_id, previous[1])])
+        self._drop(self._expired())
+
+    def pop(self, thread_id: Optional[str]) -> Optional[T]:
+        """Removes the object of the run and returns it, without calling `on_release`."""
+        with self._lock:
+            _, value = self._runs.pop(thread_id, (None, None))
+        return value
+
+    def release(self, thread_id: Optional[str]) -> None:
+        value = self.pop(thread_id)
+        if value is not None:
+            self._drop([(thread_id, value)])
+
+    def _touch(self, thread_id: str, value: T) -> T:
+        self._runs[thread_id] = (time.monotonic(), value)
+        self._runs.move_to_end(thread_id)
+        return value
+
+    def _expired(self):
+        """Removes the runs unused for longer than the ttl and those beyond max_runs, and returns them."""
+        expired = []
+        now = time.monotonic()
+        with self._lock:
+            while self._runs:
+                thread_id, (used_at, value) = next(iter(self._runs.items()))
+                if used_at > now - self.ttl and len(self._runs) <= self.max_runs:
+                    break
+                del self._runs[thread_id]
+                expired.append((thread_id, value))
+        for thread_id, _ in expired:
+            logger.info(f"Dropped the {self.name} of run {thread_id}, which was not released")
+        return expired
+
+    def _drop(self, runs) -> None:
+        if self.on_release is None:
+            return
+        for thread_id, value in runs:
+            try:
+                self.on_release(value)
+            except Exception as e:
+                logger.warning(f"Error releasing the {self.name} of run {thread_id}: {e}")
+
+
+def release_run(thread_id: Optional[str]) -> None:
+    """Releases the objects of a run from every registry, once it is compiled, failed or forgotten."""
+    if thread_id is None:
+        return
+    for registry in list(_registries):
+        registry.release(thread_id)
@@ -0,0 +1,174 @@
+import heapq
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was were what when "
+    "where which who why will with you your".split()
+)
+
+# Words reversing the meaning of a query, which its near-duplicates must share
+NEGATIONS = frozenset("no not never without nor none cannot except excluding non vs versus".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of the text, without stopwords."""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+
+def exact_terms(text: str) -> Set[str]:
+    """
+    The numbers, versions and years, and the negations of the text: terms that change the meaning of a query
+    while barely changing its character n-grams, e.g. "2023" and "2024" or "with" and "without".
+    """
+    words = re.findall(r"[a-z0-9]+(?:'t)?", text.lower())
+    return {word for word in words
+            if word in NEGATIONS or word.endswith("n't") or any(char.isdigit() for char in word)}
+
+
+def chunk_text(text: str, chunk_words: int = 100, overlap: int = 20) -> List[str]:
+    """Splits the text into windows of `chunk_words` words, overlapping by `overlap` words."""
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_words - overlap, 1)
+    return [" ".join(words[i:i + chunk_words]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index over a list of documents.
+
+    Attributes:
+        documents (List[str]): Indexed documents, returned by position
+        k1 (float): Saturation of the term frequencies
+        b (float): Normalization of the document lengths
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self._term_freqs = [Counter(tokenize(document)) for document in documents]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = sum(self._lengths) / len(documents) if documents else 0
+        self._doc_freqs = Counter(term for tf in self._term_freqs for term in tf)
+
+    def _idf(self, term: str) -> float:
+        doc_freq = self._doc_freqs.get(term, 0)
+        return math.log(1 + (len(self.documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def scores(self, query: str) -> List[float]:
+        terms = set(tokenize(query))
+        idfs = {term: self._idf(term) for term in terms if term in self._doc_freqs}
+        scores = []
+        for tf, length in zip(self._term_freqs, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            scores.append(sum(idf * tf[term] * (self.k1 + 1) / (tf[term] + norm)
+                              for term, idf in idfs.items() if term in tf))
+        return scores
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Positions and scores of the `k` documents most relevant to the query, best first."""
+        ranked = heapq.nlargest(k, enumerate(self.scores(query)), key=lambda item: item[1])
+        return [(position, score) for position, score in ranked if score > 0]
+
+
+def char_ngram_vector(text: str, n: int = 3, dims: int = 2 ** 18) -> Dict[int, float]:
+    """
+    Unit-length sparse vector of the hashed character n-grams of the words of the text, with sublinear term
+    frequencies, so that reordered words and variants like plurals stay close.
+    """
+    counts = Counter()
+    for token in tokenize(text):
+        padded = f" {token} "
+        for i in range(max(len(padded) - n + 1, 1)):
+            counts[zlib.crc32(padded[i:i + n].encode()) % dims] += 1
+
+    weights = {feature: 1 + math.log(count) for feature, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {feature: weight / norm for feature, weight in weights.items()} if norm else {}
+
+
+class NearestNeighborIndex:
+    """
+    Cosine nearest neighbour search over sparse unit vectors, scoring only the vectors sharing a feature with
+    the query through an inverted index. It is not thread-safe.
+    """
+
+    def __init__(self):
+        self._vectors: Dict[Hashable, Dict[int, float]] = {}
+        self._postings: Dict[int, Set[Hashable]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def add(self, key: Hashable, vector: Dict[int, float]) -> None:
+        self.remove(key)
+        self._vectors[key] = vector
+        for feature in vector:
+            self._postings[feature].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        for feature in self._vectors.pop(key, {}):
+            self._postings[feature].discard(key)
+            if not self._postings[feature]:
+                del self._postings[feature]
+
+    def nearest(self, vector: Dict[int, float]) -> Optional[Tuple[Hashable, float]]:
+        """The key of the indexed vector most similar to the given one and their cosine similarity."""
+        scores: Dict[Hashable, float] = defaultdict(float)
+        for feature, weight in vector.items():
+            for key in self._postings.get(feature, ()):
+                scores[key] += weight * self._vectors[key][feature]
+        return max(scores.items(), key=lambda item: item[1]) if scores else None
+
+
+def top_chunks(search_results: List[Dict[str, Any]], query: str, top_k: int,
+               chunk_words: int = 100) -> Dict[str, List[str]]:
+    """
+    Chunks the raw content of the search results and returns the `top_k` chunks most relevant to the query,
+    grouped by the url of their source, best sources first.
+    """
+    chunks, urls = [], []
+    for result in search_results:
+        for chunk in chunk_text(result.get("raw_content") or "", chunk_words, overlap=chunk_words // 5):
+            chunks.append(chunk)
+            urls.append(result["url"])
+
+    relevant: Dict[str, List[str]] = {}
+    for position, _ in BM25Index(chunks).search(query, top_k):
+        relevant.setdefault(urls[position], []).append(chunks[position])
+    return relevant
+
+
+def format_relevant_chunks(search_results: List[Dict[str, Any]], query: str, top_k: int = 6,
+                           chunk_words: int = 100, numbers: Optional[Dict[str, int]] = None) -> str:
+    """
+    Formats the search results like `format_web_search`, with the passages of the raw content most relevant
+    to the query in place of the snippet of their source. Sources without relevant passages keep their snippet.
+    """
+    relevant = top_chunks(search_results, query, top_k, chunk_words)
+    # Sources with relevant passages first, in the order of their best passage
+    rank = {url: i for i, url in enumerate(relevant)}
+    ordered = sorted(search_results, key=lambda result: rank.get(result["url"], len(rank)))
+
+    formatted_text = "Sources:\n\n"
+    for source in ordered:
+        if numbers:
+            formatted_text += f"Source [{numbers[source['url']]}] {source['title']}:\n===\n"
+        else:
+            formatted_text += f"Source {source['title']}:\n===\n"
+        formatted_text += f"URL: {source['url']}\n===\n"
+        passages = relevant.get(source["url"])
+        if passages:
+            formatted_text += "Relevant passages from the full source:\n"
+            formatted_text += "".join(f"[...] {passage} [...]\n" for passage in passages)
+        else:
+            formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
+        formatted_text += "\n"
+
+    return formatted_text.strip()
@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+THROTTLING_ERRORS = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+# Errors of a region or model deployment rather than of the request, retried in another endpoint
+FAILOVER_ERRORS = THROTTLING_ERRORS | {
+    "ServiceUnavailableException", "InternalServerException", "ModelNotReadyException", "ModelTimeoutException"}
+TRANSPORT_ERRORS = (ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError)
+
+ROUTED_OPERATIONS = {"invoke_model", "invoke_model_with_response_stream", "converse", "converse_stream", "count_tokens"}
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """
+    A region and the model id or inference profile serving a logical model there.
+
+    Attributes:
+        region: AWS region of the bedrock-runtime endpoint
+        model_id: Model id, inference profile id or ARN sent to the region
+        requests_per_minute: On-demand quota of the model in the region (0 if unknown)
+        weight: Static preference of the endpoint, e.g. 2 to send it twice the traffic of an equal one
+    """
+
+    region: str
+    model_id: str
+    requests_per_minute: float = 0
+    weight: float = 1.0
+
+
+@dataclass
+class EndpointStats:
+    """What the router observed of an endpoint, decayed so that it follows the endpoint recovering."""
+
+    latency: Optional[float] = None  # Moving average of the seconds to a response, over the successful calls
+    throttle_rate: float = 0.0  # Moving average of the share of throttled calls
+    failures: int = 0  # Consecutive failed calls
+    cooldown_until: float = 0.0  # Monotonic time until which the endpoint is only a last resort
+    calls: Deque[float] = field(default_factory=deque)  # Start time of the calls of the last minute
+    outcomes: Counter = field(default_factory=Counter)
+
+
+class BedrockRouter:
+    """
+    Spreads the calls to a logical model, the model id the nodes ask for, across the regions and inference
+    profiles serving it.
+
+    Each call goes to an endpoint drawn with a weight growing with its remaining quota and shrinking with its
+    latency and throttle rate, so that the load follows the endpoints with headroom. A throttled or failing
+    endpoint is cooled down, exponentially longer with each consecutive failure, and the call fails over to
+    the next best endpoint; the endpoints cooling down or out of quota are only tried once all others failed.
+
+    Attributes:
+        routes: Endpoints of each logical model id; model ids without a route are not routed
+        alpha: Weight of the last call in the moving averages
+        base_cooldown: Seconds an endpoint is avoided after a first failure
+        max_cooldown: Longest cooldown after consecutive failures
+    """
+
+    def __init__(self, routes: Dict[str, List[Endpoint]], alpha: float = 0.2, base_cooldown: float = 1.0,
+                 max_cooldown: float = 60.0, seed: Optional[int] = None):
+        self.routes = {model_id: list(endpoints) for model_id, endpoints in routes.items() if endpoints}
+        self.alpha = alpha
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats: Dict[Endpoint, EndpointStats] = {
+            endpoint: EndpointStats() for endpoints in self.routes.values() for endpoint in endpoints}
+
+    @classmethod
+    def from_config(cls, routes: Dict[str, List[Dict[str, Any]]], **kwargs) -> "BedrockRouter":
+        """
+        Creates a router from routes given as plain values, e.g. read from JSON:
+        `{"<model id>": [{"region": "us-east-1"}, {"region": "eu-central-1", "model_id": "eu.<...>"}]}`.
+        The model id of an endpoint defaults to the logical model id.
+        """
+        return cls({
+            model_id: [Endpoint(**{"model_id": model_id, **endpoint}) for endpoint in endpoints]
+            for model_id, endpoints in routes.items()
+        }, **kwargs)
+
+    def endpoints(self, model_id: Optional[str]) -> List[Endpoint]:
+        return self.routes.get(model_id, [])
+
+    def _remaining_quota(self, endpoint: Endpoint, stats: EndpointStats, now: float) -> float:
+        while stats.calls and stats.calls[0] < now - 60:
+            stats.calls.popleft()
+        if not endpoint.requests_per_minute:
+            return 1.0
+        return max(0.0, 1 - len(stats.calls) / endpoint.requests_per_minute)
+
+    def plan(self, model_id: str) -> List[Endpoint]:
+        """Orders the endpoints of the model to try for a call: a weighted draw first, then the failovers."""
+        now = time.monotonic()
+        with self._lock:
+            endpoints = self.endpoints(model_id)
+            observed = [self._stats[e].latency for e in endpoints if self._stats[e].latency is not None]
+            # Endpoints never called get the best latency observed, so that they are tried
+            default_latency = min(observed, default=1.0)
+
+            weights, last_resort = {}, []
+            for endpoint in endpoints:
+                stats = self._stats[endpoint]
+                remaining = self._remaining_quota(endpoint, stats, now)
+                if stats.cooldown_until > now or remaining == 0:
+                    last_resort.append(endpoint)
+                    continue
+                weights[endpoint] = (endpoint.weight * remaining * max(0.05, 1 - stats.throttle_rate)
+                                     / max(stats.latency or default_latency, 1e-3))
+
+            ordered = []
+            if weights:
+                first = self._rng.choices(list(weights), weights=list(weights.values()))[0]
+                ordered = [first] + sorted((e for e in weights if e is not first), key=weights.get, reverse=True)
+            last_resort.sort(key=lambda e: self._stats[e].cooldown_until)
+            return ordered + last_resort
+
+    def started(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            self._stats[endpoint].calls.append(time.monotonic())
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats.latency = latency if stats.latency is None else (1 - self.alpha) * stats.latency + self.alpha * latency
+            stats.throttle_rate *= 1 - self.alpha
+            stats.failures = 0
+            stats.outcomes["ok"] += 1
+
+    def record_failure(self, endpoint: Endpoint, throttled: bool) -> None:
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats.throttle_rate = (1 - self.alpha) * stats.throttle_rate + (self.alpha if throttled else 0.0)
+            stats.failures += 1
+            stats.cooldown_until = time.monotonic() + min(
+                self.max_cooldown, self.base_cooldown * 2 ** (stats.failures - 1))
+            stats.outcomes["throttled" if throttled else "failed"] += 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Outcomes, latency and throttle rate of every endpoint, by logical model id and region."""
+        with self._lock:
+            return {
+                model_id: {
+                    f"{endpoint.region}/{endpoint.model_id}": {
+                        "outcomes": dict(self._stats[endpoint].outcomes),
+                        "latency": round(self._stats[endpoint].latency or 0, 3),
+                        "throttle_rate": round(self._stats[endpoint].throttle_rate, 3),
+                    }
+                    for endpoint in endpoints
+                }
+                for model_id, endpoints in self.routes.items()
+            }
+
+
+def _failover_error(error: Exception) -> Optional[bool]:
+    """Whether the error is a throttling, a failure of the endpoint (False) or of the request itself (None)."""
+    if isinstance(error, TRANSPORT_ERRORS):
+        return False
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        if code in THROTTLING_ERRORS:
+            return True
+        if code in FAILOVER_ERRORS or status >= 500:
+            return False
+    return None
+
+
+class RoutedBedrockRuntime:
+    """
+    Stand-in for a bedrock-runtime client sending the calls of the routed model ids to the endpoints planned
+    by the router, with the model id of the endpoint, and failing over on throttling and endpoint errors.
+    Calls to other model ids and other attributes go to the client of the default region.
+
+    Attributes:
+        router: Router planning the endpoints of each call
+        client_for: Returns the bedrock-runtime client of a region, or of the default region for None
+    """
+
+    def __init__(self, router: BedrockRouter, client_for: Callable[[Optional[str]], Any]):
+        self.router = router
+        self.client_for = client_for
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ROUTED_OPERATIONS:
+            return partial(self._call, name)
+        return getattr(self.client_for(None), name)
+
+    def _call(self, operation: str, **kwargs) -> Any:
+        model_id = kwargs.get("modelId")
+        endpoints = self.router.plan(model_id) if self.router.endpoints(model_id) else []
+        if not endpoints:
+            return getattr(self.client_for(None), operation)(**kwargs)
+
+        error = None
+        for endpoint in endpoints:
+            client = self.client_for(endpoint.region)
+            self.router.started(endpoint)
+            started = time.perf_counter()
+            try:
+                with span("bedrock:endpoint", operation=operation, region=endpoint.region, model_id=endpoint.model_id):
+                    response = getattr(client, operation)(**{**kwargs, "modelId": endpoint.model_id})
+            except Exception as e:
+                throttled = _failover_error(e)
+                if throttled is None:
+                    raise
+                self.router.record_failure(endpoint, throttled)
+                logger.info(f"Bedrock {operation} of {model_id} failed in {endpoint.region} ({e}), failing over")
+                error = e
+                continue
+            self.router.record_success(endpoint, time.perf_counter() - started)
+            return response
+
+        logger.warning(f"Bedrock {operation} of {model_id} failed in every region: {error}")
+        raise error
+
+
+def router_from_env() -> Optional[BedrockRouter]:
+    """
+    Creates the router of the process from the BEDROCK_ROUTES environment variable, holding the routes as JSON
+    or the path of a JSON file holding them. Returns None, routing nothing, when it is not set.
+    """
+    value = os.environ.get("BEDROCK_ROUTES", "").strip()
+    if not value:
+        return None
+    if not value.startswith("{"):
+        with open(value, encoding="utf-8") as f:
+            value = f.read()
+    router = BedrockRouter.from_config(json.loads(value))
+    logger.info(f"Routing Bedrock calls: {router.routes}")
+    return router
@@ -0,0 +1,155 @@
+import itertools
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from langchain_core.runnables import RunnableConfig
+
+from .config import Configuration
+from .model import Section
+from .tracing import span, wrap_node
+
+logger = logging.getLogger(__name__)
+
+# Sections running at the same time across all the articles of the process, unless set otherwise
+DEFAULT_MAX_CONCURRENT_SECTIONS = 16
+
+
+def section_priority(section: Section) -> int:
+    """Expected length of a section, estimated from its description. Longer sections are scheduled first."""
+    return len(section.description.split())
+
+
+def sort_by_priority(sections: List[Section]) -> List[Section]:
+    """Longest-expected sections first, so the slowest branch starts early and the makespan shrinks."""
+    return sorted(sections, key=section_priority, reverse=True)
+
+
+@dataclass(eq=False)
+class _Request:
+    article_id: str
+    priority: int
+    seq: int
+    article_limit: int
+
+
+class FairScheduler:
+    """
+    Caps the number of section subgraphs running at the same time.
+
+    Each article is limited to its own `max_concurrency`, and when several articles share the process the
+    `max_concurrency` of the scheduler is shared fairly: a free slot goes to the article with the fewest
+    running sections, then to its highest priority section, then first come first served.
+
+    Attributes:
+        max_concurrency (int): Maximum number of sections running in the process, 0 for no limit
+    """
+
+    def __init__(self, max_concurrency: int = 0):
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._running: Dict[str, int] = {}
+        self._waiting: List[_Request] = []
+        self._seq = itertools.count()
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def set_max_concurrency(self, max_concurrency: int) -> None:
+        """Changes the limit of the process, e.g. from the settings of a server, waking the sections it admits."""
+        with self._cond:
+            self.max_concurrency = max_concurrency
+            self._cond.notify_all()
+
+    def acquire(self, article_id: str, priority: int = 0, article_limit: int = 0) -> None:
+        """Blocks until a section of the article can run."""
+        request = _Request(article_id, priority, next(self._seq), article_limit)
+
+        with self._cond:
+            self._waiting.append(request)
+            while not self._can_run(request):
+                self._cond.wait()
+            self._waiting.remove(request)
+            self._running[article_id] = self._running.get(article_id, 0) + 1
+            # Let the next waiter check whether a slot is still free
+            self._cond.notify_all()
+
+    def release(self, article_id: str) -> None:
+        with self._cond:
+            self._running[article_id] -= 1
+            if not self._running[article_id]:
+                del self._running[article_id]
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, article_id: str, priority: int = 0, article_limit: int = 0):
+        """Holds a slot for the duration of the block."""
+        self.acquire(article_id, priority, article_limit)
+        try:
+            yield
+        finally:
+            self.release(article_id)
+
+    def _eligible(self, request: _Request) -> bool:
+        return (
+            not request.article_limit
+            or self._running.get(request.article_id, 0) < request.article_limit
+        )
+
+    def _can_run(self, request: _Request) -> bool:
+        if not self._eligible(request):
+            return False
+
+        if self.max_concurrency:
+            if self.running >= self.max_concurrency:
+                return False
+            candidates = [r for r in self._waiting if self._eligible(r)]
+        else:
+            # Without a process limit, articles do not compete with each other
+            candidates = [
+                r
+                for r in self._waiting
+                if r.article_id == request.article_id and self._eligible(r)
+            ]
+
+        best = min(
+            candidates,
+            key=lambda r: (self._running.get(r.article_id, 0), -r.priority, r.seq),
+        )
+        return best is request
+
+
+section_scheduler = FairScheduler(
+    int(os.environ.get("MAX_CONCURRENT_SECTIONS", DEFAULT_MAX_CONCURRENT_SECTIONS)))
+
+
+def scheduled(node: Callable, scheduler: FairScheduler = section_scheduler) -> Callable:
+    """Wraps a node receiving a section through the Send API so that it waits for a slot of the scheduler."""
+
+    def run(state: dict, config: RunnableConfig):
+        configurable = Configuration.from_runnable_config(config)
+        article_id = config.get("configurable", {}).get("thread_id", "")
+        section = state["section"]
+
+        with span("scheduler:wait", section=section.name):
+            scheduler.acquire(
+                article_id,
+                priority=section_priority(section),
+                article_limit=int(configurable.max_concurrency),
+            )
+        try:
+            logger.debug(
+                f"Running section '{section.name}' ({scheduler.running} running, {scheduler.waiting} waiting)")
+            return node(state, config)
+        finally:
+            scheduler.release(article_id)
+
+    return wrap_node(run, node)
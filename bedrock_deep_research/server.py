@@ -0,0 +1,316 @@
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from .config import Configuration
+from .graph import BedrockDeepResearch
+from .images import existing_derivative
+from .jobs import Job, JobBusy, JobManager, QueueFull
+from .scheduler import section_scheduler
+from .web_search import WebSearch
+
+logger = logging.getLogger(__name__)
+
+# Settings of the runs chosen by the server rather than its clients
+SERVER_SETTINGS = {"thread_id", "output_dir", "trace_dir"}
+
+# Seconds between two comments keeping an idle event stream open
+KEEPALIVE_INTERVAL = 15
+
+RUN_PATH = re.compile(r"^/runs/(?P<thread_id>[\w-]+)(?P<action>/feedback|/events)?$")
+
+
+def _is_instance(value: Any, field_type: type) -> bool:
+    """Whether a setting has the type of its field. Integers are accepted for floats, but not booleans for either."""
+    if field_type is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if field_type is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return not isinstance(field_type, type) or isinstance(value, field_type)
+
+
+class RunStore:
+    """The config of every run, saved next to the checkpoints so that runs survive a restart of the server."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs (thread_id TEXT PRIMARY KEY, config TEXT, created_at REAL)"
+            )
+
+    def save(self, config: dict) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?)",
+                (config["configurable"]["thread_id"], json.dumps(config), time.time()),
+            )
+
+    def load(self, thread_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT config FROM runs WHERE thread_id = ?", (thread_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+class ResearchService:
+    """
+    Creates, resumes and follows research runs on behalf of the HTTP handler.
+
+    Runs are executed by a JobManager, and their checkpoints and configs are saved to a SQLite database,
+    so that their ids stay valid across restarts of the server.
+    """
+
+    def __init__(self, db_path: str, tavily_api_key: Optional[str], output_dir: str = "output",
+                 max_workers: int = 4, max_queued: int = 16, web_search: Optional[WebSearch] = None):
+        self.runs = RunStore(sqlite3.connect(db_path, check_same_thread=False))
+        self.output_dir = output_dir
+        self.deep_research = BedrockDeepResearch(
+            tavily_api_key=tavily_api_key,
+            web_search=web_search,
+            checkpointer=SqliteSaver(sqlite3.connect(db_path, check_same_thread=False)),
+        )
+        self.jobs = JobManager(self.deep_research, max_workers=max_workers, max_queued=max_queued)
+
+    def create(self, topic: str, configurable: Dict[str, Any]) -> Job:
+        if not isinstance(configurable, dict):
+            raise ValueError("'configurable' must be a JSON object")
+        fields = {f.name: f.type for f in dataclasses.fields(Configuration)}
+        unknown = set(configurable) - set(fields)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        forbidden = set(configurable) & SERVER_SETTINGS
+        if forbidden:
+            raise ValueError(f"Settings chosen by the server: {', '.join(sorted(forbidden))}")
+
+        config = {
+            "configurable": {
+                **configurable,
+                "thread_id": str(uuid.uuid4()),
+                "output_dir": self.output_dir,
+            }
+        }
+        # Invalid values are rejected now rather than failing the run in a worker
+        try:
+            settings = Configuration.from_runnable_config(config)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid settings: {e}")
+        for name in configurable:
+            if not _is_instance(getattr(settings, name), fields[name]):
+                raise ValueError(f"Invalid value of setting {name}: {configurable[name]!r}")
+
+        job = self.jobs.start(topic, config)
+        self.runs.save(config)
+        return job
+
+    def get(self, thread_id: str) -> Optional[Job]:
+        job = self.jobs.get(thread_id)
+        if job is None:
+            config = self.runs.load(thread_id)
+            if config is not None:
+                job = self.jobs.restore(config)
+        return job
+
+    def describe(self, job: Job) -> Dict[str, Any]:
+        """The status of the run with the outline or the article produced so far."""
+        values = self.deep_research.get_state(job.config).values
+        return {
+            **job.to_dict(),
+            "topic": values.get("topic"),
+            "title": values.get("title"),
+            "sections": [
+                {"name": s.name, "description": s.description, "research": s.research}
+                for s in values.get("sections", [])
+            ],
+            "final_report": values.get("final_report"),
+            "head_image_path": str(values["head_image_path"]) if values.get("head_image_path") else None,
+            # None until the thumbnail is written in the background
+            "head_image_thumbnail": existing_derivative(values.get("head_image_path"), "thumbnail"),
+        }
+
+
+class ResearchRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API over the research runs:
+
+        POST /runs                      {"topic": ..., "configurable": {...}}  creates a run and its outline
+        POST /runs/{id}/feedback        {"feedback": true | "changes"}         accepts or revises the outline
+        GET  /runs/{id}                                                        status, outline and article
+        GET  /runs/{id}/events?after=n                                         progress as Server-Sent Events
+
+    Steps are accepted with 202 and run in the background. When the workers and their queue are full, new
+    steps are rejected with 429 and a Retry-After header.
+    """
+
+    server_version = "BedrockDeepResearch/0.1"
+    protocol_version = "HTTP/1.1"
+    service: ResearchService = None
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: HTTPStatus, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("The body must be a JSON object")
+        return body
+
+    def _route(self):
+        match = RUN_PATH.match(urlparse(self.path).path)
+        return (match["thread_id"], match["action"]) if match else (None, None)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid JSON body: {e}")
+
+        try:
+            if path == "/runs":
+                topic = body.get("topic")
+                if not isinstance(topic, str) or not topic.strip():
+                    return self._send_error(HTTPStatus.BAD_REQUEST, "'topic' is required")
+                job = self.service.create(topic, body.get("configurable") or {})
+                return self._send_json(HTTPStatus.ACCEPTED, job.to_dict(),
+                                       {"Location": f"/runs/{job.thread_id}"})
+
+            thread_id, action = self._route()
+            if action != "/feedback":
+                return self._send_error(HTTPStatus.NOT_FOUND, f"No route for POST {path}")
+            if self.service.get(thread_id) is None:
+                return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown run {thread_id}")
+            feedback = body.get("feedback")
+            if feedback is not True and not (isinstance(feedback, str) and feedback.strip()):
+                return self._send_error(HTTPStatus.BAD_REQUEST, "'feedback' must be true or a non-empty string")
+            job = self.service.jobs.feedback(thread_id, feedback)
+            return self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+        except ValueError as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+        except JobBusy as e:
+            return self._send_error(HTTPStatus.CONFLICT, str(e))
+        except QueueFull as e:
+            return self._send_error(HTTPStatus.TOO_MANY_REQUESTS, str(e), {"Retry-After": "30"})
+
+    def do_GET(self):
+        thread_id, action = self._route()
+        if thread_id is None or action == "/feedback":
+            return self._send_error(HTTPStatus.NOT_FOUND, f"No route for GET {self.path}")
+
+        job = self.service.get(thread_id)
+        if job is None:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown run {thread_id}")
+        if action == "/events":
+            return self._stream_events(job)
+        return self._send_json(HTTPStatus.OK, self.service.describe(job))
+
+    def _stream_events(self, job: Job):
+        """
+        Streams the events of the run from `after`, or the Last-Event-ID of a reconnecting client, and closes
+        the stream once the current step of the run is done.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        last_event_id = self.headers.get("Last-Event-ID")
+        try:
+            after = int(last_event_id) + 1 if last_event_id is not None else int(query.get("after", ["0"])[0])
+        except ValueError:
+            return self._send_error(HTTPStatus.BAD_REQUEST, "Last-Event-ID and after must be integers")
+        if after < 0:
+            return self._send_error(HTTPStatus.BAD_REQUEST, "Last-Event-ID and after cannot be negative")
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            while True:
+                # Events of a run that is not running are all there already, there is nothing to wait for
+                events = job.wait_events(after, timeout=KEEPALIVE_INTERVAL if job.active else 0)
+                if not events:
+                    if not job.active:
+                        break
+                    self.wfile.write(b": keep-alive\n\n")
+                for event in events:
+                    self.wfile.write(
+                        f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                if events:
+                    after = events[-1]["seq"] + 1
+                if not job.active and job.next_seq <= after:
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"Client of run {job.thread_id} events disconnected")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m bedrock_deep_research.server",
+        description="Serve the research runs over HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default="runs.sqlite", help="SQLite database of the runs and their checkpoints")
+    parser.add_argument("--output-dir", default="output", help="Directory of the generated images")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("MAX_CONCURRENT_RUNS", "4")),
+                        help="Steps of runs executed at the same time")
+    parser.add_argument("--queue", type=int, default=int(os.environ.get("MAX_QUEUED_RUNS", "16")),
+                        help="Steps waiting for a worker before new ones are rejected")
+    parser.add_argument("--max-sections", type=int, default=section_scheduler.max_concurrency,
+                        help="Sections researched and written at the same time across all the runs, 0 for no limit")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO").upper())
+
+    section_scheduler.set_max_concurrency(args.max_sections)
+    ResearchRequestHandler.service = ResearchService(
+        args.db,
+        tavily_api_key=os.getenv("TAVILY_API_KEY"),
+        output_dir=args.output_dir,
+        max_workers=args.workers,
+        max_queued=args.queue,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), ResearchRequestHandler)
+    server.daemon_threads = True
+    logger.info(f"Serving research runs on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from .config import Configuration
+from .registry import RunRegistry, thread_id_of
+from .retrieval import BM25Index, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class SourcePool:
+    """
+    Every search result fetched during an article run, indexed so that the sections of the run can reuse
+    the results fetched by the initial research and by the other sections before searching the web.
+
+    A query is covered by the pool when at least `min_results` pooled sources have `min_overlap` of the
+    query terms in their title and snippet; the covered results are then ranked with BM25.
+
+    Attributes:
+        min_results (int): Matching sources needed to serve a query from the pool
+        min_overlap (float): Share of the query terms a source must contain to match the query
+    """
+
+    def __init__(self, min_results: int = 3, min_overlap: float = 0.6):
+        self.min_results = min_results
+        self.min_overlap = min_overlap
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._terms: Dict[str, set] = {}
+        self._index: Optional[BM25Index] = None
+        self._urls: List[str] = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._results)
+
+    @staticmethod
+    def _text(result: Dict[str, Any]) -> str:
+        return f"{result.get('title', '')} {result.get('content', '')}"
+
+    def add(self, results: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for result in results:
+                if result["url"] not in self._results:
+                    self._results[result["url"]] = result
+                    self._terms[result["url"]] = set(tokenize(self._text(result)))
+                    self._index = None
+
+    def lookup(self, query: str, k: int = 5, exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Returns the `k` pooled results most relevant to the query, or none if the pool does not cover it.
+        Results whose url is in `exclude`, e.g. the sources a section already has, do not count.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        exclude = set(exclude)
+        with self._lock:
+            matching = {
+                url for url, source_terms in self._terms.items()
+                if url not in exclude and len(terms & source_terms) / len(terms) >= self.min_overlap
+            }
+            if len(matching) < self.min_results:
+                return []
+
+            if self._index is None:
+                self._urls = list(self._results)
+                self._index = BM25Index([self._text(self._results[url]) for url in self._urls])
+            ranked = [self._urls[position] for position, _ in self._index.search(query, len(self._urls))]
+            return [self._results[url] for url in ranked if url in matching][:k]
+
+
+_pools: RunRegistry[SourcePool] = RunRegistry("source pool")
+
+
+def get_source_pool(config: Optional[RunnableConfig]) -> Optional[SourcePool]:
+    """Returns the source pool of the article run identified by the thread_id of the config, starting it if needed."""
+    configurable = Configuration.from_runnable_config(config)
+    thread_id = thread_id_of(config)
+    if not configurable.source_pool or thread_id is None:
+        return None
+
+    return _pools.setdefault(thread_id, lambda: SourcePool(
+        configurable.source_pool_min_results, configurable.source_pool_min_overlap))
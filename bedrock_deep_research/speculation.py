@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from .config import Configuration
+from .model import Section
+from .registry import RunRegistry, thread_id_of
+from .nodes.section_search_query_generator import generate_section_queries
+from .source_pool import SourcePool, get_source_pool
+from .web_search import WebSearch
+
+logger = logging.getLogger(__name__)
+
+
+def _cancel(speculations: Dict[tuple, Future]) -> None:
+    for future in speculations.values():
+        future.cancel()
+
+
+class SpeculativeResearcher:
+    """
+    Researches the sections of a proposed outline while the human reviews it.
+
+    For every section requiring research, the search queries are generated and the search results are
+    prefetched into the cache of the web search; sections proposed with their queries only get them
+    prefetched. Once the outline is approved, the section subgraphs reuse the queries, waiting for the ones
+    still in flight, and their searches hit the warm cache or join the searches still running. If the human
+    asks for changes instead, the speculation is discarded.
+
+    Attributes:
+        web_search (WebSearch): Web search whose cache receives the prefetched results
+        max_workers (int): Number of sections researched in parallel in the background
+    """
+
+    def __init__(self, web_search: WebSearch, max_workers: int = 4):
+        self.web_search = web_search
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="speculative_research"
+        )
+        self._lock = threading.Lock()
+        # thread_id -> section key -> future returning the search queries
+        self._speculations: RunRegistry[Dict[tuple, Future]] = RunRegistry("speculation", on_release=_cancel)
+
+    @staticmethod
+    def _key(section: Section) -> tuple:
+        return (section.name, section.description)
+
+    def start(self, config: RunnableConfig, sections: List[Section]) -> None:
+        """
+        Starts researching the sections in the background. Sections already speculated on are skipped, as the
+        node calling it runs again when the run resumes from the review of the outline.
+        """
+        thread_id = thread_id_of(config)
+        configurable = Configuration.from_runnable_config(config)
+        if thread_id is None or not configurable.speculative_research:
+            return
+
+        pool = get_source_pool(config)
+        with self._lock:
+            speculations = self._speculations.setdefault(thread_id, dict)
+            for section in sections:
+                key = self._key(section)
+                if not section.research or key in speculations:
+                    continue
+                if section.search_queries:
+                    # The section will search the queries proposed with the outline, only prefetch them
+                    speculations[key] = self._executor.submit(
+                        self._prefetch, configurable, section.search_queries, pool
+                    )
+                else:
+                    logger.info(f"Speculative research of section '{section.name}'")
+                    speculations[key] = self._executor.submit(self._research, configurable, section, pool)
+
+    def take_queries(self, config: RunnableConfig, section: Section) -> Optional[List[str]]:
+        """Returns the search queries speculated for the section, or None if there are none to reuse."""
+        thread_id = thread_id_of(config)
+        with self._lock:
+            speculations = self._speculations.get(thread_id) or {}
+            future = speculations.pop(self._key(section), None)
+            if not speculations:
+                self._speculations.pop(thread_id)
+        if future is None:
+            return None
+
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning(f"Discarding failed speculative research of section '{section.name}': {e}")
+            return None
+
+    def discard(self, config: RunnableConfig) -> None:
+        """Discards the speculation on an outline that will be regenerated."""
+        with self._lock:
+            speculations = self._speculations.pop(thread_id_of(config)) or {}
+        _cancel(speculations)
+
+    def _research(self, configurable: Configuration, section: Section, pool: Optional[SourcePool]) -> List[str]:
+        queries = generate_section_queries(configurable, section).queries
+        self._prefetch(configurable, queries, pool)
+        return queries
+
+    def _prefetch(self, configurable: Configuration, queries: List[str], pool: Optional[SourcePool]) -> List[str]:
+        # Queries covered by the source pool will not be searched by the section
+        uncovered = [q for q in queries if pool is None or not pool.lookup(q)]
+        if uncovered:
+            asyncio.run(self.web_search.prefetch(uncovered, configurable.search_cache_similarity))
+        return queries
@@ -0,0 +1,314 @@
+import argparse
+import inspect
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, get_type_hints
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+
+from .config import Configuration
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """A timed operation of a traced run, linked to the span it was started from."""
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        self.thread = threading.current_thread()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+
+    @property
+    def duration(self) -> float:
+        """Duration of the span in seconds."""
+        return ((self.end_ns or time.perf_counter_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, status: Optional[str] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+            if status:
+                self.status = status
+            self.trace.add(self)
+
+
+class Trace:
+    """Spans of one article run, across the invocations of the graph sharing its thread_id."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._origin_epoch_us = time.time_ns() // 1000
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Exports the spans in the Chrome trace event format, which Perfetto (https://ui.perfetto.dev) and
+        chrome://tracing load as a timeline. Spans are complete events on the track of the thread that ran
+        them, and flow events link a span to its children running on other threads, e.g. Send branches.
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        threads: Dict[int, int] = {}
+        events = []
+
+        def ts(ns: int) -> float:
+            return (ns - self._origin_ns) / 1000
+
+        for span in spans:
+            tid = threads.setdefault(span.thread.ident, len(threads) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.name.split(":")[0],
+                    "ph": "X",
+                    "ts": ts(span.start_ns),
+                    "dur": (span.end_ns - span.start_ns) / 1000,
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {
+                        "span_id": span.span_id,
+                        "parent_id": span.parent.span_id if span.parent else None,
+                        "status": span.status,
+                        **{k: str(v) for k, v in span.attributes.items()},
+                    },
+                }
+            )
+            if span.parent is not None and span.parent.thread.ident != span.thread.ident:
+                parent_tid = threads.setdefault(
+                    span.parent.thread.ident, len(threads) + 1)
+                flow = {"name": "spawn", "cat": "flow", "id": span.span_id, "pid": 1}
+                events.append({**flow, "ph": "s", "ts": ts(span.start_ns), "tid": parent_tid})
+                events.append({**flow, "ph": "f", "bp": "e", "ts": ts(span.start_ns), "tid": tid})
+
+        names = {span.thread.ident: span.thread.name for span in spans}
+        for ident, tid in threads.items():
+            events.append(
+                {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                 "args": {"name": names.get(ident, str(ident))}}
+            )
+
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "start_epoch_us": self._origin_epoch_us},
+        }
+
+    def export(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace()), encoding="utf-8")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+_traces: OrderedDict[str, Trace] = OrderedDict()
+_traces_lock = threading.Lock()
+MAX_TRACES = 64
+
+
+def start_span(name: str, **attributes) -> Optional[Span]:
+    """Starts a span as a child of the current span. Returns None if no run is being traced."""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Traces the block as a child of the current span. It is a no-op if no run is being traced."""
+    current = start_span(name, **attributes)
+    if current is None:
+        yield None
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(status=type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+@contextmanager
+def trace_run(name: str, config: RunnableConfig):
+    """
+    Traces an invocation of the graph when the `trace_dir` setting is set. The spans of all the invocations
+    sharing a thread_id are exported to `<trace_dir>/<thread_id>.json` after each invocation.
+    """
+    trace_dir = Configuration.from_runnable_config(config).trace_dir
+    thread_id = config.get("configurable", {}).get("thread_id")
+    if not trace_dir or thread_id is None:
+        yield None
+        return
+
+    with _traces_lock:
+        trace = _traces.setdefault(thread_id, Trace(thread_id))
+        _traces.move_to_end(thread_id)
+        while len(_traces) > MAX_TRACES:
+            _traces.popitem(last=False)
+
+    root = Span(trace, name, None, {"thread_id": thread_id})
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.end(status=type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+        path = Path(trace_dir) / f"{thread_id}.json"
+        trace.export(path)
+        logger.info(f"Trace exported to {path}")
+
+
+def wrap_node(wrapper: Callable, node: Callable) -> Callable:
+    """
+    Gives the wrapper of a graph node the return annotation of the node, from which LangGraph draws the edges of
+    the nodes returning a `Command[Literal[...]]`.
+    """
+    try:
+        hints = get_type_hints(node if inspect.isroutine(node) else type(node).__call__)
+    except Exception:
+        # Annotations that cannot be resolved are not edges LangGraph could use either
+        hints = {}
+    if "return" in hints:
+        wrapper.__annotations__["return"] = hints["return"]
+    return wrapper
+
+
+def traced(name: str, node: Callable) -> Callable:
+    """Wraps a graph node so that each of its executions is traced."""
+
+    def run(state: dict, config: RunnableConfig):
+        attributes = {}
+        if "section" in state:
+            attributes["section"] = state["section"].name
+        with span(f"node:{name}", **attributes):
+            return node(state, config)
+
+    return wrap_node(run, node)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Traces every LLM call as a child of the span it was made from."""
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, invocation_params=None, **kwargs):
+        model_id = (metadata or {}).get("ls_model_name") or (
+            invocation_params or {}).get("model_id", "")
+        current = start_span("llm:invoke", model_id=model_id)
+        if current is not None:
+            self._spans[run_id] = current
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        current = self._spans.pop(run_id, None)
+        if current is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None),
+                                "usage_metadata", None) or {}
+                for key in ("input_tokens", "output_tokens"):
+                    if key in usage:
+                        current.set_attribute(key, usage[key])
+        current.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        current = self._spans.pop(run_id, None)
+        if current is not None:
+            current.end(status=type(error).__name__)
+
+
+def critical_path(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Returns the spans of an exported trace on its critical path: starting from the root spans, repeatedly
+    descend into the child ending last, then into the child ending last before that one started, and so on.
+    """
+    spans = [e for e in events if e.get("ph") == "X"]
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for event in spans:
+        children.setdefault(event["args"]["parent_id"], []).append(event)
+
+    def walk(event) -> List[Dict[str, Any]]:
+        path = []
+        cursor = event["ts"] + event["dur"]
+        for child in sorted(children.get(event["args"]["span_id"], []),
+                            key=lambda c: c["ts"] + c["dur"], reverse=True):
+            if child["ts"] + child["dur"] <= cursor + 1e-3:
+                path = walk(child) + path
+                cursor = child["ts"]
+        return path or [event]
+
+    path = []
+    for root in sorted(children.get(None, []), key=lambda e: e["ts"]):
+        path.extend(walk(root))
+    return path
+
+
+def summarize(trace_file: str) -> str:
+    """Summarizes an exported trace: duration per span name, slowest section branch and critical path."""
+    events = json.loads(Path(trace_file).read_text(encoding="utf-8"))["traceEvents"]
+    spans = [e for e in events if e.get("ph") == "X"]
+
+    totals: Dict[str, List[float]] = {}
+    for event in spans:
+        totals.setdefault(event["name"], []).append(event["dur"] / 1e6)
+
+    lines = [f"{'span':<48} {'count':>6} {'total s':>9} {'max s':>8}"]
+    for name, durations in sorted(totals.items(), key=lambda kv: -sum(kv[1])):
+        lines.append(
+            f"{name:<48} {len(durations):>6} {sum(durations):>9.2f} {max(durations):>8.2f}")
+
+    branches = [e for e in spans if "section" in e["args"]
+                and e["name"].startswith("node:build_section")]
+    if branches:
+        slowest = max(branches, key=lambda e: e["dur"])
+        lines.append(
+            f"\nSlowest section branch: {slowest['args']['section']} ({slowest['dur'] / 1e6:.2f}s)")
+
+    path = critical_path(events)
+    lines.append(
+        f"\nCritical path ({sum(e['dur'] for e in path) / 1e6:.2f}s of work):")
+    for event in path:
+        label = event["args"].get("section") or event["args"].get(
+            "query") or event["args"].get("model_id", "")
+        lines.append(f"  {event['ts'] / 1e6:>8.2f}s {event['dur'] / 1e6:>7.2f}s  {event['name']} {label}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Summarize a trace exported by Bedrock Deep Research")
+    parser.add_argument("trace_file", help="Path of the exported trace")
+    print(summarize(parser.parse_args().trace_file))
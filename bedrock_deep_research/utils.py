@@ -6,6 +6,8 @@ from functools import wraps
 
 from botocore.exceptions import ClientError
 
+from .tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,7 +63,8 @@ def exponential_backoff_retry(
                         logger.debug(
                             f"Retrying in {sleep_time:.2f} seconds..."
                         )
-                        time.sleep(sleep_time)
+                        with span("retry:sleep", function=func.__name__, attempt=attempt + 1):
+                            time.sleep(sleep_time)
                         delay *= 2  # Exponential backoff
                     else:
                         logger.error(f"Client Error Raised: {e}")
@@ -74,11 +77,14 @@ def exponential_backoff_retry(
     return decorator
 
 
-def format_web_search(search_response, max_tokens_per_source, include_raw_content=True):
-    # Format output
+def format_web_search(search_response, max_tokens_per_source, include_raw_content=True, numbers=None):
+    # Format output, with the reference number of each source url if given
     formatted_text = "Sources:\n\n"
     for i, source in enumerate(search_response, 1):
-        formatted_text += f"Source {source['title']}:\n===\n"
+        if numbers:
+            formatted_text += f"Source [{numbers[source['url']]}] {source['title']}:\n===\n"
+        else:
+            formatted_text += f"Source {source['title']}:\n===\n"
         formatted_text += f"URL: {source['url']}\n===\n"
         formatted_text += (
             f"Most relevant content from source: {source['content']}\n===\n"
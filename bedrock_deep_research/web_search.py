@@ -2,10 +2,15 @@ import asyncio
 import hashlib
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from tavily import AsyncTavilyClient
+from .retrieval import NearestNeighborIndex, char_ngram_vector, exact_terms
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,12 @@ class WebSearch:
         output_dir (str): Directory to save search results
         save_search_results (bool): Whether to save search results to files
         tavily_async (AsyncTavilyClient): Async client for Tavily API
+        cache_size (int): Number of search responses kept in memory, 0 to disable the cache
+        cache_ttl (float): Seconds after which a cached search response is stale
+        similarity_threshold (float): Cosine similarity of the character n-grams above which a query is served
+            the cached response of its nearest cached query, if they have the same numbers and negations,
+            0 to serve exact matches only
+        tavily_client: Client used instead of an AsyncTavilyClient, e.g. a fake for benchmarks
     """
 
     MAX_RESULTS = 5
@@ -28,17 +39,35 @@ class WebSearch:
         tavily_api_key: str,
         save_search_results: bool = False,
         output_dir: str = "search_results",
+        cache_size: int = 512,
+        cache_ttl: float = 3600,
+        similarity_threshold: float = 0.9,
+        tavily_client: Any = None,
     ):
         self.output_dir = output_dir
         self.save_search_results = save_search_results
-        self.tavily_async = AsyncTavilyClient(api_key=tavily_api_key)
-
-    async def search(self, search_queries: List[str]) -> List[Dict[str, Any]]:
+        if tavily_client is None:
+            from tavily import AsyncTavilyClient
+
+            tavily_client = AsyncTavilyClient(api_key=tavily_api_key)
+        self.tavily_async = tavily_client
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.similarity_threshold = similarity_threshold
+        self._cache: OrderedDict[str, tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._cache_index = NearestNeighborIndex()
+        self._cache_lock = threading.Lock()
+        # Searches running, shared by the identical queries made meanwhile from any thread and event loop
+        self._in_flight: Dict[str, Future] = {}
+
+    async def search(self, search_queries: List[str],
+                     similarity_threshold: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Performs concurrent web searches using the Tavily API.
 
         Args:
             search_queries (List[SearchQuery]): List of search queries to process
+            similarity_threshold (float): Overrides the similarity threshold of the cache for these queries
 
         Returns:
                 List[dict]: List of search responses from Tavily API, one per query. Each response has format:
@@ -65,19 +94,10 @@ class WebSearch:
         if not all(isinstance(query, str) for query in search_queries):
             raise ValueError("All search queries must be strings")
 
-        search_tasks = []
-        for query in search_queries:
-            search_tasks.append(
-                self.tavily_async.search(
-                    query,
-                    max_results=self.MAX_RESULTS,
-                    include_raw_content=True,
-                    topic=self.SEARCH_TOPIC,
-                )
-            )
-
         # Execute all searches concurrently
-        search_docs = await asyncio.gather(*search_tasks)
+        search_docs = await asyncio.gather(
+            *(self._search(query, similarity_threshold) for query in search_queries)
+        )
 
         unique_docs = self._deduplicate_sources_by_url(search_docs)
 
@@ -86,6 +106,86 @@ class WebSearch:
 
         return unique_docs
 
+    async def prefetch(self, search_queries: List[str], similarity_threshold: Optional[float] = None) -> None:
+        """Runs the searches ahead of time so that later calls to `search` are served from the cache."""
+        await asyncio.gather(*(self._search(query, similarity_threshold) for query in search_queries))
+
+    async def _search(self, query: str, similarity_threshold: Optional[float] = None) -> Dict[str, Any]:
+        with span("tavily:search", query=query) as current:
+            if similarity_threshold is None:
+                similarity_threshold = self.similarity_threshold
+            cached = self._get_cached(query, similarity_threshold)
+            if cached is not None:
+                logger.debug(f"Search cache hit: {query} -> {cached.get('query')}")
+                if current is not None:
+                    current.set_attribute("cache_hit", True)
+                    if cached.get("query", query) != query:
+                        current.set_attribute("similar_query", cached["query"])
+                return cached
+
+            with self._cache_lock:
+                pending = self._in_flight.get(query)
+                if pending is None and query in self._cache:
+                    # Cached by a search that ended since the lookup
+                    return self._cache[query][1]
+                if pending is None:
+                    self._in_flight[query] = future = Future()
+            if pending is not None:
+                logger.debug(f"Search in flight: {query}")
+                if current is not None:
+                    current.set_attribute("in_flight", True)
+                return await asyncio.wrap_future(pending)
+
+            try:
+                response = await self.tavily_async.search(
+                    query,
+                    max_results=self.MAX_RESULTS,
+                    include_raw_content=True,
+                    topic=self.SEARCH_TOPIC,
+                )
+                self._put_cached(query, response)
+                future.set_result(response)
+                return response
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                # Removed once cached, so that the identical queries made later hit the cache
+                with self._cache_lock:
+                    del self._in_flight[query]
+
+    def _get_cached(self, query: str, similarity_threshold: float = 0) -> Dict[str, Any] | None:
+        with self._cache_lock:
+            key = query
+            if key not in self._cache and similarity_threshold > 0:
+                # Near-duplicate queries, e.g. reordered words or plurals, share the response of the nearest one,
+                # unless they differ by a year, a version or a negation
+                nearest = self._cache_index.nearest(char_ngram_vector(query))
+                if (nearest is not None and nearest[1] >= similarity_threshold
+                        and exact_terms(nearest[0]) == exact_terms(query)):
+                    key = nearest[0]
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            created_at, response = entry
+            if time.monotonic() - created_at > self.cache_ttl:
+                del self._cache[key]
+                self._cache_index.remove(key)
+                return None
+            self._cache.move_to_end(key)
+            return response
+
+    def _put_cached(self, query: str, response: Dict[str, Any]) -> None:
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            self._cache[query] = (time.monotonic(), response)
+            self._cache.move_to_end(query)
+            self._cache_index.add(query, char_ngram_vector(query))
+            while len(self._cache) > self.cache_size:
+                evicted, _ = self._cache.popitem(last=False)
+                self._cache_index.remove(evicted)
+
     def _deduplicate_sources_by_url(self, search_response) -> List[Dict[str, Any]]:
         # Collect all results
         sources_list = []
@@ -0,0 +1,47 @@
+import uuid
+from collections import Counter
+
+import pytest
+
+from bedrock_deep_research.bedrock import use_bedrock_clients
+from bedrock_deep_research.bench import CallStats, FakeBedrock, FakeTavilyClient, Latency
+from bedrock_deep_research.graph import BedrockDeepResearch
+from bedrock_deep_research.web_search import WebSearch
+
+
+class CountingTavilyClient(FakeTavilyClient):
+    """Fake Tavily client counting the searches of each query."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.queries = Counter()
+
+    async def search(self, query: str, **kwargs):
+        self.queries[query] += 1
+        return await super().search(query, **kwargs)
+
+
+@pytest.fixture
+def run_article(tmp_path):
+    """Runs an article with fake Bedrock and Tavily clients, approving its first outline."""
+
+    def run(sections: int = 4, search_latency: str = None, **configurable):
+        stats = CallStats()
+        tavily_client = CountingTavilyClient(latency=Latency(search_latency) if search_latency else None)
+        config = {"configurable": {
+            "thread_id": str(uuid.uuid4()),
+            "max_search_depth": 1,
+            "output_dir": str(tmp_path / "output"),
+            "image_derivatives": False,
+            "image_cache_mb": 0,
+            **configurable,
+        }}
+        clients = FakeBedrock(stats=stats, array_sizes={"sections": sections})
+        with use_bedrock_clients(clients):
+            deep_research = BedrockDeepResearch(config, tavily_api_key=None,
+                                                web_search=WebSearch(None, tavily_client=tavily_client))
+            deep_research.start("Upload files using Amazon S3 presigned url in Python")
+            deep_research.feedback(True)
+        return deep_research.get_state().values, stats, tavily_client
+
+    return run
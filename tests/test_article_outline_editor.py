@@ -0,0 +1,173 @@
+import pytest
+
+from bedrock_deep_research.bedrock import use_bedrock_clients
+from bedrock_deep_research.bench import CallStats, FakeBedrock
+from bedrock_deep_research.model import OutlineEdit, OutlineEdits, Section
+from bedrock_deep_research.nodes.article_outline_editor import (ArticleOutlineEditor, OutlineEditError,
+                                                                apply_outline_edits, parse_outline_edits)
+from bedrock_deep_research.nodes.article_outline_generator import ArticleOutlineGenerator, mark_research_sections
+
+
+@pytest.fixture
+def sections():
+    sections = [
+        Section(section_number=i, name=name, description=f"About {name}", search_queries=[f"{name} query"])
+        for i, name in enumerate(["Introduction", "Setup", "Usage", "Conclusion"])
+    ]
+    mark_research_sections(sections)
+    return sections
+
+
+def _names(sections):
+    return [section.name for section in sections]
+
+
+def _research(sections):
+    return [section.research for section in sections]
+
+
+def test_add_goes_before_the_conclusion_by_default(sections):
+    _, edited = apply_outline_edits("Title", sections, [OutlineEdit(operation="add", name="Pricing")])
+
+    assert _names(edited) == ["Introduction", "Setup", "Usage", "Pricing", "Conclusion"]
+    assert _research(edited) == [False, True, True, True, False]
+    assert [section.section_number for section in edited] == [0, 1, 2, 3, 4]
+
+
+def test_add_at_a_position(sections):
+    _, edited = apply_outline_edits("Title", sections, [OutlineEdit(operation="add", name="Pricing", position=2)])
+
+    assert _names(edited) == ["Introduction", "Pricing", "Setup", "Usage", "Conclusion"]
+    assert _research(edited) == [False, True, True, True, False]
+
+
+def test_move_rederives_the_sections_to_research(sections):
+    _, edited = apply_outline_edits("Title", sections, [OutlineEdit(operation="move", section=3, position=1)])
+
+    assert _names(edited) == ["Usage", "Introduction", "Setup", "Conclusion"]
+    assert _research(edited) == [False, True, True, False]
+    assert edited[0].search_queries == []
+
+
+def test_move_without_position_goes_before_the_conclusion(sections):
+    _, edited = apply_outline_edits("Title", sections, [OutlineEdit(operation="move", section=2)])
+
+    assert _names(edited) == ["Introduction", "Usage", "Setup", "Conclusion"]
+
+
+def test_numbers_refer_to_the_outline_before_the_edits(sections):
+    title, edited = apply_outline_edits("Title", sections, [
+        OutlineEdit(operation="delete", section=2),
+        OutlineEdit(operation="rename", section=3, name="Examples"),
+        OutlineEdit(operation="retitle", name="New title"),
+    ])
+
+    assert title == "New title"
+    assert _names(edited) == ["Introduction", "Examples", "Conclusion"]
+    assert _names(sections) == ["Introduction", "Setup", "Usage", "Conclusion"]
+
+
+def test_delete_all_sections_is_rejected(sections):
+    with pytest.raises(OutlineEditError):
+        apply_outline_edits("Title", sections, [OutlineEdit(operation="delete", section=i) for i in range(1, 5)])
+
+
+@pytest.mark.parametrize("edit", [
+    OutlineEdit(operation="rename", section=0, name="Overview"),
+    OutlineEdit(operation="describe", section=5, description="Anything"),
+    OutlineEdit(operation="move", section=-1, position=1),
+    OutlineEdit(operation="add", name=""),
+])
+def test_invalid_edits_are_rejected(sections, edit):
+    with pytest.raises(OutlineEditError):
+        apply_outline_edits("Title", sections, [edit])
+
+
+def test_deleted_section_cannot_be_edited(sections):
+    with pytest.raises(OutlineEditError):
+        apply_outline_edits("Title", sections, [
+            OutlineEdit(operation="delete", section=2),
+            OutlineEdit(operation="rename", section=2, name="Overview"),
+        ])
+
+
+@pytest.mark.parametrize("feedback, edits", [
+    ("Rename section 2 to Configuration; delete section \"Usage\".", [
+        OutlineEdit(operation="rename", section=2, name="Configuration"),
+        OutlineEdit(operation="delete", section=3),
+    ]),
+    ("Move section 3 to position 1\nAdd a section called Pricing at 3: Costs of the requests", [
+        OutlineEdit(operation="move", section=3, position=1),
+        OutlineEdit(operation="add", name="Pricing", description="Costs of the requests", position=3),
+    ]),
+    ("move section usage before the conclusion. Retitle the article to 'S3 uploads'", [
+        OutlineEdit(operation="move", section=3),
+        OutlineEdit(operation="retitle", name="S3 uploads"),
+    ]),
+    ("Add section \"Pricing and quotas\"", [OutlineEdit(operation="add", name="Pricing and quotas")]),
+    ("Describe section Setup as Creating the bucket and its CORS rules", [
+        OutlineEdit(operation="describe", section=2, description="Creating the bucket and its CORS rules"),
+    ]),
+])
+def test_edit_commands_are_parsed(sections, feedback, edits):
+    assert parse_outline_edits(feedback, sections) == edits
+
+
+@pytest.mark.parametrize("feedback", [
+    "Focus more on security",
+    "Rename section 2 to Configuration and explain the IAM permissions",
+    "Delete section Pricing",
+    "",
+])
+def test_other_feedback_is_not_parsed(sections, feedback):
+    assert parse_outline_edits(feedback, sections) is None
+
+
+def _edit(sections, feedback, monkeypatch=None, classified=None):
+    """Runs the editor on the feedback, returning its command and the model calls it made."""
+    stats = CallStats()
+    if monkeypatch is not None:
+        def generate_edits(self, model_id, max_tokens, system_prompt):
+            stats.record("classifier")
+            if isinstance(classified, Exception):
+                raise classified
+            return classified
+
+        monkeypatch.setattr(ArticleOutlineEditor, "generate_edits", generate_edits)
+    state = {"title": "Title", "sections": sections, "feedback_on_report_plan": feedback}
+    with use_bedrock_clients(FakeBedrock(stats=stats)):
+        command = ArticleOutlineEditor()(state, {"configurable": {}})
+    return command, dict(stats.calls)
+
+
+def test_edit_commands_are_applied_without_a_model_call(sections):
+    command, calls = _edit(sections, "Rename section 2 to Configuration; delete section 3")
+
+    assert command.goto == "human_feedback" and calls == {}
+    assert _names(command.update["sections"]) == ["Introduction", "Configuration", "Conclusion"]
+
+
+def test_feedback_without_edits_is_regenerated_without_a_model_call(sections):
+    command, calls = _edit(sections, "Focus more on security and less on the SDK")
+
+    assert command.goto == ArticleOutlineGenerator.N and calls == {}
+
+
+@pytest.mark.parametrize("classified", [
+    OutlineEdits(regenerate=True, edits=[]),
+    OutlineEdits(regenerate=False, edits=[]),
+    OutlineEdits(regenerate=False, edits=[OutlineEdit(operation="delete", section=9)]),
+    RuntimeError("The model did not return edits"),
+])
+def test_feedback_the_model_cannot_edit_falls_back_to_the_generator(sections, monkeypatch, classified):
+    command, calls = _edit(sections, "Add more detail on the security of the URLs", monkeypatch, classified)
+
+    assert command.goto == ArticleOutlineGenerator.N and calls == {"classifier": 1}
+
+
+def test_feedback_mentioning_edits_is_classified_by_the_model(sections, monkeypatch):
+    classified = OutlineEdits(regenerate=False, edits=[OutlineEdit(operation="move", section=4, position=2)])
+    command, calls = _edit(sections, "Put the usage right after the intro, please move it", monkeypatch, classified)
+
+    assert command.goto == "human_feedback" and calls == {"classifier": 1}
+    assert _names(command.update["sections"]) == ["Introduction", "Conclusion", "Setup", "Usage"]
@@ -0,0 +1,34 @@
+from bedrock_deep_research.budget import ResearchBudget
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_time_waiting_for_the_scheduler_is_not_charged_to_the_section():
+    clock = FakeClock()
+    budget = ResearchBudget(deadline_seconds=200, reserve=0, clock=clock)
+    budget.section_queued("Setup")
+
+    clock.now = 90  # Waiting for a slot of the scheduler
+    budget.section_started("Setup")
+    clock.now = 100  # One iteration of 10 seconds
+
+    decision = budget.decide("Setup", search_iterations=1, max_search_depth=20)
+    assert decision["affordable_iterations"] == 10
+    assert decision["limited_by"] == "seconds"
+
+
+def test_queued_sections_share_the_tokens_left():
+    budget = ResearchBudget(token_budget=1000, reserve=0)
+    budget.section_queued("Setup")
+    budget.section_queued("Usage")
+    budget.section_started("Setup")
+    budget.record_usage("model", 80, 20)
+
+    # 900 tokens left, shared by the two sections, at 100 tokens per iteration
+    assert budget.decide("Setup", search_iterations=1, max_search_depth=20)["affordable_iterations"] == 4
@@ -0,0 +1,58 @@
+import uuid
+
+from bedrock_deep_research.bedrock import BedrockClients, use_bedrock_clients
+from bedrock_deep_research.bench import FakeBedrock, FakeTavilyClient
+from bedrock_deep_research.bench.cassette import (Cassette, RecordingBedrock, RecordingTavilyClient,
+                                                  ReplayBedrock, _tool_names, replay)
+from bedrock_deep_research.graph import BedrockDeepResearch
+from bedrock_deep_research.web_search import WebSearch
+
+TOPIC = "Upload files using Amazon S3 presigned url in Python"
+
+
+def _record(tmp_path) -> str:
+    """Records a run of the graph over the fakes to a cassette, and returns its path."""
+    cassette = Cassette(run={"topic": TOPIC, "configurable": {"max_search_depth": 1}})
+    configurable = {"thread_id": str(uuid.uuid4()), "max_search_depth": 1, "output_dir": str(tmp_path / "output"),
+                    "image_derivatives": False, "image_cache_mb": 0}
+    clients = RecordingBedrock(cassette, FakeBedrock(array_sizes={"sections": 4}))
+    tavily_client = RecordingTavilyClient(FakeTavilyClient(), cassette)
+
+    with use_bedrock_clients(clients):
+        deep_research = BedrockDeepResearch({"configurable": configurable}, tavily_api_key=None,
+                                            web_search=WebSearch(None, tavily_client=tavily_client))
+        deep_research.start(TOPIC)
+        deep_research.feedback(True)
+
+    path = str(tmp_path / "run.jsonl.gz")
+    cassette.save(path)
+    return path
+
+
+def test_cassettes_keep_the_request_of_every_call(tmp_path):
+    entries = Cassette.load(_record(tmp_path)).entries
+
+    assert {entry["kind"] for entry in entries} == {"llm", "image", "tavily"}
+    for entry in entries:
+        request = entry["request"]
+        if entry["kind"] == "llm":
+            assert request["messages"] and sum(len(m["content"]) for m in request["messages"]) == entry["input_chars"]
+            assert _tool_names(request["tools"]) == entry["tools"]
+        elif entry["kind"] == "image":
+            assert request["textToImageParams"]["text"]
+        else:
+            assert request["query"] == entry["key"]
+
+
+def test_recorded_runs_are_replayed_exactly(tmp_path):
+    result = replay(_record(tmp_path), latency_scale=0)
+
+    assert result["final_report_chars"] > 0
+    assert result["unmatched_calls"] == 0
+    assert sum(result["calls"].values()) == result["recorded_calls"]
+
+
+def test_cassette_clients_are_initialized_like_the_clients_they_replace():
+    for clients in (RecordingBedrock(Cassette(), FakeBedrock()), ReplayBedrock(Cassette()), FakeBedrock()):
+        assert isinstance(clients, BedrockClients)
+        assert clients.router is None and clients._cache == {}
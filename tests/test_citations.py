@@ -0,0 +1,35 @@
+from bedrock_deep_research.citations import cited_numbers, render_sources, source_numbers
+from bedrock_deep_research.model import Source
+
+SOURCES = [
+    Source(title="S3 guide", url="https://a"),
+    Source(title="boto3 docs", url="https://b"),
+    Source(title="S3 guide again", url="https://a"),
+    Source(title="Blog", url="https://c"),
+]
+
+
+def test_duplicate_urls_keep_the_number_of_their_first_source():
+    assert source_numbers(SOURCES) == {"https://a": 1, "https://b": 2, "https://c": 3}
+
+
+def test_cited_numbers():
+    assert cited_numbers("Uploads [1] expire [2, 3] and [2].") == {1, 2, 3}
+
+
+def test_render_sources_lists_the_cited_sources_with_their_numbers():
+    rendered = render_sources("Presigned URLs expire [3] and need boto3 [2].\n", SOURCES)
+
+    assert rendered == ("Presigned URLs expire [3] and need boto3 [2].\n\n### Sources\n"
+                        "- [2] boto3 docs : https://b\n"
+                        "- [3] Blog : https://c")
+
+
+def test_render_sources_lists_all_the_sources_when_none_is_cited():
+    rendered = render_sources("No citations here.", SOURCES)
+
+    assert rendered.endswith("- [1] S3 guide : https://a\n- [2] boto3 docs : https://b\n- [3] Blog : https://c")
+
+
+def test_render_sources_without_sources():
+    assert render_sources("Introduction.", []) == "Introduction."
@@ -0,0 +1,123 @@
+import pytest
+from langgraph.graph import END
+
+from bedrock_deep_research.bedrock import use_bedrock_clients
+from bedrock_deep_research.bench import FakeBedrock
+from bedrock_deep_research.config import Configuration
+from bedrock_deep_research.convergence import (check_query_convergence, check_research_convergence,
+                                               content_change, query_overlap)
+from bedrock_deep_research.model import Section
+from bedrock_deep_research.nodes import SectionWebResearcher, SectionWriter
+from bedrock_deep_research.nodes.section_writer import Feedback
+
+CONTENT = ("**Presigned URLs let browsers upload to S3 without AWS credentials.** The backend signs a PUT "
+           "request for one object key with boto3 and returns the URL, which expires after the chosen time [1].")
+REWRITTEN = ("**Uploads from the browser need no credentials with presigned URLs.** A Lambda function creates "
+             "a presigned POST with conditions on the content type and size, and S3 rejects other files [2].")
+
+
+def test_content_change_of_identical_and_rewritten_content():
+    assert content_change(CONTENT, CONTENT) == 0
+    assert content_change(CONTENT, CONTENT.replace("[1]", "[1, 2]")) < 0.1
+    assert content_change(CONTENT, REWRITTEN) > 0.8
+
+
+def test_query_overlap_of_repeated_and_new_queries():
+    past = ["S3 presigned URL upload Python", "boto3 generate_presigned_url expiration"]
+
+    assert query_overlap(["python S3 presigned URL upload"], past) == 1.0
+    assert query_overlap(["S3 presigned POST policy conditions", "CloudFront signed cookies"], past) == 0.0
+    assert query_overlap(["S3 presigned URLs upload Python", "CloudFront signed cookies"], past) == 0.5
+    assert query_overlap([], past) == 1.0
+
+
+def test_research_converges_when_the_content_barely_changes():
+    configurable = Configuration()
+
+    assert check_research_convergence(configurable, "Upload", 1, 1.0, "", CONTENT) is None
+
+    decision = check_research_convergence(configurable, "Upload", 2, 0.5, CONTENT, CONTENT)
+    assert decision["continue_research"] is False
+    assert decision["limited_by"] == "convergence:content_change"
+
+    decision = check_research_convergence(configurable, "Upload", 2, 0.5, CONTENT, REWRITTEN)
+    assert decision["continue_research"] is True
+
+
+def test_research_converges_without_new_sources():
+    decision = check_research_convergence(Configuration(), "Upload", 2, 0.0, CONTENT, REWRITTEN)
+
+    assert decision["limited_by"] == "convergence:new_sources"
+
+
+def test_query_convergence_on_repeated_follow_up_queries():
+    configurable = Configuration()
+    past = ["S3 presigned URL upload Python"]
+
+    repeated = check_query_convergence(configurable, "Upload", 1, ["python S3 presigned URLs upload"], past)
+    assert repeated["limited_by"] == "convergence:query_overlap"
+
+    new = check_query_convergence(configurable, "Upload", 1, ["S3 multipart upload part size"], past)
+    assert new["continue_research"] is True
+
+    assert check_query_convergence(configurable, "Upload", 1, ["anything"], []) is None
+
+
+PAST_QUERIES = ["S3 presigned URL upload Python"]
+
+
+@pytest.fixture
+def write_section(monkeypatch):
+    """Runs the section writer over a section last written as `previous`, rewriting it as `content`."""
+    graded = []
+
+    def write(previous: str, content: str, new_source_share: float = 1.0, follow_up_queries=None,
+              search_iterations: int = 2):
+        monkeypatch.setattr(SectionWriter, "_generate_section_content", lambda self, *args: content)
+
+        def grade(self, model, system_prompt, section):
+            graded.append(section.name)
+            return Feedback(grade="fail", follow_up_queries=follow_up_queries or ["S3 multipart upload part size"])
+
+        monkeypatch.setattr(SectionWriter, "_grade_section_content", grade)
+        state = {
+            "section": Section(section_number=1, name="Upload", description="Presigned uploads", content=previous),
+            "source_str": "", "sources": [], "search_iterations": search_iterations,
+            "past_queries": PAST_QUERIES, "new_source_share": new_source_share,
+        }
+        with use_bedrock_clients(FakeBedrock()):
+            return SectionWriter()(state, {"configurable": {"max_search_depth": 3}})
+
+    write.graded = graded
+    return write
+
+
+def test_sections_converging_are_published_without_grading(write_section):
+    command = write_section(CONTENT, CONTENT)
+
+    assert command.goto == END and command.update["completed_sections"][0].content == CONTENT
+    assert command.update["research_decisions"][-1]["limited_by"] == "convergence:content_change"
+    assert write_section.graded == []
+
+    command = write_section(CONTENT, REWRITTEN, new_source_share=0.0)
+    assert command.update["research_decisions"][-1]["limited_by"] == "convergence:new_sources"
+    assert write_section.graded == []
+
+
+def test_sections_repeating_their_queries_are_published_after_grading(write_section):
+    command = write_section(CONTENT, REWRITTEN, follow_up_queries=["python S3 presigned URLs upload"])
+
+    assert command.goto == END
+    assert command.update["research_decisions"][-1]["limited_by"] == "convergence:query_overlap"
+    assert write_section.graded == ["Upload"]
+
+
+def test_sections_still_changing_are_researched_again(write_section):
+    command = write_section(CONTENT, REWRITTEN)
+
+    assert command.goto == SectionWebResearcher.N
+    assert command.update["search_queries"] == ["S3 multipart upload part size"]
+    assert all(d["continue_research"] for d in command.update["research_decisions"])
+
+    # The first draft has nothing to converge from
+    assert write_section("", CONTENT, search_iterations=1).goto == SectionWebResearcher.N
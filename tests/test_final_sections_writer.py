@@ -0,0 +1,66 @@
+import pytest
+
+from bedrock_deep_research.bedrock import use_bedrock_clients
+from bedrock_deep_research.bench import CallStats, FakeBedrock
+from bedrock_deep_research.model import FinalSection, FinalSections, Section
+from bedrock_deep_research.nodes import FinalSectionsBatchWriter
+
+
+@pytest.fixture
+def state():
+    return {
+        "sections": [
+            Section(section_number=0, name="Introduction", description="What presigned URLs are", research=False),
+            Section(section_number=1, name="Generating URLs", description="With boto3", research=True,
+                    content="## Generating URLs\nCall generate_presigned_url [1]."),
+            Section(section_number=2, name="Conclusion", description="When to use them", research=False),
+        ],
+        "report_sections_from_research": "## Generating URLs\nCall generate_presigned_url [1].",
+    }
+
+
+def _write(state, sections=None, batch=None, monkeypatch=None):
+    """Runs the batch writer over the fakes, returning its update and the model calls it made."""
+    stats = CallStats()
+    if batch is not None:
+        monkeypatch.setattr(FinalSectionsBatchWriter, "_generate_final_sections",
+                            lambda self, model, sections, context: batch)
+    with use_bedrock_clients(FakeBedrock(stats=stats, array_sizes={"sections": sections or 0})):
+        update = FinalSectionsBatchWriter()(state, {"configurable": {}})
+    return update, dict(stats.calls)
+
+
+def test_final_sections_are_written_in_one_call(state):
+    update, calls = _write(state, sections=2)
+
+    assert [s.name for s in update["completed_sections"]] == ["Introduction", "Conclusion"]
+    assert all(s.content for s in update["completed_sections"])
+    assert calls == {"llm:structured": 1}
+
+
+def test_sections_missing_from_the_batch_are_written_separately(state):
+    update, calls = _write(state, sections=1)
+
+    introduction, conclusion = update["completed_sections"]
+    assert introduction.content and conclusion.content and introduction.content != conclusion.content
+    assert calls == {"llm:structured": 1, "llm:text": 1}
+
+
+def test_sections_are_matched_by_name_before_the_fallback(state, monkeypatch):
+    batch = FinalSections(sections=[FinalSection(name=" conclusion ", content="Use them for uploads.")])
+    update, calls = _write(state, batch=batch, monkeypatch=monkeypatch)
+
+    introduction, conclusion = update["completed_sections"]
+    assert conclusion.content == "Use them for uploads."
+    assert introduction.content and introduction.content != conclusion.content
+    assert calls == {"llm:text": 1}
+
+
+def test_renamed_sections_take_the_remaining_contents_in_order(state, monkeypatch):
+    batch = FinalSections(sections=[FinalSection(name="Overview", content="Presigned URLs grant access."),
+                                    FinalSection(name="Conclusion", content="Use them for uploads.")])
+    update, calls = _write(state, batch=batch, monkeypatch=monkeypatch)
+
+    assert [s.content for s in update["completed_sections"]] == ["Presigned URLs grant access.",
+                                                                  "Use them for uploads."]
+    assert calls == {}
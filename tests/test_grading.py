@@ -0,0 +1,82 @@
+import pytest
+
+from bedrock_deep_research.config import Configuration
+from bedrock_deep_research.grading import count_words, get_grader_agreement, pre_grade, word_limit
+from bedrock_deep_research.model import Section, Source
+from bedrock_deep_research.registry import release_run
+
+
+@pytest.mark.parametrize("guidelines, limit", [
+    (Configuration().writing_guidelines, (0, 200)),
+    ("- Strict 150-200 word limit\n- Include code examples where relevant", (150, 200)),
+    ("- 150-200 word limit", (150, 200)),
+    ("- Between 100 to 150 words", (100, 150)),
+    ("- Use **bold** for key points", None),
+    ("", None),
+])
+def test_word_limit(guidelines, limit):
+    assert word_limit(guidelines) == limit
+
+
+def test_count_words_ignores_citations_and_markdown():
+    assert count_words("**S3 presigned URLs** expire [1, 2]. See `boto3` [3].") == 6
+
+
+def _section(content: str, sources=None) -> Section:
+    return Section(section_number=1, name="Presigned uploads",
+                   description="Upload objects to S3 from browsers with presigned URLs",
+                   content=content, sources=sources or [Source(title="S3 docs", url="https://docs.aws/s3")])
+
+
+def _content(words: int, cite: bool = True) -> str:
+    text = "Browsers upload objects to S3 with presigned URLs"
+    filler = " ".join(["detail"] * (words - len(text.split())))
+    return f"{text} {filler}{' [1]' if cite else ''}"
+
+
+def test_pre_grade_passes_a_covered_cited_section_within_the_limit():
+    grade = pre_grade(_section(_content(180)), Configuration().writing_guidelines)
+
+    assert grade.grade == "pass"
+    assert grade.checks == {"coverage": 1.0, "within_limit": 1.0, "cited": 1.0, "words": 180}
+
+
+def test_pre_grade_fails_an_empty_section():
+    grade = pre_grade(_section(""), Configuration().writing_guidelines)
+
+    assert grade.grade == "fail"
+    assert grade.score == 0
+
+
+def test_pre_grade_leaves_an_uncertain_section_to_the_llm_grader():
+    grade = pre_grade(_section(_content(400, cite=False)), Configuration().writing_guidelines)
+
+    assert grade.grade is None
+    assert grade.checks["within_limit"] == 0 and grade.checks["cited"] == 0
+
+
+def test_pre_grade_follow_up_queries_target_the_missing_terms():
+    grade = pre_grade(_section("Presigned uploads are simple [1]."), Configuration().writing_guidelines)
+
+    assert grade.follow_up_queries == ["Presigned uploads object s3 browser url"]
+
+
+def test_grader_agreement_is_measured_per_run():
+    first, second = ({"configurable": {"thread_id": f"agreement-{i}"}} for i in range(2))
+    leaning = pre_grade(_section(_content(400, cite=False)), Configuration().writing_guidelines)
+    confident = pre_grade(_section(_content(180)), Configuration().writing_guidelines)
+
+    get_grader_agreement(first).record(leaning, leaning.leaning)
+    get_grader_agreement(first).record(confident, "fail")
+    get_grader_agreement(second).record(leaning, "pass" if leaning.leaning == "fail" else "fail")
+
+    assert get_grader_agreement(first).summary() == {"confident": {"sections": 1, "agreement": 0.0},
+                                                     "leaning": {"sections": 1, "agreement": 1.0}}
+    assert get_grader_agreement(second).summary() == {"leaning": {"sections": 1, "agreement": 0.0}}
+    assert get_grader_agreement({"configurable": {}}) is None
+
+    # A new run with the same thread_id starts over once the previous one is released
+    release_run("agreement-0")
+    release_run("agreement-1")
+    assert get_grader_agreement(first).summary() == {}
+    release_run("agreement-0")
@@ -0,0 +1,23 @@
+import pytest
+
+from bedrock_deep_research.bench import FakeTavilyClient
+from bedrock_deep_research.graph import BedrockDeepResearch
+from bedrock_deep_research.web_search import WebSearch
+
+
+@pytest.fixture(scope="module")
+def edges():
+    deep_research = BedrockDeepResearch({"configurable": {"thread_id": "test"}}, tavily_api_key=None,
+                                        web_search=WebSearch(None, tavily_client=FakeTavilyClient()))
+    return {(edge.source, edge.target) for edge in deep_research.graph.get_graph().edges}
+
+
+@pytest.mark.parametrize("edge", [
+    ("human_feedback", "generate_article_outline"),
+    ("human_feedback", "edit_article_outline"),
+    ("human_feedback", "build_section_with_web_research"),
+    ("edit_article_outline", "generate_article_outline"),
+    ("edit_article_outline", "human_feedback"),
+])
+def test_traced_nodes_keep_their_command_edges(edges, edge):
+    assert edge in edges
@@ -0,0 +1,32 @@
+import os
+
+from bedrock_deep_research.images import ImageCache
+
+
+def test_cache_round_trip(tmp_path):
+    cache = ImageCache(tmp_path / "cache")
+    cache.put(b"image", "image", "model", "body")
+
+    assert cache.get("image", "model", "body") == b"image"
+    assert cache.get("image", "model", "other body") is None
+
+
+def test_cache_evicts_the_least_recently_used_entries(tmp_path):
+    cache = ImageCache(tmp_path / "cache", max_bytes=10)
+    cache.put(b"a" * 4, "image", "a")
+    cache.put(b"b" * 4, "image", "b")
+    os.utime(cache._path("image", "a"), (0, 0))
+    cache.put(b"c" * 4, "image", "c")
+
+    assert cache.get("image", "a") is None
+    assert cache.get("image", "b") == b"b" * 4
+    assert cache.get("image", "c") == b"c" * 4
+
+
+def test_cache_errors_do_not_fail_the_caller(tmp_path):
+    # The cache directory cannot be created under a file
+    (tmp_path / "file").write_bytes(b"")
+    cache = ImageCache(tmp_path / "file" / "cache")
+
+    cache.put(b"image", "image", "model", "body")
+    assert cache.get("image", "model", "body") is None
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from bedrock_deep_research.bedrock import use_bedrock_clients
+from bedrock_deep_research.bench import FakeBedrock, FakeTavilyClient
+from bedrock_deep_research.graph import BedrockDeepResearch
+from bedrock_deep_research.jobs import Job, JobBusy, JobManager, QueueFull
+from bedrock_deep_research.web_search import WebSearch
+
+WAITING = SimpleNamespace(values={"topic": "S3"}, next=("human_feedback",),
+                          tasks=[SimpleNamespace(interrupts=["Please provide feedback"])])
+
+
+class BlockedResearch:
+    """Research graph whose steps stream a token and a node, then wait to be released."""
+
+    def __init__(self):
+        self.released = threading.Event()
+        self.states = {}
+        self.deleted = []
+
+    def stream(self, input, config, name):
+        yield (), "messages", (SimpleNamespace(content="Amazon"), {"langgraph_node": "generate_outline"})
+        yield ("build_section:1",), "updates", {"write_section": {}}
+        assert self.released.wait(timeout=5)
+
+    def get_state(self, config):
+        return self.states.get(config["configurable"]["thread_id"], WAITING)
+
+    def delete_thread(self, thread_id):
+        self.deleted.append(thread_id)
+
+
+def _config(thread_id: str = None) -> dict:
+    return {"configurable": {"thread_id": thread_id or str(uuid.uuid4()), "max_search_depth": 1}}
+
+
+def _done(job: Job, timeout: float = 10.0) -> Job:
+    deadline = time.monotonic() + timeout
+    while job.active:
+        assert time.monotonic() < deadline, "timed out"
+        job.wait_events(job.next_seq, timeout=0.05)
+    return job
+
+
+@pytest.fixture
+def research():
+    research = BlockedResearch()
+    yield research
+    research.released.set()
+
+
+def test_events_are_replayed_from_a_cursor():
+    job = Job("run", {}, max_events=3)
+    for i in range(5):
+        job.add_event("node", node=f"node_{i}")
+
+    # The oldest events were dropped from the buffer, the cursor skips them
+    assert [e["seq"] for e in job.wait_events(0)] == [2, 3, 4]
+    assert [e["node"] for e in job.wait_events(4)] == ["node_4"]
+    assert job.wait_events(5, timeout=0) == []
+
+    threading.Timer(0.05, job.add_event, args=("node",), kwargs={"node": "node_5"}).start()
+    assert [e["node"] for e in job.wait_events(5, timeout=5)] == ["node_5"]
+
+
+def test_token_events_are_dropped_once_the_step_is_done():
+    job = Job("run", {})
+    job.add_event("token", node="write_section", text="Amazon")
+    job.add_event("node", node="write_section")
+
+    job.set_status("running")
+    assert [e["type"] for e in job.wait_events(0)] == ["token", "node", "status"]
+    job.set_status("waiting_feedback")
+    assert [e["type"] for e in job.wait_events(0)] == ["node", "status", "status"]
+    assert job.next_seq == 4 and job.to_dict()["events"] == 4
+
+
+def test_steps_beyond_the_workers_and_the_queue_are_rejected(research):
+    jobs = JobManager(research, max_workers=1, max_queued=1)
+    first = jobs.start("S3", _config("first"))
+    second = jobs.start("S3", _config("second"))
+
+    with pytest.raises(QueueFull):
+        jobs.start("S3", _config())
+    with pytest.raises(JobBusy):
+        jobs.start("S3", _config("first"))
+    with pytest.raises(JobBusy):
+        jobs.feedback("first", True)
+    with pytest.raises(JobBusy):
+        jobs.forget("second")
+    with pytest.raises(KeyError):
+        jobs.feedback("unknown", True)
+    assert jobs.queue_depth == 2 and second.status == "queued"
+
+    research.released.set()
+    assert _done(first).status == _done(second).status == "waiting_feedback"
+    assert jobs.queue_depth == 0
+    events = first.wait_events(0)
+    assert [e["status"] for e in events if e["type"] == "status"] == ["queued", "running", "waiting_feedback"]
+    assert [e["path"] for e in events if e["type"] == "node"] == ["build_section/write_section"]
+    assert not any(e["type"] == "token" for e in events)
+
+    assert jobs.feedback("first", True).feedback is True
+    assert _done(first).status == "waiting_feedback"
+    jobs.forget("second")
+    assert jobs.get("second") is None and research.deleted == ["second"]
+    jobs.shutdown()
+
+
+def test_the_oldest_finished_jobs_are_forgotten(research):
+    jobs = JobManager(research, max_workers=2, max_jobs=2, delete_forgotten=True)
+    research.released.set()
+    for thread_id in ("a", "b"):
+        _done(jobs.start("S3", _config(thread_id)))
+    jobs.feedback("a", True)
+    _done(jobs.get("a"))
+
+    # "b" is now the least recently submitted
+    jobs.start("S3", _config("c"))
+    assert jobs.get("b") is None and research.deleted == ["b"]
+    assert jobs.get("a") is not None and jobs.get("c") is not None
+
+    # Jobs still queued or running are kept over the limit
+    _done(jobs.get("c"))
+    research.released.clear()
+    jobs.feedback("a", False)
+    jobs.feedback("c", False)
+    jobs.start("S3", _config("d"))
+    assert {jobs.get(t) is not None for t in ("a", "c", "d")} == {True}
+    research.released.set()
+    jobs.shutdown()
+
+
+def test_runs_stopped_by_a_restart_are_restored_as_failed(research):
+    research.states["stopped"] = SimpleNamespace(values={"topic": "S3"}, next=("build_section",), tasks=[])
+    research.states["unknown"] = SimpleNamespace(values={}, next=(), tasks=[])
+    jobs = JobManager(research)
+
+    job = jobs.restore(_config("stopped"))
+    assert job.status == "failed" and "restart" in job.error
+    assert jobs.restore(_config("stopped")) is job
+    assert jobs.restore(_config("unknown")) is None and jobs.get("unknown") is None
+
+    # A failed step can be resumed
+    research.states["stopped"] = WAITING
+    research.released.set()
+    assert _done(jobs.feedback("stopped", True)).status == "waiting_feedback"
+
+
+def test_runs_are_resumed_by_another_process_from_their_checkpoints(tmp_path):
+    """A run is resumed after a restart of the server, its new manager restoring it from the checkpoints."""
+    database = str(tmp_path / "checkpoints.sqlite")
+    config = _config()
+    config["configurable"].update(output_dir=str(tmp_path / "output"), image_derivatives=False, image_cache_mb=0)
+
+    def manager() -> JobManager:
+        deep_research = BedrockDeepResearch(
+            web_search=WebSearch(None, tavily_client=FakeTavilyClient()),
+            checkpointer=SqliteSaver(sqlite3.connect(database, check_same_thread=False)))
+        return JobManager(deep_research)
+
+    with use_bedrock_clients(FakeBedrock(array_sizes={"sections": 4})):
+        before = manager()
+        assert _done(before.start("S3 presigned URLs", config)).status == "waiting_feedback"
+        before.shutdown()
+
+        after = manager()
+        assert after.get(config["configurable"]["thread_id"]) is None
+        job = after.restore(config)
+        assert job.status == "waiting_feedback" and job.feedback is None
+        assert len(after.get_state(job.thread_id).values["sections"]) == 4
+
+        assert _done(after.feedback(job.thread_id, True)).status == "completed"
+        assert after.get_state(job.thread_id).values["final_report"]
+        after.shutdown()
+
+        assert manager().restore(config).status == "completed"
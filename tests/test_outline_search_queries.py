@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.mark.parametrize("sections", [4, 6])
+def test_sections_proposed_with_queries_skip_the_query_generator(run_article, sections):
+    settings = dict(sections=sections, speculative_research=False, source_pool=False)
+    _, baseline, _ = run_article(outline_search_queries=False, **settings)
+    state, stats, tavily_client = run_article(outline_search_queries=True, **settings)
+
+    researched = [section for section in state["sections"] if section.research]
+    assert len(researched) == sections - 2
+    # The outline call proposes the queries, one planner call less per researched section
+    assert baseline.calls["llm:structured"] - stats.calls["llm:structured"] == len(researched)
+    # The sections searched the queries proposed with the outline
+    for section in researched:
+        assert section.search_queries and set(section.search_queries) <= set(tavily_client.queries)
@@ -0,0 +1,51 @@
+import pytest
+
+from bedrock_deep_research.config import Configuration
+from bedrock_deep_research.output_limits import CALLS, IMAGE_PROMPT_TOKENS, max_tokens_for
+
+
+def test_budgets_of_the_default_settings():
+    configurable = Configuration()
+
+    assert {call: max_tokens_for(call, configurable) for call in CALLS} == {
+        "section": 200 * 2 + 128,
+        "final_section": 150 * 2 + 256,
+        "digest": configurable.section_digest_words * 2 + 64,
+        "queries": 64 * 2 + 256,
+        "grade": 64 * 2 + 256,
+        "outline": 12 * 96 + 128,
+        "outline_edits": 512,
+        "image_prompt": IMAGE_PROMPT_TOKENS,
+    }
+
+
+def test_section_budget_follows_the_word_limit_of_the_guidelines():
+    assert max_tokens_for("section", Configuration(writing_guidelines="- Strict 150-200 word limit")) == 528
+    assert max_tokens_for("section", Configuration(writing_guidelines="- 50 words at most")) == 228
+    assert max_tokens_for("section", Configuration(writing_guidelines="- Be concise", max_tokens=1000)) == 1000
+
+
+def test_outline_budget_grows_with_the_proposed_queries():
+    assert (max_tokens_for("outline", Configuration(outline_search_queries=True, number_of_queries=3))
+            == Configuration().max_tokens)
+    assert (max_tokens_for("outline", Configuration(outline_search_queries=True, number_of_queries=1))
+            == 12 * (96 + 64) + 128)
+
+
+def test_budgets_are_capped_by_max_tokens():
+    configurable = Configuration(max_tokens=300)
+
+    assert all(max_tokens_for(call, configurable) <= 300 for call in CALLS)
+    assert max_tokens_for("queries", configurable) == 300
+
+
+def test_every_call_gets_max_tokens_without_output_limits():
+    configurable = Configuration(output_token_limits=False, max_tokens=4096)
+
+    assert {max_tokens_for(call, configurable) for call in CALLS} == {4096}
+
+
+@pytest.mark.parametrize("output_token_limits", [True, False])
+def test_unknown_calls_are_rejected(output_token_limits):
+    with pytest.raises(ValueError, match="image-prompt"):
+        max_tokens_for("image-prompt", Configuration(output_token_limits=output_token_limits))
@@ -0,0 +1,78 @@
+from bedrock_deep_research.retrieval import BM25Index, chunk_text, format_relevant_chunks, tokenize, top_chunks
+
+
+def _words(start: int, end: int) -> str:
+    return " ".join(f"w{i}" for i in range(start, end))
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("How to upload a file to S3, with presigned URLs?") == [
+        "upload", "file", "s3", "presigned", "urls"]
+
+
+def test_chunk_text_overlaps_windows():
+    assert chunk_text(_words(0, 10), chunk_words=4, overlap=1) == [
+        _words(0, 4), _words(3, 7), _words(6, 10)]
+
+
+def test_chunk_text_short_and_empty_text():
+    assert chunk_text(_words(0, 3), chunk_words=4, overlap=1) == [_words(0, 3)]
+    assert chunk_text("   ", chunk_words=4, overlap=1) == []
+
+
+def test_bm25_ranks_the_documents_matching_the_query_first():
+    index = BM25Index([
+        "DynamoDB tables scale reads and writes",
+        "S3 presigned URLs let browsers upload objects to S3 without credentials",
+        "Presigned URLs expire after the configured time",
+    ])
+
+    ranked = index.search("S3 presigned URL upload", k=3)
+
+    assert [position for position, _ in ranked] == [1, 2]
+    assert ranked[0][1] > ranked[1][1] > 0
+
+
+def test_bm25_favours_rare_terms():
+    index = BM25Index(["lambda python", "lambda java", "lambda go", "ec2 python"])
+
+    scores = index.scores("lambda java")
+
+    assert max(range(4), key=scores.__getitem__) == 1
+    assert scores[0] > 0 and scores[3] == 0
+
+
+def test_bm25_without_documents_or_matches():
+    assert BM25Index([]).search("anything", k=3) == []
+    assert BM25Index(["S3 buckets"]).search("kinesis", k=3) == []
+
+
+def _result(url: str, raw_content: str) -> dict:
+    return {"url": url, "title": url, "content": f"snippet of {url}", "raw_content": raw_content}
+
+
+def test_top_chunks_groups_the_best_passages_by_source():
+    results = [
+        _result("a", "cooking recipes pasta tomato " * 30),
+        _result("b", "presigned upload url s3 bucket " * 30),
+    ]
+
+    relevant = top_chunks(results, "presigned upload", top_k=2, chunk_words=20)
+
+    assert list(relevant) == ["b"]
+    assert len(relevant["b"]) == 2
+
+
+def test_passages_replace_the_snippet_of_their_source():
+    results = [
+        _result("a", "cooking recipes pasta tomato " * 30),
+        _result("b", "presigned upload url s3 bucket " * 30),
+    ]
+
+    formatted = format_relevant_chunks(results, "presigned upload", top_k=1, chunk_words=20,
+                                       numbers={"a": 2, "b": 1})
+
+    assert formatted.index("Source [1] b") < formatted.index("Source [2] a")
+    assert "snippet of b" not in formatted
+    assert "snippet of a" in formatted
+    assert formatted.count("[...] presigned upload") == 1
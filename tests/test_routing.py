@@ -0,0 +1,165 @@
+import json
+import subprocess
+import sys
+import types
+
+import pytest
+from botocore.exceptions import ClientError
+
+from bedrock_deep_research import routing
+from bedrock_deep_research.bedrock import BedrockClients
+from bedrock_deep_research.bench import Faults, Latency
+from bedrock_deep_research.bench.simulator import SimulatedBedrockRuntime, SimulatedService
+from bedrock_deep_research.routing import BedrockRouter, Endpoint, RoutedBedrockRuntime, router_from_env
+
+MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+EAST = Endpoint("us-east-1", MODEL_ID)
+WEST = Endpoint("us-west-2", f"us.{MODEL_ID}")
+BODY = json.dumps({"messages": [{"role": "user", "content": "Hello"}], "max_tokens": 100})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the clock of the router by one advanced by the tests."""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(routing, "time", types.SimpleNamespace(monotonic=lambda: clock.now,
+                                                               perf_counter=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def regions():
+    """Simulated bedrock-runtime of each region, answering instantly."""
+    return {
+        region: SimulatedBedrockRuntime(SimulatedService(region, Latency("constant:0"), seed=i))
+        for i, region in enumerate(["us-east-1", "us-west-2"])
+    }
+
+
+def _routed(regions, **kwargs):
+    router = BedrockRouter({MODEL_ID: [EAST, WEST]}, seed=0, **kwargs)
+    return router, RoutedBedrockRuntime(router, lambda region: regions[region or "us-east-1"])
+
+
+def _outcomes(regions, region: str) -> dict:
+    return dict(regions[region].service.outcomes["invoke_model"])
+
+
+def test_calls_fail_over_cool_down_and_recover(clock, regions):
+    router, runtime = _routed(regions, base_cooldown=1.0)
+    stats = router._stats
+
+    # Throttled in us-east-1, every call fails over to us-west-2, and us-east-1 cools down after its first throttle
+    regions["us-east-1"].service.faults = Faults(throttle_rate=1.0)
+    for _ in range(10):
+        assert json.loads(runtime.invoke_model(body=BODY, modelId=MODEL_ID)["body"].read())["model"] == WEST.model_id
+    assert _outcomes(regions, "us-east-1") == {"throttled": 1}
+    assert _outcomes(regions, "us-west-2") == {"ok": 10}
+    assert stats[EAST].cooldown_until == clock.now + 1.0
+    assert router.plan(MODEL_ID)[-1] == EAST
+
+    # Still throttled once the cooldown is over, the next cooldown is twice as long
+    clock.now += 1.5
+    while stats[EAST].failures < 2:
+        runtime.invoke_model(body=BODY, modelId=MODEL_ID)
+    assert stats[EAST].cooldown_until == clock.now + 2.0
+
+    # Recovered, us-east-1 gets calls again and its failures are forgotten
+    regions["us-east-1"].service.faults = Faults()
+    clock.now += 2.5
+    for _ in range(20):
+        runtime.invoke_model(body=BODY, modelId=MODEL_ID)
+    assert _outcomes(regions, "us-east-1")["ok"] > 0
+    assert stats[EAST].failures == 0 and stats[EAST].throttle_rate < 0.2
+    summary = router.summary()[MODEL_ID]
+    assert summary[f"us-east-1/{MODEL_ID}"]["outcomes"] == {"throttled": 2, **_outcomes(regions, "us-east-1")}
+
+
+def test_endpoints_cooling_down_are_tried_last(clock, regions):
+    router, runtime = _routed(regions)
+    router.record_failure(WEST, throttled=True)
+
+    assert router.plan(MODEL_ID) == [EAST, WEST]
+    clock.now += 1.5
+    assert set(router.plan(MODEL_ID)) == {EAST, WEST}
+
+
+def test_cooldowns_are_capped(clock):
+    router = BedrockRouter({MODEL_ID: [EAST]}, base_cooldown=1.0, max_cooldown=5.0)
+    for _ in range(10):
+        router.record_failure(EAST, throttled=False)
+
+    assert router._stats[EAST].cooldown_until == clock.now + 5.0
+    assert router.summary()[MODEL_ID][f"us-east-1/{MODEL_ID}"]["outcomes"] == {"failed": 10}
+
+
+def test_calls_failing_everywhere_raise_the_last_error(clock, regions):
+    _, runtime = _routed(regions)
+    for region in regions.values():
+        region.service.faults = Faults(error_rate=1.0)
+
+    with pytest.raises(ClientError) as error:
+        runtime.invoke_model(body=BODY, modelId=MODEL_ID)
+    assert error.value.response["Error"]["Code"] == "ServiceUnavailableException"
+    assert sum(sum(region.service.outcomes["invoke_model"].values()) for region in regions.values()) == 2
+
+
+class InvalidRequestRuntime:
+    """bedrock-runtime client rejecting every request as invalid."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        raise ClientError({"Error": {"Code": "ValidationException", "Message": "Malformed input request"},
+                           "ResponseMetadata": {"HTTPStatusCode": 400}}, "InvokeModel")
+
+
+def test_errors_of_the_request_are_not_failed_over(clock):
+    client = InvalidRequestRuntime()
+    router, runtime = _routed({"us-east-1": client, "us-west-2": client})
+
+    with pytest.raises(ClientError) as error:
+        runtime.invoke_model(body=BODY, modelId=MODEL_ID)
+    assert error.value.response["Error"]["Code"] == "ValidationException"
+    assert client.calls == 1
+    assert all(stats.failures == 0 for stats in router._stats.values())
+
+
+def test_models_without_routes_use_the_default_region(clock, regions):
+    _, runtime = _routed(regions)
+
+    response = runtime.invoke_model(body=BODY, modelId="amazon.nova-canvas-v1:0")
+
+    assert json.loads(response["body"].read())["model"] == "amazon.nova-canvas-v1:0"
+    assert _outcomes(regions, "us-east-1") == {"ok": 1} and _outcomes(regions, "us-west-2") == {}
+
+
+def test_router_from_env(monkeypatch, tmp_path):
+    routes = {MODEL_ID: [{"region": "us-east-1", "requests_per_minute": 100},
+                         {"region": "us-west-2", "model_id": f"us.{MODEL_ID}", "weight": 2}]}
+
+    monkeypatch.delenv("BEDROCK_ROUTES", raising=False)
+    assert router_from_env() is None
+    monkeypatch.setenv("BEDROCK_ROUTES", json.dumps(routes))
+    assert router_from_env().routes == {MODEL_ID: [Endpoint("us-east-1", MODEL_ID, requests_per_minute=100),
+                                                   Endpoint("us-west-2", f"us.{MODEL_ID}", weight=2)]}
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps(routes))
+    monkeypatch.setenv("BEDROCK_ROUTES", str(path))
+    assert router_from_env().endpoints(MODEL_ID)[1].weight == 2
+
+
+def test_bedrock_clients_create_their_router_on_first_use(monkeypatch):
+    monkeypatch.setenv("BEDROCK_ROUTES", json.dumps({MODEL_ID: [{"region": "us-west-2"}]}))
+    clients = BedrockClients(routes_from_env=True)
+
+    assert clients.router.endpoints(MODEL_ID) == [Endpoint("us-west-2", MODEL_ID)]
+    assert BedrockClients().router is None
+
+    imported = subprocess.run(
+        [sys.executable, "-c", "import sys, bedrock_deep_research.bedrock; "
+                               "print('bedrock_deep_research.routing' in sys.modules, 'botocore' in sys.modules)"],
+        capture_output=True, text=True, check=True)
+    assert imported.stdout.split() == ["False", "False"]
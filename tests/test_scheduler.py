@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from bedrock_deep_research.model import Section
+from bedrock_deep_research.scheduler import FairScheduler, scheduled, section_priority
+
+
+def _wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Sections:
+    """Sections acquiring the slots of a scheduler in threads, recording the order they got them."""
+
+    def __init__(self, scheduler: FairScheduler):
+        self.scheduler = scheduler
+        self.started = []
+        self.returned = 0
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, article_id: str, priority: int = 0, article_limit: int = 0) -> None:
+        """Starts a section and waits for it to be queued or running, so that sections queue in submission order."""
+        def run():
+            self.scheduler.acquire(article_id, priority, article_limit)
+            with self._lock:
+                self.started.append(name)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        _wait_until(lambda: self.scheduler.waiting + len(self.started) == len(self.threads))
+
+    def next(self, count: int = 1) -> list:
+        """Waits for the next `count` sections to start and returns them."""
+        done = self.returned
+        _wait_until(lambda: len(self.started) >= done + count)
+        time.sleep(0.02)
+        assert len(self.started) == done + count, "more sections started than there were slots"
+        self.returned += count
+        return self.started[done:]
+
+
+@pytest.fixture
+def scheduler():
+    return FairScheduler(max_concurrency=1)
+
+
+def test_free_slots_go_to_the_highest_priority_then_the_first_come(scheduler):
+    sections = Sections(scheduler)
+    scheduler.acquire("a")
+    for name, priority in (("short", 1), ("long", 9), ("medium", 5), ("medium again", 5)):
+        sections.submit(name, "a", priority)
+
+    order = []
+    for _ in range(4):
+        scheduler.release("a")
+        order += sections.next()
+    assert order == ["long", "medium", "medium again", "short"]
+
+
+def test_free_slots_go_to_the_article_with_the_fewest_running_sections():
+    scheduler = FairScheduler(max_concurrency=3)
+    sections = Sections(scheduler)
+    scheduler.acquire("a")
+    scheduler.acquire("a")
+    scheduler.acquire("b")
+    sections.submit("a3", "a", priority=9)
+    sections.submit("b2", "b", priority=1)
+    sections.submit("c1", "c", priority=0)
+
+    scheduler.release("a")
+    assert sections.next() == ["c1"]
+    scheduler.release("a")
+    assert sections.next() == ["a3"]
+    scheduler.release("c")
+    assert sections.next() == ["b2"]
+
+
+def test_articles_are_limited_to_their_own_concurrency():
+    scheduler = FairScheduler(max_concurrency=0)
+    sections = Sections(scheduler)
+    for i in range(4):
+        sections.submit(f"a{i}", "a", article_limit=2)
+    sections.submit("b0", "b", article_limit=2)
+
+    assert sorted(sections.next(3)) == ["a0", "a1", "b0"]
+    assert scheduler.running == 3 and scheduler.waiting == 2
+    scheduler.release("b")
+    time.sleep(0.02)
+    assert scheduler.waiting == 2
+    scheduler.release("a")
+    assert sections.next() == ["a2"]
+
+
+def test_raising_the_limit_admits_waiting_sections(scheduler):
+    sections = Sections(scheduler)
+    scheduler.acquire("a")
+    sections.submit("b0", "b")
+    sections.submit("c0", "c")
+
+    scheduler.set_max_concurrency(2)
+    assert sections.next() == ["b0"]
+    scheduler.set_max_concurrency(0)
+    assert sections.next() == ["c0"]
+
+
+def test_scheduled_nodes_hold_a_slot_while_running(scheduler):
+    running = []
+
+    def node(state, config):
+        running.append(scheduler.running)
+        return {"completed_sections": [state["section"]]}
+
+    section = Section(section_number=1, name="Setup", description="How to set up the bucket", research=True)
+    assert section_priority(section) == 6
+
+    assert scheduled(node, scheduler)({"section": section}, {}) == {"completed_sections": [section]}
+    assert running == [1] and scheduler.running == 0
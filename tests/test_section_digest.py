@@ -0,0 +1,76 @@
+import re
+
+import pytest
+
+from bedrock_deep_research.bedrock import use_bedrock_clients
+from bedrock_deep_research.bench import CallStats, FakeBedrock
+from bedrock_deep_research.model import Section
+from bedrock_deep_research.nodes import CompletedSectionsFormatter, SectionDigestWriter
+
+CONTENT = "## Generating URLs\n" + " ".join(["Call generate_presigned_url with the bucket and the key [1]."] * 40)
+
+
+def _section(number: int, digest: str = "") -> Section:
+    return Section(section_number=number, name=f"Section {number}", description="With boto3",
+                   content=CONTENT, digest=digest)
+
+
+def test_completed_sections_are_summarized_into_their_digest():
+    stats = CallStats()
+    with use_bedrock_clients(FakeBedrock(stats=stats)):
+        update = SectionDigestWriter()({"section": _section(1)}, {"configurable": {"section_digest_words": 40}})
+
+    [section] = update["completed_sections"]
+    assert section.digest and section.digest != CONTENT and section.content == CONTENT
+    assert dict(stats.calls) == {"llm:text": 1}
+
+
+def test_sections_are_published_without_digest_when_it_fails(monkeypatch):
+    def fail(self, model, section_title, section_content, digest_words):
+        raise ValueError("Model unavailable")
+
+    monkeypatch.setattr(SectionDigestWriter, "_generate_digest", fail)
+    with use_bedrock_clients(FakeBedrock()):
+        update = SectionDigestWriter()({"section": _section(1)}, {"configurable": {"section_digest_words": 40}})
+
+    assert update["completed_sections"][0].digest == ""
+
+
+def _draft(sections, **configurable) -> str:
+    state = {"completed_sections": sections}
+    return CompletedSectionsFormatter()(state, {"configurable": configurable})["report_sections_from_research"]
+
+
+def test_final_sections_get_the_digests_cut_to_the_context_budget():
+    sections = [_section(1, "Presigned URLs are generated with boto3."), _section(2, "word " * 2000)]
+
+    draft = _draft(sections, section_digest_words=40, final_context_tokens=200)
+
+    assert draft.startswith("Section 1: Section 1\nPresigned URLs are generated with boto3.\n\n")
+    assert "generate_presigned_url" not in draft
+    # Each section gets an equal share of the budget, 400 characters at 4 characters per token
+    second = draft[draft.index("Section 2: Section 2"):].strip()
+    assert second.endswith(" [...]") and len(second) <= 400 + len(" [...]")
+
+
+@pytest.mark.parametrize("sections, configurable", [
+    ([_section(1, "Presigned URLs are generated with boto3."), _section(2)], {"section_digest_words": 40}),
+    ([_section(1, "Presigned URLs are generated with boto3.")], {"section_digest_words": 0}),
+])
+def test_final_sections_get_the_full_sections_without_every_digest(sections, configurable):
+    draft = _draft(sections, **configurable)
+
+    assert draft.count(CONTENT) == len(sections)
+
+
+def test_articles_summarize_their_researched_sections(run_article):
+    values, stats, _ = run_article(sections=4, section_digest_words=40)
+    researched = [s for s in values["sections"] if s.research]
+
+    draft = values["report_sections_from_research"]
+    assert len(re.findall(r"^Section \d+: ", draft, re.MULTILINE)) == len(researched)
+    assert "=" * 60 not in draft
+    assert values["final_report"]
+
+    _, full_stats, _ = run_article(sections=4)
+    assert stats.calls["llm:text"] == full_stats.calls["llm:text"] + len(researched)
@@ -0,0 +1,37 @@
+import re
+
+import pytest
+
+from bedrock_deep_research.bench import FakeTavilyClient
+from bedrock_deep_research.config import Configuration
+from bedrock_deep_research.model import Section
+from bedrock_deep_research.nodes import SectionWebResearcher
+from bedrock_deep_research.web_search import WebSearch
+
+SECTION = Section(section_number=1, name="Generating presigned URLs",
+                  description="How to generate a presigned URL with boto3", research=True)
+QUERIES = ["boto3 generate_presigned_url", "s3 presigned url expiry"]
+
+
+def _source_str(**configurable) -> str:
+    node = SectionWebResearcher(WebSearch(None, tavily_client=FakeTavilyClient()))
+    state = {"section": SECTION, "search_queries": QUERIES, "search_iterations": 0, "sources": []}
+    config = {"configurable": {"thread_id": "test", "source_pool": False, **configurable}}
+    return node(state, config)["source_str"]
+
+
+def test_section_writers_get_passages_by_default():
+    assert Configuration().retrieval_top_k > 0
+    assert _source_str() == _source_str(retrieval_top_k=Configuration().retrieval_top_k)
+
+
+@pytest.mark.parametrize("top_k, chunk_words", [(3, 100), (6, 100), (6, 50)])
+def test_passages_grow_the_prompt_by_at_most_top_k_chunks(top_k, chunk_words):
+    snippets = _source_str(retrieval_top_k=0)
+    passages = _source_str(retrieval_top_k=top_k, retrieval_chunk_words=chunk_words)
+
+    found = re.findall(r"\[\.\.\.\] (.*?) \[\.\.\.\]", passages)
+    assert len(found) == top_k
+    assert all(len(passage.split()) <= chunk_words for passage in found)
+    assert passages.count("Source [") == snippets.count("Source [")
+    assert len(snippets.split()) < len(passages.split()) <= len(snippets.split()) + top_k * chunk_words
@@ -0,0 +1,130 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from bedrock_deep_research.bedrock import use_bedrock_clients
+from bedrock_deep_research.bench import FakeBedrock, FakeTavilyClient, Latency
+from bedrock_deep_research.server import ResearchRequestHandler, ResearchService
+from bedrock_deep_research.web_search import WebSearch
+
+
+@pytest.fixture
+def serve(tmp_path):
+    """Starts servers over a fake Bedrock, with the given workers and queue, and returns their base url."""
+    servers = []
+
+    def start(max_workers: int = 2, max_queued: int = 4) -> str:
+        service = ResearchService(str(tmp_path / "runs.sqlite"), None, output_dir=str(tmp_path / "output"),
+                                  max_workers=max_workers, max_queued=max_queued,
+                                  web_search=WebSearch(None, tavily_client=FakeTavilyClient()))
+        handler = type("Handler", (ResearchRequestHandler,), {"service": service})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append((server, service))
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Slow enough model calls for the steps to still be running when the tests check it
+    with use_bedrock_clients(FakeBedrock(llm_latency=Latency("constant:0.05"), array_sizes={"sections": 4})):
+        yield start
+        for server, service in servers:
+            server.shutdown()
+            service.jobs.shutdown()
+
+
+def call(base: str, method: str, path: str, body=None, headers=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base + path, method=method, data=data,
+                                     headers={"Content-Type": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def events(base: str, thread_id: str, headers=None):
+    """The events of the current step of the run, read until the server closes the stream."""
+    request = urllib.request.Request(f"{base}/runs/{thread_id}/events", headers=headers or {})
+    with urllib.request.urlopen(request) as response:
+        lines = response.read().decode().splitlines()
+    return [json.loads(line[len("data: "):]) for line in lines if line.startswith("data: ")]
+
+
+def test_create_run_and_write_the_article(serve):
+    base = serve()
+    status, run = call(base, "POST", "/runs", {"topic": "S3 presigned URLs", "configurable": {"max_search_depth": 1}})
+    assert status == 202 and run["status"] in ("queued", "running")
+
+    outline = events(base, run["thread_id"])
+    assert (outline[-1]["type"], outline[-1]["status"]) == ("status", "waiting_feedback")
+    status, described = call(base, "GET", f"/runs/{run['thread_id']}")
+    assert status == 200 and described["status"] == "waiting_feedback" and len(described["sections"]) == 4
+
+    assert call(base, "POST", f"/runs/{run['thread_id']}/feedback", {"feedback": True})[0] == 202
+    assert events(base, run["thread_id"])[-1]["status"] == "completed"
+    assert call(base, "GET", f"/runs/{run['thread_id']}")[1]["final_report"]
+
+
+@pytest.mark.parametrize("body", [
+    {"topic": ""},
+    {"topic": "S3", "configurable": 5},
+    {"topic": "S3", "configurable": ["max_search_depth"]},
+    {"topic": "S3", "configurable": {"number_of_queries": "abc"}},
+    {"topic": "S3", "configurable": {"number_of_queries": [2]}},
+    {"topic": "S3", "configurable": {"max_search_depth": True}},
+    {"topic": "S3", "configurable": {"unknown_setting": 1}},
+    {"topic": "S3", "configurable": {"output_dir": "/"}},
+])
+def test_invalid_runs_are_rejected(serve, body):
+    status, error = call(serve(), "POST", "/runs", body)
+    assert status == 400 and error["error"]
+
+
+def test_unknown_runs_are_not_found(serve):
+    base = serve()
+    assert call(base, "GET", "/runs/unknown")[0] == 404
+    assert call(base, "POST", "/runs/unknown/feedback", {"feedback": True})[0] == 404
+
+
+def test_feedback_to_a_running_step_conflicts(serve):
+    base = serve()
+    _, run = call(base, "POST", "/runs", {"topic": "S3 presigned URLs"})
+
+    status, error = call(base, "POST", f"/runs/{run['thread_id']}/feedback", {"feedback": True})
+    assert status == 409 and error["error"].endswith(("queued", "running"))
+
+
+def test_steps_beyond_the_queue_are_rejected(serve):
+    base = serve(max_workers=1, max_queued=0)
+    assert call(base, "POST", "/runs", {"topic": "S3 presigned URLs"})[0] == 202
+
+    request = urllib.request.Request(f"{base}/runs", method="POST", data=json.dumps({"topic": "Lambda"}).encode())
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request)
+    assert error.value.code == 429 and error.value.headers["Retry-After"]
+
+
+def test_event_stream_resumes_after_the_last_event_id(serve):
+    base = serve()
+    _, run = call(base, "POST", "/runs", {"topic": "S3 presigned URLs"})
+    all_events = events(base, run["thread_id"])
+
+    resumed = events(base, run["thread_id"], {"Last-Event-ID": str(all_events[2]["seq"])})
+    assert resumed == all_events[3:]
+    assert events(base, run["thread_id"], {"Last-Event-ID": str(all_events[-1]["seq"])}) == []
+
+
+@pytest.mark.parametrize("headers, query", [({"Last-Event-ID": "abc"}, ""), ({}, "?after=-1")])
+def test_invalid_event_cursors_are_rejected(serve, headers, query):
+    base = serve()
+    _, run = call(base, "POST", "/runs", {"topic": "S3 presigned URLs"})
+
+    request = urllib.request.Request(f"{base}/runs/{run['thread_id']}/events{query}", headers=headers)
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request)
+    assert error.value.code == 400
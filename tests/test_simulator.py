@@ -0,0 +1,98 @@
+import types
+
+import pytest
+
+from bedrock_deep_research.bench import Faults, Latency, Quota
+from bedrock_deep_research.bench import simulator
+from bedrock_deep_research.bench.simulator import SimulatedService, TokenBucket, _percentiles
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the clock of the simulator by one advanced by the tests."""
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(simulator, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def _outcomes(service: SimulatedService, calls: int, key: str = "model"):
+    """Draws the outcomes of calls served one after the other, with their delays."""
+    drawn = []
+    for _ in range(calls):
+        error, delay = service.begin("invoke_model", key)
+        service.end("invoke_model", key, error, delay)
+        drawn.append(("ok" if error is None else error.kind, delay))
+    return drawn
+
+
+def test_token_bucket_spends_its_burst_then_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+
+    assert [bucket.take(1) for _ in range(5)] == [True, True, True, True, False]
+    clock.now += 1
+    assert [bucket.take(1) for _ in range(3)] == [True, True, False]
+    clock.now += 60
+    assert bucket.take(4) and not bucket.take(1)
+
+
+def test_token_bucket_accepts_calls_larger_than_itself_once_full(clock):
+    bucket = TokenBucket(rate=1, capacity=10)
+
+    assert bucket.take(50)
+    assert not bucket.take(50)
+    clock.now += 10
+    assert bucket.take(50)
+
+
+def test_requests_beyond_the_quota_of_a_model_are_throttled(clock):
+    service = SimulatedService("bedrock", Latency("constant:0.1"),
+                               quota=Quota(requests_per_minute=60, burst_seconds=3))
+
+    assert [kind for kind, _ in _outcomes(service, 4)] == ["ok", "ok", "ok", "throttled"]
+    assert [kind for kind, _ in _outcomes(service, 1, key="other-model")] == ["ok"]
+    clock.now += 1
+    assert [kind for kind, _ in _outcomes(service, 2)] == ["ok", "throttled"]
+    assert service.outcomes["invoke_model"] == {"ok": 5, "throttled": 2}
+
+
+def test_tokens_and_calls_in_flight_beyond_the_quota_are_throttled(clock):
+    service = SimulatedService("bedrock", Latency("constant:0.1"),
+                               quota=Quota(tokens_per_minute=600, max_in_flight=2, burst_seconds=1))
+
+    first, _ = service.begin("invoke_model", "model", tokens=6)
+    second, _ = service.begin("invoke_model", "model", tokens=6)
+    third, _ = service.begin("invoke_model", "model", tokens=1)
+
+    assert first is None and second.kind == "throttled" and third.kind == "throttled"
+    assert "tokens" in str(second) and "concurrent" in str(third)
+
+
+def test_faults_are_drawn_at_their_rates_and_delays():
+    faults = Faults(throttle_rate=0.1, error_rate=0.2, timeout_rate=0.05, slow_rate=0.1, slow_factor=4, timeout=7)
+    drawn = _outcomes(SimulatedService("bedrock", Latency("constant:0.5"), faults=faults, seed=1), 4000)
+
+    kinds = [kind for kind, _ in drawn]
+    for kind, rate in (("throttled", 0.1), ("server_error", 0.2), ("timeout", 0.05), ("ok", 0.65)):
+        assert kinds.count(kind) / len(drawn) == pytest.approx(rate, abs=0.02)
+    delays = {kind: {delay for k, delay in drawn if k == kind} for kind in set(kinds)}
+    assert delays == {"throttled": {0.0}, "server_error": {0.25}, "timeout": {7}, "ok": {0.5, 2.0}}
+    slow = sum(1 for kind, delay in drawn if kind == "ok" and delay == 2.0)
+    assert slow / kinds.count("ok") == pytest.approx(0.1, abs=0.02)
+
+
+def test_faults_are_reproducible_with_the_same_seed():
+    faults = Faults(throttle_rate=0.2, error_rate=0.2, slow_rate=0.2)
+    latency = Latency("lognormal:0.3:0.4")
+
+    first = _outcomes(SimulatedService("bedrock", latency, faults=faults, seed=7), 200)
+    second = _outcomes(SimulatedService("bedrock", latency, faults=faults, seed=7), 200)
+    other = _outcomes(SimulatedService("bedrock", latency, faults=faults, seed=8), 200)
+
+    assert first == second
+    assert first != other
+
+
+def test_percentiles():
+    assert _percentiles([]) == {"p50": None, "p95": None, "p99": None}
+    assert _percentiles([0.5]) == {"p50": 0.5, "p95": 0.5, "p99": 0.5}
+    assert _percentiles([i / 100 for i in range(100, 0, -1)]) == {"p50": 0.51, "p95": 0.96, "p99": 1.0}
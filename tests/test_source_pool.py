@@ -0,0 +1,132 @@
+import types
+
+import pytest
+
+from bedrock_deep_research import registry
+from bedrock_deep_research.registry import RunRegistry, release_run
+from bedrock_deep_research.source_pool import SourcePool, _pools, get_source_pool
+
+
+def _result(url: str, title: str, content: str = "") -> dict:
+    return {"url": url, "title": title, "content": content}
+
+
+RESULTS = [
+    _result("https://a", "Generate S3 presigned URLs with boto3", "generate_presigned_url signs a request"),
+    _result("https://b", "Presigned URL expiry", "S3 presigned URLs expire after ExpiresIn seconds"),
+    _result("https://c", "Upload files with S3 presigned POST", "Browsers upload files to S3 presigned POST"),
+    _result("https://d", "DynamoDB capacity modes", "On-demand and provisioned capacity"),
+]
+
+
+def test_queries_covered_by_the_pool_are_served_ranked():
+    pool = SourcePool(min_results=2, min_overlap=0.6)
+    pool.add(RESULTS)
+
+    # "https://c" only has half of the query terms
+    assert [hit["url"] for hit in pool.lookup("S3 presigned URLs expire")] == ["https://b", "https://a"]
+    assert [hit["url"] for hit in pool.lookup("S3 presigned URLs expire", k=1)] == ["https://b"]
+
+
+def test_queries_not_covered_by_the_pool_are_searched():
+    pool = SourcePool(min_results=2, min_overlap=0.6)
+    pool.add(RESULTS)
+
+    # A single matching source, too few sources matching enough terms, or no terms at all
+    assert pool.lookup("DynamoDB capacity") == []
+    assert pool.lookup("S3 lifecycle rules glacier transition") == []
+    assert pool.lookup("how to") == []
+    # The sources a section already has do not count
+    assert pool.lookup("S3 presigned URLs", exclude={"https://a", "https://b"}) == []
+
+
+def test_results_are_pooled_once_per_url():
+    pool = SourcePool(min_results=1)
+    pool.add(RESULTS[:2])
+    pool.add([_result("https://a", "Another title"), RESULTS[3]])
+
+    assert len(pool) == 3
+    assert pool.lookup("DynamoDB capacity modes") == [RESULTS[3]]
+    assert pool.lookup("generate presigned boto3")[0]["title"] == RESULTS[0]["title"]
+
+
+def test_runs_get_their_own_pool_unless_disabled():
+    config = {"configurable": {"thread_id": "pooled", "source_pool_min_results": 5}}
+    pool = get_source_pool(config)
+
+    assert pool is get_source_pool(config) and pool.min_results == 5
+    assert get_source_pool({"configurable": {"thread_id": "other"}}) is not pool
+    assert get_source_pool({"configurable": {"thread_id": "disabled", "source_pool": False}}) is None
+    assert get_source_pool({"configurable": {}}) is None
+
+    release_run("pooled")
+    release_run("other")
+    assert get_source_pool(config) is not pool
+    release_run("pooled")
+
+
+def test_sections_reuse_the_sources_of_the_run(run_article):
+    _, _, searched = run_article(sections=4, speculative_research=False, source_pool=False)
+    runs = len(_pools)
+    values, _, pooled = run_article(sections=4, speculative_research=False)
+
+    assert sum(pooled.queries.values()) < sum(searched.queries.values())
+    assert values["final_report"]
+    # The pool of the run is released once its article is compiled
+    assert len(_pools) == runs
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the clock of the registries by one advanced by the tests."""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(registry, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_runs_not_used_for_the_ttl_are_dropped(clock):
+    released = []
+    runs = RunRegistry("test", ttl=60, on_release=released.append)
+    runs.setdefault("a", lambda: "pool a")
+    clock.now += 30
+    runs.set("b", "pool b")
+    clock.now += 40
+
+    assert runs.get("b") == "pool b" and runs.get("a") is None
+    assert released == ["pool a"] and len(runs) == 1
+
+
+def test_the_least_recently_used_runs_are_dropped_beyond_max_runs(clock):
+    released = []
+    runs = RunRegistry("test", max_runs=2, on_release=released.append)
+    runs.set("a", "pool a")
+    runs.set("b", "pool b")
+    runs.get("a")
+    runs.setdefault("c", lambda: "pool c")
+
+    assert released == ["pool b"]
+    assert [runs.get(t) for t in ("a", "b", "c")] == ["pool a", None, "pool c"]
+
+
+def test_runs_are_released_from_every_registry(clock):
+    released = []
+
+    def release(value):
+        released.append(value)
+        raise RuntimeError("already closed")
+
+    budgets = RunRegistry("budget", on_release=release)
+    pools = RunRegistry("pool", on_release=released.append)
+    budgets.set("a", "budget a")
+    pools.set("a", "pool a")
+    pools.set("a", "new pool a")
+    assert released == ["pool a"]
+
+    # Errors of on_release are logged, the other registries are still released
+    release_run("a")
+    assert sorted(released) == ["budget a", "new pool a", "pool a"]
+    assert budgets.get("a") is None and pools.get("a") is None
+
+    # Popping a run hands its object over without releasing it
+    pools.set("b", "pool b")
+    assert pools.pop("b") == "pool b" and released.count("pool b") == 0
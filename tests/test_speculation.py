@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from bedrock_deep_research.bench import Latency
+from bedrock_deep_research.web_search import WebSearch
+from conftest import CountingTavilyClient
+
+
+@pytest.mark.parametrize("outline_search_queries", [True, False])
+def test_each_query_is_searched_once_across_speculation_and_sections(run_article, outline_search_queries):
+    # Searches slow enough to still be running when the outline is approved, and no source pool, whose results
+    # of the initial research would cover the queries of the fakes
+    state, _, tavily_client = run_article(search_latency="constant:0.3", speculative_research=True,
+                                          source_pool=False, outline_search_queries=outline_search_queries)
+
+    assert state["final_report"]
+    assert tavily_client.queries
+    assert max(tavily_client.queries.values()) == 1
+
+
+def test_concurrent_identical_searches_share_one_call():
+    tavily_client = CountingTavilyClient(latency=Latency("constant:0.1"))
+    web_search = WebSearch(None, tavily_client=tavily_client)
+
+    async def search_twice():
+        return await asyncio.gather(web_search.search(["S3 presigned URL"]), web_search.search(["S3 presigned URL"]))
+
+    first, second = asyncio.run(search_twice())
+    assert list(first) == list(second)
+    assert tavily_client.queries == {"S3 presigned URL": 1}
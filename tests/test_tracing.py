@@ -0,0 +1,168 @@
+import contextvars
+import json
+import threading
+import uuid
+from pathlib import Path
+from typing import Literal
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+
+from bedrock_deep_research.bench import FakeChatBedrock
+from bedrock_deep_research.model import Section
+from bedrock_deep_research.tracing import (TracingCallbackHandler, critical_path, span, start_span, summarize,
+                                           trace_run, traced, wrap_node)
+
+
+@pytest.fixture
+def trace_config(tmp_path):
+    # Traces are kept per thread_id by the process, every test traces its own run
+    return {"configurable": {"thread_id": str(uuid.uuid4()), "trace_dir": str(tmp_path)}}
+
+
+def _spans(trace_config):
+    configurable = trace_config["configurable"]
+    events = json.loads(Path(configurable["trace_dir"], f"{configurable['thread_id']}.json").read_text())["traceEvents"]
+    return events, {e["name"]: e for e in events if e["ph"] == "X"}
+
+
+def test_spans_are_no_ops_without_a_traced_run(tmp_path):
+    with span("node:anything") as current:
+        assert current is None
+    assert start_span("llm:invoke") is None
+
+    with trace_run("graph:start", {"configurable": {"thread_id": "untraced"}}) as root:
+        assert root is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spans_nest_and_are_exported(trace_config):
+    with trace_run("graph:start", trace_config) as root:
+        with span("node:outline", topic="S3") as outline:
+            with span("llm:invoke") as llm:
+                llm.set_attribute("input_tokens", 12)
+        with pytest.raises(ValueError):
+            with span("node:failing"):
+                raise ValueError("failed")
+
+    _, spans = _spans(trace_config)
+    assert spans["node:outline"]["args"]["parent_id"] == root.span_id
+    assert spans["llm:invoke"]["args"]["parent_id"] == outline.span_id
+    assert spans["llm:invoke"]["args"]["input_tokens"] == "12"
+    assert spans["node:outline"]["args"]["topic"] == "S3"
+    assert spans["node:failing"]["args"]["status"] == "ValueError"
+    assert spans["graph:start"]["args"]["status"] == "ok" and spans["graph:start"]["cat"] == "graph"
+    assert spans["node:outline"]["ts"] <= spans["llm:invoke"]["ts"]
+    assert (spans["llm:invoke"]["ts"] + spans["llm:invoke"]["dur"]
+            <= spans["node:outline"]["ts"] + spans["node:outline"]["dur"])
+
+
+def test_invocations_of_a_run_share_its_trace(trace_config):
+    with trace_run("graph:start", trace_config):
+        with span("node:outline"):
+            pass
+    with trace_run("graph:feedback", trace_config):
+        with span("node:section"):
+            pass
+
+    _, spans = _spans(trace_config)
+    assert {"graph:start", "node:outline", "graph:feedback", "node:section"} <= set(spans)
+
+
+def test_spans_of_other_threads_are_linked_to_their_parent(trace_config):
+    with trace_run("graph:feedback", trace_config):
+        with span("node:sections") as parent:
+            def branch():
+                with span("node:build_section", section="Setup"):
+                    pass
+
+            thread = threading.Thread(target=contextvars.copy_context().run, args=(branch,), name="branch")
+            thread.start()
+            thread.join()
+
+    events, spans = _spans(trace_config)
+    child = spans["node:build_section"]
+    assert child["args"]["parent_id"] == parent.span_id and child["tid"] != spans["node:sections"]["tid"]
+    flows = [e for e in events if e.get("cat") == "flow"]
+    assert [(e["ph"], e["tid"]) for e in flows] == [("s", spans["node:sections"]["tid"]), ("f", child["tid"])]
+    assert {"name": "thread_name", "ph": "M", "pid": 1, "tid": child["tid"], "args": {"name": "branch"}} in events
+
+
+def test_traced_nodes_keep_their_command_edges(trace_config):
+    def node(state, config) -> Command[Literal["human_feedback"]]:
+        return Command(goto="human_feedback")
+
+    wrapped = traced("write_section", node)
+    assert wrapped.__annotations__["return"] == Command[Literal["human_feedback"]]
+
+    with trace_run("graph:feedback", trace_config):
+        wrapped({"section": Section(section_number=1, name="Setup", description="Bucket")}, trace_config)
+
+    _, spans = _spans(trace_config)
+    assert spans["node:write_section"]["args"]["section"] == "Setup"
+
+
+def test_wrap_node_skips_unresolvable_annotations():
+    def node(state, config) -> "UnknownType":  # noqa: F821
+        return {}
+
+    def wrapper(state, config):
+        return node(state, config)
+
+    assert "return" not in wrap_node(wrapper, node).__annotations__
+
+
+def test_llm_calls_are_traced_with_their_tokens(trace_config):
+    with trace_run("graph:start", trace_config):
+        with span("node:outline"):
+            FakeChatBedrock(model_id="fake-model").invoke(
+                [HumanMessage(content="Hello")], config={"callbacks": [TracingCallbackHandler()]})
+
+    _, spans = _spans(trace_config)
+    llm = spans["llm:invoke"]
+    assert llm["args"]["parent_id"] == spans["node:outline"]["args"]["span_id"]
+    assert int(llm["args"]["input_tokens"]) > 0 and int(llm["args"]["output_tokens"]) > 0
+
+
+def _event(name: str, span_id: str, parent_id, ts: float, dur: float) -> dict:
+    return {"name": name, "ph": "X", "ts": ts, "dur": dur, "args": {"span_id": span_id, "parent_id": parent_id}}
+
+
+def test_critical_path_follows_the_branches_ending_last():
+    events = [
+        _event("graph:feedback", "root", None, 0, 100),
+        _event("node:section:a", "a", "root", 0, 60),
+        _event("node:section:b", "b", "root", 0, 80),
+        _event("llm:b1", "b1", "b", 0, 30),
+        _event("llm:b2", "b2", "b", 30, 50),
+        _event("node:final", "final", "root", 80, 20),
+    ]
+
+    assert [e["name"] for e in critical_path(events)] == ["llm:b1", "llm:b2", "node:final"]
+
+
+def test_summarize_an_exported_trace(tmp_path, trace_config):
+    with trace_run("graph:feedback", trace_config):
+        with span("node:build_section_with_web_research", section="Setup"):
+            with span("llm:invoke", model_id="fake-model"):
+                pass
+
+    summary = summarize(str(tmp_path / f"{trace_config['configurable']['thread_id']}.json"))
+
+    assert "Slowest section branch: Setup" in summary
+    assert "llm:invoke fake-model" in summary
+
+
+def test_article_runs_export_their_trace(run_article, tmp_path):
+    values, _, _ = run_article(sections=4, trace_dir=str(tmp_path / "traces"))
+
+    [trace_file] = (tmp_path / "traces").iterdir()
+    events = [e for e in json.loads(trace_file.read_text())["traceEvents"] if e["ph"] == "X"]
+    by_id = {e["args"]["span_id"]: e for e in events}
+    roots = [e["name"] for e in events if e["args"]["parent_id"] is None]
+    assert sorted(roots) == ["graph:feedback", "graph:start"]
+    branches = [e for e in events if e["name"] == "node:build_section_with_web_research"]
+    assert sorted(e["args"]["section"] for e in branches) == sorted(s.name for s in values["sections"] if s.research)
+    assert all(by_id[e["args"]["parent_id"]]["name"] == "graph:feedback" for e in branches)
+    assert any(e["name"] == "llm:invoke" for e in events)
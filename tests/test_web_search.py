@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from bedrock_deep_research.bench import FakeTavilyClient
+from bedrock_deep_research.retrieval import exact_terms
+from bedrock_deep_research.web_search import WebSearch
+
+
+def _search(web_search: WebSearch, query: str):
+    return asyncio.run(web_search.search([query]))
+
+
+@pytest.fixture
+def web_search():
+    return WebSearch(None, tavily_client=FakeTavilyClient(), similarity_threshold=0.8)
+
+
+def test_exact_terms():
+    assert exact_terms("S3 presigned URL Python 2024") == {"s3", "2024"}
+    assert exact_terms("is DynamoDB not eventually consistent") == {"not"}
+    assert exact_terms("Lambda cold start without provisioned concurrency") == {"without"}
+    assert exact_terms("why can't EC2 instances boot") == {"can't", "ec2"}
+
+
+def test_near_duplicate_query_is_served_from_cache(web_search):
+    _search(web_search, "S3 presigned URL Python 2024")
+    assert web_search._get_cached("Python S3 presigned URLs 2024", 0.8) is not None
+
+
+@pytest.mark.parametrize("cached, query", [
+    ("S3 presigned URL Python 2023", "S3 presigned URL Python 2024"),
+    ("is DynamoDB eventually consistent", "is DynamoDB not eventually consistent"),
+    ("Lambda cold start with provisioned concurrency", "Lambda cold start without provisioned concurrency"),
+])
+def test_queries_differing_by_number_or_negation_are_not_served_from_cache(web_search, cached, query):
+    _search(web_search, cached)
+    assert web_search._get_cached(cached, 0.8) is not None
+    assert web_search._get_cached(query, 0.8) is None
+
+
+def test_similarity_zero_serves_identical_queries_only(web_search):
+    _search(web_search, "S3 presigned URL Python 2024")
+    assert web_search._get_cached("Python S3 presigned URLs 2024", 0) is None